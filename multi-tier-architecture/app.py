@@ -3,26 +3,49 @@ import os
 
 import aws_cdk as cdk
 
+from multi_tier_architecture.app_stack import AppStack
+from multi_tier_architecture.config import StackConfig, context_flag
+from multi_tier_architecture.data_stack import DataStack
+from multi_tier_architecture.multi_region import add_regional_stacks
 from multi_tier_architecture.multi_tier_architecture_stack import MultiTierArchitectureStack
+from multi_tier_architecture.network_stack import NetworkStack
+from multi_tier_architecture.performance_lint import PerformanceLint
 
 
 app = cdk.App()
-MultiTierArchitectureStack(app, "MultiTierArchitectureStack",
-    # If you don't specify 'env', this stack will be environment-agnostic.
-    # Account/Region-dependent features and context lookups will not work,
-    # but a single synthesized template can be deployed anywhere.
 
-    # Uncomment the next line to specialize this stack for the AWS Account
-    # and Region that are implied by the current CLI configuration.
-
-    env=cdk.Environment(account=os.getenv('CDK_DEFAULT_ACCOUNT'), region=os.getenv('CDK_DEFAULT_REGION')),
-
-    # Uncomment the next line if you know exactly what Account and Region you
-    # want to deploy the stack to. */
-
-    #env=cdk.Environment(account='123456789012', region='us-east-1'),
-
-    # For more information, see https://docs.aws.amazon.com/cdk/latest/guide/environments.html
-    )
+# If you don't specify 'env', the stacks will be environment-agnostic.
+# Account/Region-dependent features and context lookups will not work,
+# but a single synthesized template can be deployed anywhere.
+
+# The 'env' below specializes the stacks for the AWS Account and Region that are
+# implied by the current CLI configuration.
+env = cdk.Environment(account=os.getenv('CDK_DEFAULT_ACCOUNT'), region=os.getenv('CDK_DEFAULT_REGION'))
+
+# Use the next line instead if you know exactly what Account and Region you
+# want to deploy the stacks to.
+#env = cdk.Environment(account='123456789012', region='us-east-1')
+
+# For more information, see https://docs.aws.amazon.com/cdk/latest/guide/environments.html
+
+config = StackConfig.from_context(app)
+
+if config.regions:
+    # A copy of the tiers in every region, and a global stack routing the users to the closest healthy region:
+    #   cdk deploy --all -c regions=us-east-1,eu-west-1 -c domain_name=app.example.com
+    add_regional_stacks(app, config, account=os.getenv('CDK_DEFAULT_ACCOUNT'), single_stack=context_flag(app, "single_stack"))
+elif context_flag(app, "single_stack"):
+    # Everything in one stack, as before the split.
+    MultiTierArchitectureStack(app, "MultiTierArchitectureStack", env=env)
+else:
+    # The tiers in separate stacks, so an application tier change only deploys the application stack:
+    #   cdk deploy MultiTierArchitectureApp --exclusively
+    network = NetworkStack(app, "MultiTierArchitectureNetwork", env=env)
+    data = DataStack(app, "MultiTierArchitectureData", network=network, env=env)
+    AppStack(app, "MultiTierArchitectureApp", network=network, data=data, env=env)
+
+# Report settings that cap the throughput as warnings (or errors) at synth time, see performance_lint.py.
+if context_flag(app, "performance_lint", True):
+    cdk.Aspects.of(app).add(PerformanceLint.from_context(app))
 
 app.synth()
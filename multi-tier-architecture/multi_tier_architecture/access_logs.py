@@ -0,0 +1,179 @@
+from aws_cdk import (
+    Duration,
+    RemovalPolicy,
+    Stack,
+    aws_athena as athena,
+    aws_elasticloadbalancingv2 as elbv2,
+    aws_glue as glue,
+    aws_s3 as s3,
+)
+from constructs import Construct
+
+
+# Fields of an ALB access log entry, in order.
+# https://docs.aws.amazon.com/elasticloadbalancing/latest/application/load-balancer-access-logs.html
+ALB_LOG_COLUMNS = [
+    ("type", "string"),
+    ("time", "string"),
+    ("elb", "string"),
+    ("client_ip", "string"),
+    ("client_port", "int"),
+    ("target_ip", "string"),
+    ("target_port", "int"),
+    ("request_processing_time", "double"),
+    ("target_processing_time", "double"),
+    ("response_processing_time", "double"),
+    ("elb_status_code", "int"),
+    ("target_status_code", "string"),
+    ("received_bytes", "bigint"),
+    ("sent_bytes", "bigint"),
+    ("request_verb", "string"),
+    ("request_url", "string"),
+    ("request_proto", "string"),
+    ("user_agent", "string"),
+    ("ssl_cipher", "string"),
+    ("ssl_protocol", "string"),
+    ("target_group_arn", "string"),
+    ("trace_id", "string"),
+    ("domain_name", "string"),
+    ("chosen_cert_arn", "string"),
+    ("matched_rule_priority", "string"),
+    ("request_creation_time", "string"),
+    ("actions_executed", "string"),
+    ("redirect_url", "string"),
+    ("lambda_error_reason", "string"),
+    ("target_port_list", "string"),
+    ("target_status_code_list", "string"),
+    ("classification", "string"),
+    ("classification_reason", "string"),
+    ("conn_trace_id", "string"),
+]
+
+# Regex of the Athena RegexSerDe, every group is a column of ALB_LOG_COLUMNS. Fields AWS appends to the log format
+# later are matched by the last, non-capturing group and ignored.
+ALB_LOG_REGEX = (
+    r'([^ ]*) ([^ ]*) ([^ ]*) ([^ ]*):([0-9]*) ([^ ]*)[:-]([0-9]*) ([-.0-9]*) ([-.0-9]*) ([-.0-9]*) (|[-0-9]*) '
+    r'(-|[-0-9]*) ([-0-9]*) ([-0-9]*) "([^ ]*) (.*) (- |[^ ]*)" "([^"]*)" ([A-Z0-9-_]+) ([A-Za-z0-9.-]*) ([^ ]*) '
+    r'"([^"]*)" "([^"]*)" "([^"]*)" ([-.0-9]*) ([^ ]*) "([^"]*)" "([^"]*)" "([^ ]*)" "([^\s]+?)" "([^\s]+)" '
+    r'"([^ ]*)" "([^ ]*)" ?([^ ]*)?(?: .*)?'
+)
+
+# Saved Athena queries, {table} is replaced by the database and table name.
+NAMED_QUERIES = {
+    "SlowestEndpoints": (
+        "p50/p99 of the target processing time per path, yesterday and today",
+        "SELECT request_verb, url_extract_path(request_url) AS path, count(*) AS requests,\n"
+        "       approx_percentile(target_processing_time, 0.5) AS p50,\n"
+        "       approx_percentile(target_processing_time, 0.99) AS p99,\n"
+        "       max(request_processing_time + target_processing_time + response_processing_time) AS max_total\n"
+        "FROM {table}\n"
+        "WHERE day >= date_format(current_date - interval '1' day, '%Y/%m/%d') AND target_processing_time >= 0\n"
+        "GROUP BY 1, 2\n"
+        "ORDER BY p99 DESC\n"
+        "LIMIT 25;",
+    ),
+    "HotTargets": (
+        "Requests, latency and 5xx responses per target, yesterday and today",
+        "SELECT target_ip, count(*) AS requests,\n"
+        "       approx_percentile(target_processing_time, 0.99) AS p99,\n"
+        "       count_if(target_status_code LIKE '5%') AS target_5xx\n"
+        "FROM {table}\n"
+        "WHERE day >= date_format(current_date - interval '1' day, '%Y/%m/%d')\n"
+        "GROUP BY 1\n"
+        "ORDER BY requests DESC;",
+    ),
+}
+
+
+class AlbAccessLogs(Construct):
+    """ALB access logs in a lifecycle-managed S3 bucket, queryable with Athena.
+
+    The Glue table uses partition projection on the 'day' partition (yyyy/MM/dd), so new days need no crawler or
+    MSCK REPAIR. Filter on 'day' in a query to only scan the logs of those days. The 'athena_workgroup' writes its
+    query results to the same bucket, and has the saved queries of NAMED_QUERIES.
+    """
+
+    def __init__(self, scope: Construct, construct_id: str, *,
+                 load_balancer: elbv2.ApplicationLoadBalancer,
+                 database_name: str,
+                 retention_days: int,
+                 prefix: str = "alb") -> None:
+        super().__init__(scope, construct_id)
+        stack = Stack.of(self)
+
+        # ALB access logs only support SSE-S3 encryption.
+        self.bucket = s3.Bucket(
+            self, "Bucket",
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            encryption=s3.BucketEncryption.S3_MANAGED,
+            enforce_ssl=True,
+            lifecycle_rules=[s3.LifecycleRule(expiration=Duration.days(retention_days))],
+            removal_policy=RemovalPolicy.DESTROY,
+            auto_delete_objects=True,
+        )
+        load_balancer.log_access_logs(self.bucket, prefix)
+
+        self.database = glue.CfnDatabase(
+            self, "Database",
+            catalog_id=stack.account,
+            database_input=glue.CfnDatabase.DatabaseInputProperty(
+                name=database_name,
+                description="ALB access logs",
+            ),
+        )
+
+        location = f"s3://{self.bucket.bucket_name}/{prefix}/AWSLogs/{stack.account}/elasticloadbalancing/{stack.region}"
+        self.table = glue.CfnTable(
+            self, "Table",
+            catalog_id=stack.account,
+            database_name=database_name,
+            table_input=glue.CfnTable.TableInputProperty(
+                name="alb_access_logs",
+                table_type="EXTERNAL_TABLE",
+                partition_keys=[glue.CfnTable.ColumnProperty(name="day", type="string")],
+                parameters={
+                    "EXTERNAL": "TRUE",
+                    "projection.enabled": "true",
+                    "projection.day.type": "date",
+                    "projection.day.range": "2025/01/01,NOW",
+                    "projection.day.format": "yyyy/MM/dd",
+                    "projection.day.interval": "1",
+                    "projection.day.interval.unit": "DAYS",
+                    "storage.location.template": location + "/${day}",
+                },
+                storage_descriptor=glue.CfnTable.StorageDescriptorProperty(
+                    columns=[glue.CfnTable.ColumnProperty(name=name, type=column_type) for name, column_type in ALB_LOG_COLUMNS],
+                    location=location,
+                    input_format="org.apache.hadoop.mapred.TextInputFormat",
+                    output_format="org.apache.hadoop.hive.ql.io.HiveIgnoreKeyTextOutputFormat",
+                    serde_info=glue.CfnTable.SerdeInfoProperty(
+                        serialization_library="org.apache.hadoop.hive.serde2.RegexSerDe",
+                        parameters={"serialization.format": "1", "input.regex": ALB_LOG_REGEX},
+                    ),
+                ),
+            ),
+        )
+        self.table.add_dependency(self.database)
+
+        self.athena_workgroup = athena.CfnWorkGroup(
+            self, "WorkGroup",
+            name=f"{stack.stack_name}-alb-access-logs",
+            recursive_delete_option=True,
+            work_group_configuration=athena.CfnWorkGroup.WorkGroupConfigurationProperty(
+                enforce_work_group_configuration=True,
+                result_configuration=athena.CfnWorkGroup.ResultConfigurationProperty(
+                    output_location=f"s3://{self.bucket.bucket_name}/athena-results/",
+                ),
+            ),
+        )
+
+        for query_id, (description, query) in NAMED_QUERIES.items():
+            named_query = athena.CfnNamedQuery(
+                self, query_id,
+                name=query_id,
+                description=description,
+                database=database_name,
+                work_group=self.athena_workgroup.name,
+                query_string=query.format(table=f"{database_name}.alb_access_logs"),
+            )
+            named_query.add_dependency(self.athena_workgroup)
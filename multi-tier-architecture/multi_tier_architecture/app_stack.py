@@ -0,0 +1,586 @@
+from aws_cdk import (
+    Stack,
+    aws_iam as iam,
+    aws_ec2 as ec2,
+    aws_elasticloadbalancingv2 as elbv2,
+    aws_autoscaling as autoscaling,
+    aws_s3 as s3,
+    aws_cloudfront as cloudfront,
+    aws_cloudfront_origins as origins,
+    aws_imagebuilder as imagebuilder,
+    aws_logs as logs,
+    aws_sqs as sqs,
+    Duration,
+    RemovalPolicy,
+    CfnOutput,
+    Fn,
+)
+from constructs import Construct
+from multi_tier_architecture.access_logs import AlbAccessLogs
+from multi_tier_architecture.config import AMAZON_LINUX_CPU_TYPES, CPU_CREDITS, TARGET_ALGORITHMS, StackConfig
+from multi_tier_architecture.data_stack import DataTier
+from multi_tier_architecture.monitoring import PerformanceMonitoring, is_burstable
+from multi_tier_architecture.network_stack import NetworkTier
+from multi_tier_architecture.user_data import (
+    AGENT_NAMESPACE,
+    OTLP_ENDPOINT,
+    XRAY_DAEMON_ADDRESS,
+    WebServerConfig,
+    render_install_script,
+    render_user_data,
+    render_worker_user_data,
+)
+import hashlib
+import json
+
+
+class AppTier:
+    """The application tier of a Stack: launch template, ALB, target group, Auto Scaling Group and the optional
+    golden AMI pipeline, CloudFront distribution, ALB access logs, instrumentation and monitoring.
+    """
+
+    def build_app_tier(self, config: StackConfig, network: NetworkTier, data: DataTier) -> None:
+        ### INSTRUMENTATION ###
+
+        # Log group for the Apache timing log, its name is part of the agent configuration (and the golden AMI).
+        timing_log_group_name = f"/{self.stack_name}/httpd/timing"
+
+        if config.enable_instrumentation:
+            self.TimingLogGroup = logs.LogGroup(
+                self, "TimingLogGroup",
+                log_group_name=timing_log_group_name,
+                retention=logs.RetentionDays.TWO_WEEKS,
+                removal_policy=RemovalPolicy.DESTROY,
+            )
+
+        # Instance role of the application tier: the CloudWatch agent sends metrics, logs and traces, the web tier
+        # sends to the work queue.
+        if config.enable_instrumentation or config.enable_worker_tier:
+            self.AppInstanceRole = iam.Role(
+                self, "AppInstanceRole",
+                assumed_by=iam.ServicePrincipal("ec2.amazonaws.com"),
+                managed_policies=[
+                    iam.ManagedPolicy.from_aws_managed_policy_name("CloudWatchAgentServerPolicy"),
+                    iam.ManagedPolicy.from_aws_managed_policy_name("AWSXrayWriteOnlyAccess"),
+                ] if config.enable_instrumentation else None,
+            )
+
+
+
+        ### GOLDEN AMI (EC2 IMAGE BUILDER) ###
+
+        # The install script installs the web server, tuned for the application instance type.
+        self.web_server_config = WebServerConfig.for_instance_type(
+            config.app_instance_type,
+            alb_idle_timeout=config.alb_idle_timeout,
+            static_max_age=config.cloudfront_static_default_ttl,
+            mpm=config.web_server_mpm,
+        )
+        install_script = render_install_script(
+            self.web_server_config,
+            log_group_name=timing_log_group_name if config.enable_instrumentation else None,
+        )
+
+        amazon_linux_cpu_type, amazon_linux_image_name = AMAZON_LINUX_CPU_TYPES[config.app_architecture]
+
+        if config.enable_golden_ami:
+            # Component that runs the install script while building the image and checks the result in the test phase.
+            component_data = json.dumps({
+                "name": "AppWebServer",
+                "schemaVersion": 1.0,
+                "phases": [
+                    {
+                        "name": "build",
+                        "steps": [{"name": "InstallWebServer", "action": "ExecuteBash", "inputs": {"commands": [install_script]}}],
+                    },
+                    {
+                        "name": "test",
+                        "steps": [{"name": "ValidateWebServer", "action": "ExecuteBash", "inputs": {"commands": [
+                            "rpm -q httpd",
+                            "systemctl is-enabled httpd",
+                            "test -f /var/www/html/health",
+                        ]}}],
+                    },
+                ],
+            }, indent=2)
+
+            # Image Builder versions are immutable, a changed component or recipe needs a new version.
+            golden_ami_version = f"1.0.{int(hashlib.sha256(component_data.encode()).hexdigest()[:6], 16)}"
+
+            self.AppComponent = imagebuilder.CfnComponent(
+                self, "AppComponent",
+                name="AppWebServer",
+                platform="Linux",
+                version=golden_ami_version,
+                description="Apache web server and application files",
+                data=component_data,
+            )
+
+            self.AppImageRecipe = imagebuilder.CfnImageRecipe(
+                self, "AppImageRecipe",
+                name="AppImageRecipe",
+                version=golden_ami_version,
+                # Latest Amazon Linux 2023 image managed by AWS, for the architecture of the application instances.
+                parent_image=f"arn:{self.partition}:imagebuilder:{self.region}:aws:image/{amazon_linux_image_name}/x.x.x",
+                components=[imagebuilder.CfnImageRecipe.ComponentConfigurationProperty(
+                    component_arn=self.AppComponent.attr_arn,
+                )],
+            )
+
+            # Instance role of the build and test instances.
+            self.ImageBuilderRole = iam.Role(
+                self, "ImageBuilderRole",
+                assumed_by=iam.ServicePrincipal("ec2.amazonaws.com"),
+                managed_policies=[
+                    iam.ManagedPolicy.from_aws_managed_policy_name("EC2InstanceProfileForImageBuilder"),
+                    iam.ManagedPolicy.from_aws_managed_policy_name("AmazonSSMManagedInstanceCore"),
+                ],
+            )
+            self.ImageBuilderInstanceProfile = iam.CfnInstanceProfile(
+                self, "ImageBuilderInstanceProfile",
+                roles=[self.ImageBuilderRole.role_name],
+            )
+
+            # The build instances run in an ApplicationSubnet, they reach the package mirrors through the NAT gateways.
+            self.ImageBuilderInfrastructure = imagebuilder.CfnInfrastructureConfiguration(
+                self, "ImageBuilderInfrastructure",
+                name="AppImageBuilderInfrastructure",
+                instance_profile_name=self.ImageBuilderInstanceProfile.ref,
+                instance_types=[config.golden_ami_build_instance_type],
+                subnet_id=network.vpc.select_subnets(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS).subnet_ids[0],
+                security_group_ids=[network.SG_ImageBuilder.security_group_id],
+                terminate_instance_on_failure=True,
+            )
+
+            # Every build writes its AMI id to the 'golden_ami_parameter' SSM parameter.
+            self.ImageBuilderDistribution = imagebuilder.CfnDistributionConfiguration(
+                self, "ImageBuilderDistribution",
+                name="AppImageDistribution",
+                distributions=[imagebuilder.CfnDistributionConfiguration.DistributionProperty(
+                    region=self.region,
+                    ami_distribution_configuration={"Name": "AppGoldenAmi-{{ imagebuilder:buildDate }}"},
+                )],
+            )
+            # SsmParameterConfigurations isn't in the L1 construct of this CDK version yet.
+            self.ImageBuilderDistribution.add_property_override("Distributions.0.SsmParameterConfigurations", [{
+                "ParameterName": config.golden_ami_parameter,
+                "DataType": "aws:ec2:image",
+            }])
+
+            # The first image is built during the deployment, the application tier launches from it.
+            self.AppGoldenImage = imagebuilder.CfnImage(
+                self, "AppGoldenImage",
+                image_recipe_arn=self.AppImageRecipe.attr_arn,
+                infrastructure_configuration_arn=self.ImageBuilderInfrastructure.attr_arn,
+                distribution_configuration_arn=self.ImageBuilderDistribution.attr_arn,
+            )
+
+            # The pipeline rebuilds the image on a schedule, with the latest parent image and package updates.
+            self.AppImagePipeline = imagebuilder.CfnImagePipeline(
+                self, "AppImagePipeline",
+                name="AppImagePipeline",
+                image_recipe_arn=self.AppImageRecipe.attr_arn,
+                infrastructure_configuration_arn=self.ImageBuilderInfrastructure.attr_arn,
+                distribution_configuration_arn=self.ImageBuilderDistribution.attr_arn,
+                schedule=imagebuilder.CfnImagePipeline.ScheduleProperty(
+                    schedule_expression=config.golden_ami_schedule,
+                    pipeline_execution_start_condition="EXPRESSION_MATCH_AND_DEPENDENCY_UPDATES_AVAILABLE",
+                ),
+                status="ENABLED",
+            )
+
+            CfnOutput(self, "GoldenAmiParameter", value=config.golden_ami_parameter)
+
+
+
+        ### WORK QUEUE ###
+
+        # Slow work (reports, email, bulk writes) is sent to the work queue instead of holding an Apache worker,
+        # the worker tier processes it. A message that keeps failing moves to the dead-letter queue.
+        if config.enable_worker_tier:
+            self.WorkDeadLetterQueue = sqs.Queue(
+                self, "WorkDeadLetterQueue",
+                retention_period=Duration.days(14),
+                encryption=sqs.QueueEncryption.SQS_MANAGED,
+                enforce_ssl=True,
+            )
+
+            self.WorkQueue = sqs.Queue(
+                self, "WorkQueue",
+                visibility_timeout=Duration.seconds(config.worker_visibility_timeout),
+                # Long polling: a receive waits up to 20s for a message instead of returning empty at once.
+                receive_message_wait_time=Duration.seconds(20),
+                encryption=sqs.QueueEncryption.SQS_MANAGED,
+                enforce_ssl=True,
+                dead_letter_queue=sqs.DeadLetterQueue(
+                    max_receive_count=config.worker_max_receive_count,
+                    queue=self.WorkDeadLetterQueue,
+                ),
+            )
+
+            # The web tier only sends to the queue.
+            self.WorkQueue.grant_send_messages(self.AppInstanceRole)
+
+            CfnOutput(self, "WorkQueueUrl", value=self.WorkQueue.queue_url)
+
+
+
+        ### LAUNCH TEMPLATE, APPLICATION LOAD BALANCER, TARGET GROUP, LISTENER and AUTO SCALING GROUP ###
+
+        # Export the endpoints of the data and cache tiers to the application in /etc/app.env.
+        self.app_environment = {
+            "DB_WRITER_ENDPOINT": data.db_endpoint,
+            "DB_READER_ENDPOINTS": Fn.join(",", data.db_reader_endpoints),
+        }
+        if data.db_global_reader_endpoint is not None:
+            self.app_environment["DB_GLOBAL_READER_ENDPOINT"] = data.db_global_reader_endpoint
+        if config.enable_cache:
+            self.app_environment["CACHE_PRIMARY_ENDPOINT"] = data.cache_primary_endpoint
+            self.app_environment["CACHE_READER_ENDPOINT"] = data.cache_reader_endpoint
+            self.app_environment["CACHE_PORT"] = "6379"
+        if config.enable_instrumentation:
+            # The CloudWatch agent receives the traces of the application.
+            self.app_environment["OTEL_EXPORTER_OTLP_ENDPOINT"] = OTLP_ENDPOINT
+            self.app_environment["OTEL_SERVICE_NAME"] = "multi-tier-app"
+            self.app_environment["AWS_XRAY_DAEMON_ADDRESS"] = XRAY_DAEMON_ADDRESS
+        if config.enable_worker_tier:
+            self.app_environment["WORK_QUEUE_URL"] = self.WorkQueue.queue_url
+
+        # User data with the per-instance configuration of a basic web server on every application instance.
+        # Without a golden AMI every instance installs the web server itself at boot first.
+        user_data = render_user_data(self.app_environment, install_script=None if config.enable_golden_ami else install_script)
+        self.user_data = ec2.UserData.for_linux().custom(user_data)
+
+
+        # The golden AMI id is read from SSM at every launch, so new instances start from the latest build.
+        machine_image = (
+            ec2.MachineImage.resolve_ssm_parameter_at_launch(config.golden_ami_parameter, os=ec2.OperatingSystemType.LINUX)
+            if config.enable_golden_ami else
+            ec2.AmazonLinuxImage(generation=ec2.AmazonLinuxGeneration.AMAZON_LINUX_2023, cpu_type=amazon_linux_cpu_type)
+        )
+
+        # Launch template for the application tier, every instance in the Auto Scaling Group is launched from it.
+        self.AppLaunchTemplate = ec2.LaunchTemplate(
+            self, "AppLaunchTemplate",
+            instance_type=ec2.InstanceType(config.app_instance_type),
+            machine_image=machine_image,
+            block_devices=[ec2.BlockDevice(
+                device_name="/dev/xvda", 
+                volume=ec2.BlockDeviceVolume.ebs(
+                    volume_size=30,
+                    delete_on_termination=True,
+                    iops=config.app_volume_iops,
+                    throughput=config.app_volume_throughput,
+                    volume_type=ec2.EbsDeviceVolumeType.GP3,
+                    )
+                )
+            ],
+            cpu_credits=CPU_CREDITS[config.app_cpu_credits] if config.app_cpu_credits else None,
+            security_group=network.SG_App,
+            user_data=self.user_data,
+            role=self.AppInstanceRole if config.enable_instrumentation or config.enable_worker_tier else None,
+        )
+        if config.enable_golden_ami:
+            # The SSM parameter is written when the first image is built.
+            self.AppLaunchTemplate.node.add_dependency(self.AppGoldenImage)
+
+
+        # Application Load Balancer.
+        self.alb = elbv2.ApplicationLoadBalancer(
+            self, "ALB",
+            vpc=network.vpc,
+            desync_mitigation_mode=elbv2.DesyncMitigationMode.DEFENSIVE,
+            http2_enabled=True,
+            idle_timeout=Duration.seconds(config.alb_idle_timeout),
+            security_group=network.SG_ALB,
+            internet_facing=True,
+            ip_address_type=elbv2.IpAddressType.IPV4,
+            vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PUBLIC),
+            drop_invalid_header_fields=False,
+        )
+
+        # Target group, health check and onboarding settings come from the target_onboarding profile.
+        self.targetgroup = elbv2.ApplicationTargetGroup(
+            self, "TargetGroup",
+            vpc=network.vpc,
+            load_balancing_algorithm_type=TARGET_ALGORITHMS[config.target_algorithm],
+            port=80,
+            protocol=elbv2.ApplicationProtocol.HTTP,
+            target_type=elbv2.TargetType.INSTANCE,
+            target_group_name="TargetGroup",
+            # Ramp up the share of requests a new instance gets, None: a new instance gets its full share at once.
+            slow_start=Duration.seconds(config.target_slow_start) if config.target_slow_start else None,
+            # Time a deregistering instance gets to finish its in-flight requests on scale-in and instance refresh.
+            deregistration_delay=Duration.seconds(config.target_deregistration_delay),
+            health_check=elbv2.HealthCheck(
+                port="80",
+                protocol=elbv2.Protocol.HTTP,
+                healthy_http_codes="200-299",
+                healthy_threshold_count=config.onboarding["healthy_threshold_count"],
+                interval=Duration.seconds(config.onboarding["health_check_interval"]),
+                path=config.onboarding["health_check_path"],
+                timeout=Duration.seconds(config.onboarding["health_check_timeout"]),
+                unhealthy_threshold_count=config.onboarding["unhealthy_threshold_count"],
+            ),
+        )
+        
+        # HTTP listener.
+        self.HTTP_listener = self.alb.add_listener(
+            "HTTP_listener",
+            default_target_groups=[self.targetgroup],
+            port=80,
+            # The ALB ingress rules are part of the connectivity matrix, see SG rules.
+            open=False,
+        )
+
+
+        # Auto Scaling Group for the application tier, spread evenly over the ApplicationSubnets in all AZ's.
+        self.AppASG = autoscaling.AutoScalingGroup(
+            self, "AppASG",
+            vpc=network.vpc,
+            vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
+            launch_template=self.AppLaunchTemplate,
+            min_capacity=config.app_min_capacity,
+            max_capacity=config.app_max_capacity,
+            desired_capacity=config.app_desired_capacity, # If None: the ASG starts at min_capacity and is left to the scaling policies.
+            # Replace instances that fail the target group health check, not only the EC2 status checks.
+            health_check=autoscaling.HealthCheck.elb(grace=Duration.minutes(5)),
+        )
+
+        # Register the Auto Scaling Group with the target group.
+        self.targetgroup.add_target(self.AppASG)
+
+        # Target tracking policy on ALB RequestCountPerTarget.
+        self.AppASG.scale_on_request_count(
+            "RequestCountScaling",
+            target_requests_per_minute=config.app_requests_per_target,
+        )
+
+        # Target tracking policy on average CPU utilization.
+        self.AppASG.scale_on_cpu_utilization(
+            "CpuScaling",
+            target_utilization_percent=config.app_cpu_target,
+        )
+
+
+
+        ### WORKER TIER ###
+
+        if config.enable_worker_tier:
+            # Instance role of the worker tier: receives and deletes the messages of the work queue.
+            self.WorkerInstanceRole = iam.Role(
+                self, "WorkerInstanceRole",
+                assumed_by=iam.ServicePrincipal("ec2.amazonaws.com"),
+            )
+            self.WorkQueue.grant_consume_messages(self.WorkerInstanceRole)
+
+            # The workers get the database endpoints and the queue url, the app-worker service consumes the queue.
+            worker_environment = {
+                "DB_WRITER_ENDPOINT": data.db_endpoint,
+                "DB_READER_ENDPOINTS": Fn.join(",", data.db_reader_endpoints),
+                "WORK_QUEUE_URL": self.WorkQueue.queue_url,
+                "WORK_QUEUE_WAIT_SECONDS": "20",
+            }
+
+            self.WorkerLaunchTemplate = ec2.LaunchTemplate(
+                self, "WorkerLaunchTemplate",
+                instance_type=ec2.InstanceType(config.worker_instance_type),
+                machine_image=machine_image,
+                block_devices=[ec2.BlockDevice(
+                    device_name="/dev/xvda",
+                    volume=ec2.BlockDeviceVolume.ebs(
+                        volume_size=30,
+                        delete_on_termination=True,
+                        volume_type=ec2.EbsDeviceVolumeType.GP3,
+                    ),
+                )],
+                # Burstable workers process a backlog at full speed, instead of at their baseline.
+                cpu_credits=ec2.CpuCredits.UNLIMITED if is_burstable(config.worker_instance_type) else None,
+                security_group=network.SG_Worker,
+                user_data=ec2.UserData.for_linux().custom(
+                    render_worker_user_data(worker_environment, config.worker_command, golden_ami=config.enable_golden_ami)),
+                role=self.WorkerInstanceRole,
+            )
+            if config.enable_golden_ami:
+                self.WorkerLaunchTemplate.node.add_dependency(self.AppGoldenImage)
+
+            # Worker Auto Scaling Group in the ApplicationSubnets, not registered with the target group.
+            self.WorkerASG = autoscaling.AutoScalingGroup(
+                self, "WorkerASG",
+                vpc=network.vpc,
+                vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
+                launch_template=self.WorkerLaunchTemplate,
+                min_capacity=config.worker_min_capacity,
+                max_capacity=config.worker_max_capacity,
+            )
+
+            # Step scaling on the queue depth: add workers while the backlog grows, remove one when the queue is empty.
+            backlog = config.worker_messages_per_instance
+            self.WorkerASG.scale_on_metric(
+                "QueueDepthScaling",
+                metric=self.WorkQueue.metric_approximate_number_of_messages_visible(period=Duration.minutes(1)),
+                scaling_steps=[
+                    autoscaling.ScalingInterval(upper=0, change=-1),
+                    autoscaling.ScalingInterval(lower=backlog, change=+1),
+                    autoscaling.ScalingInterval(lower=4 * backlog, change=+3),
+                ],
+                adjustment_type=autoscaling.AdjustmentType.CHANGE_IN_CAPACITY,
+                # The next step doesn't count the workers still booting.
+                estimated_instance_warmup=Duration.minutes(2),
+            )
+
+            # Step scaling on the age of the oldest message: a small backlog of slow jobs still gets more workers.
+            max_age = config.worker_max_message_age
+            self.WorkerASG.scale_on_metric(
+                "MessageAgeScaling",
+                metric=self.WorkQueue.metric_approximate_age_of_oldest_message(period=Duration.minutes(1)),
+                scaling_steps=[
+                    autoscaling.ScalingInterval(lower=max_age, change=+1),
+                    autoscaling.ScalingInterval(lower=3 * max_age, change=+2),
+                ],
+                adjustment_type=autoscaling.AdjustmentType.CHANGE_IN_CAPACITY,
+                # The next step doesn't count the workers still booting.
+                estimated_instance_warmup=Duration.minutes(2),
+            )
+
+
+
+        ### CLOUDFRONT ###
+
+        if config.enable_cloudfront:
+            # S3 bucket for the static assets, only readable by CloudFront through Origin Access Control.
+            self.StaticAssetsBucket = s3.Bucket(
+                self, "StaticAssetsBucket",
+                block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+                encryption=s3.BucketEncryption.S3_MANAGED,
+                enforce_ssl=True,
+                removal_policy=RemovalPolicy.DESTROY,
+                auto_delete_objects=True,
+            )
+
+            # Cache policy for the dynamic content from the ALB, the application decides with Cache-Control headers
+            # what may be cached. Compressed variants are cached separately, so CloudFront can serve gzip and brotli.
+            self.DynamicCachePolicy = cloudfront.CachePolicy(
+                self, "DynamicCachePolicy",
+                comment="Dynamic content from the ALB",
+                default_ttl=Duration.seconds(config.cloudfront_dynamic_default_ttl),
+                min_ttl=Duration.seconds(0),
+                max_ttl=Duration.days(1),
+                query_string_behavior=cloudfront.CacheQueryStringBehavior.all(),
+                cookie_behavior=cloudfront.CacheCookieBehavior.none(),
+                header_behavior=cloudfront.CacheHeaderBehavior.none(),
+                enable_accept_encoding_gzip=True,
+                enable_accept_encoding_brotli=True,
+            )
+
+            # Cache policy for the static assets in S3, cached long at the edge and in the browser.
+            self.StaticCachePolicy = cloudfront.CachePolicy(
+                self, "StaticCachePolicy",
+                comment="Static assets from S3",
+                default_ttl=Duration.seconds(config.cloudfront_static_default_ttl),
+                min_ttl=Duration.seconds(0),
+                max_ttl=Duration.days(365),
+                query_string_behavior=cloudfront.CacheQueryStringBehavior.none(),
+                cookie_behavior=cloudfront.CacheCookieBehavior.none(),
+                header_behavior=cloudfront.CacheHeaderBehavior.none(),
+                enable_accept_encoding_gzip=True,
+                enable_accept_encoding_brotli=True,
+            )
+
+            # CloudFront distribution, the ALB is the default (dynamic) origin.
+            self.Distribution = cloudfront.Distribution(
+                self, "Distribution",
+                comment="Edge cache in front of the ALB",
+                default_behavior=cloudfront.BehaviorOptions(
+                    origin=origins.LoadBalancerV2Origin(
+                        self.alb,
+                        protocol_policy=cloudfront.OriginProtocolPolicy.HTTP_ONLY, # The ALB only has a HTTP listener.
+                    ),
+                    cache_policy=self.DynamicCachePolicy,
+                    origin_request_policy=cloudfront.OriginRequestPolicy.ALL_VIEWER_EXCEPT_HOST_HEADER,
+                    allowed_methods=cloudfront.AllowedMethods.ALLOW_ALL,
+                    viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+                    compress=True,
+                ),
+                additional_behaviors={
+                    "/static/*": cloudfront.BehaviorOptions(
+                        origin=origins.S3BucketOrigin.with_origin_access_control(self.StaticAssetsBucket),
+                        cache_policy=self.StaticCachePolicy,
+                        viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+                        compress=True,
+                    ),
+                },
+                http_version=cloudfront.HttpVersion.HTTP2_AND_3,
+            )
+
+
+            CfnOutput(
+                self, "DistributionDomainName",
+                value=self.Distribution.distribution_domain_name,
+                description="CloudFront domain name of the application",
+            )
+
+            CfnOutput(
+                self, "StaticAssetsBucketName",
+                value=self.StaticAssetsBucket.bucket_name,
+                description="S3 bucket for the static assets, served by CloudFront under /static/*",
+            )
+
+
+
+        ### ALB ACCESS LOGS ###
+
+        if config.enable_alb_access_logs:
+            # Access logs of every request with its request, target and response processing time.
+            self.AccessLogs = AlbAccessLogs(
+                self, "AccessLogs",
+                load_balancer=self.alb,
+                database_name=config.alb_access_logs_database,
+                retention_days=config.alb_access_logs_retention_days,
+                prefix=config.alb_access_logs_prefix,
+            )
+
+            CfnOutput(
+                self, "AccessLogsBucketName",
+                value=self.AccessLogs.bucket.bucket_name,
+                description="S3 bucket with the ALB access logs and the Athena query results",
+            )
+
+            CfnOutput(
+                self, "AthenaWorkGroup",
+                value=self.AccessLogs.athena_workgroup.name,
+                description="Athena workgroup with the saved queries on the ALB access logs",
+            )
+
+
+
+        ### MONITORING ###
+
+        if config.enable_monitoring:
+            # Dashboard and alarms for the latency, errors and capacity of every tier.
+            self.Monitoring = PerformanceMonitoring(
+                self, "Monitoring",
+                load_balancer=self.alb,
+                target_group=self.targetgroup,
+                auto_scaling_group=self.AppASG,
+                app_instance_type=config.app_instance_type,
+                database=data.RDSdb,
+                db_instance_class=None if config.db_engine == "aurora-serverless" else config.db_instance_class,
+                thresholds=config.alarm_thresholds,
+                alarm_email=config.alarm_email,
+                agent_namespace=AGENT_NAMESPACE if config.enable_instrumentation else None,
+            )
+
+            CfnOutput(
+                self, "DashboardName",
+                value=self.Monitoring.dashboard.dashboard_name,
+                description="CloudWatch dashboard with the performance of the stack",
+            )
+
+
+class AppStack(AppTier, Stack):
+    """Application tier stack, it only changes when the application tier does: e.g. the user data or an alarm."""
+
+    def __init__(self, scope: Construct, construct_id: str, *, network: NetworkTier, data: DataTier, **kwargs) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+        self.build_app_tier(StackConfig.from_context(self), network, data)
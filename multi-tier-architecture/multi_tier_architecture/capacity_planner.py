@@ -0,0 +1,374 @@
+"""Offline capacity planner: estimates the request rate ceiling of every tier from the synthesized templates.
+
+Synthesize the app first (cdk synth, or python app.py), then e.g.:
+
+    python -m multi_tier_architecture.capacity_planner cdk.out --target-rps 200 --payload web
+
+The planner only reads the templates in the cloud assembly, it makes no AWS calls.
+"""
+import argparse
+import dataclasses
+import fnmatch
+import json
+import math
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from multi_tier_architecture.db_tuning import db_instance_memory_gib
+from multi_tier_architecture.user_data import instance_vcpus
+
+
+# Baseline CPU utilization (share of all vCPU's a burstable instance sustains on standard credits) and baseline
+# network bandwidth in Gbps per instance type.
+# https://docs.aws.amazon.com/ec2/latest/userguide/burstable-credits-baseline-concepts.html
+INSTANCE_BASELINES = {
+    "t2.micro": (0.10, 0.064),
+    "t2.small": (0.20, 0.064),
+    "t2.medium": (0.20, 0.256),
+    "t3.micro": (0.10, 0.064),
+    "t3.small": (0.20, 0.128),
+    "t3.medium": (0.20, 0.256),
+    "t3.large": (0.30, 0.512),
+    "t4g.micro": (0.10, 0.064),
+    "t4g.small": (0.20, 0.128),
+    "t4g.medium": (0.20, 0.256),
+    "t4g.large": (0.30, 0.512),
+    "m6i.large": (1.0, 0.781),
+    "m7i.large": (1.0, 0.781),
+    "m6g.large": (1.0, 0.75),
+    "m7g.large": (1.0, 0.937),
+    "c7g.large": (1.0, 0.937),
+}
+
+# ALB Load Balancer Capacity Unit: the highest of these dimensions counts.
+# https://aws.amazon.com/elasticloadbalancing/pricing/
+LCU_NEW_CONNECTIONS_PER_SECOND = 25
+LCU_ACTIVE_CONNECTIONS_PER_MINUTE = 3000
+LCU_PROCESSED_GB_PER_HOUR = 1
+
+# A NAT gateway scales from 5 up to 100 Gbps.
+NAT_GATEWAY_GBPS = 100
+
+# Baseline IOPS of gp3 storage, and of gp2 storage per GiB (at least 100).
+GP3_BASELINE_IOPS = 3000
+GP2_IOPS_PER_GIB = 3
+
+# RDS MySQL default max_connections: {DBInstanceClassMemory/12582880}.
+MYSQL_BYTES_PER_CONNECTION = 12582880
+
+# Memory of an Aurora Capacity Unit in GiB.
+ACU_MEMORY_GIB = 2
+
+
+@dataclass(frozen=True)
+class PayloadProfile:
+    """What an average request costs each tier."""
+    request_kb: float # Request size.
+    response_kb: float # Response size.
+    cpu_ms: float # CPU time on the application instance.
+    response_time_ms: float # Time the request holds a web server worker.
+    db_queries: float # Queries per request.
+    db_query_ms: float # Time a query holds a database connection.
+    db_iops: float # Physical database I/O's per request, after the buffer pool.
+    nat_kb: float # Traffic through the NAT gateways per request, e.g. calls to external API's.
+    new_connection_ratio: float # Share of the requests that open a new connection to the ALB.
+
+
+PAYLOAD_PROFILES = {
+    # Small JSON requests and responses, mostly served from the buffer pool.
+    "api": PayloadProfile(request_kb=1, response_kb=4, cpu_ms=10, response_time_ms=50, db_queries=2, db_query_ms=2,
+                          db_iops=0.2, nat_kb=0, new_connection_ratio=0.1),
+    # Rendered pages with a few queries each.
+    "web": PayloadProfile(request_kb=2, response_kb=40, cpu_ms=25, response_time_ms=120, db_queries=5, db_query_ms=3,
+                          db_iops=0.5, nat_kb=0, new_connection_ratio=0.2),
+    # Large responses, e.g. reports and exports, with external calls through the NAT gateways.
+    "media": PayloadProfile(request_kb=4, response_kb=1024, cpu_ms=60, response_time_ms=800, db_queries=10, db_query_ms=5,
+                            db_iops=4, nat_kb=256, new_connection_ratio=0.5),
+}
+
+
+@dataclass(frozen=True)
+class TierCapacity:
+    """The request rate ceiling of a tier, None when the tier doesn't limit the request rate."""
+    tier: str
+    ceiling_rps: Optional[float]
+    limit: str # What sets the ceiling.
+    utilization: float # At the target request rate.
+
+
+@dataclass(frozen=True)
+class CapacityReport:
+    target_rps: float
+    max_utilization: float
+    tiers: List[TierCapacity]
+
+    @property
+    def bottleneck(self) -> Optional[TierCapacity]:
+        """The tier with the lowest ceiling."""
+        limited = [tier for tier in self.tiers if tier.ceiling_rps is not None]
+        return min(limited, key=lambda tier: tier.ceiling_rps) if limited else None
+
+    @property
+    def meets_slo(self) -> bool:
+        """True when no tier runs above 'max_utilization' at the target request rate."""
+        return all(tier.utilization <= self.max_utilization for tier in self.tiers)
+
+    def render(self) -> str:
+        lines = [f"Target: {self.target_rps:g} requests/s, at most {self.max_utilization:.0%} utilization per tier", ""]
+        for tier in self.tiers:
+            ceiling = "unlimited" if tier.ceiling_rps is None else f"{tier.ceiling_rps:,.0f} rps"
+            lines.append(f"{tier.tier:<16}{ceiling:>14}{tier.utilization:>8.0%}  {tier.limit}")
+        lines.append("")
+        if self.bottleneck is not None:
+            lines.append(f"First bottleneck: {self.bottleneck.tier} at {self.bottleneck.ceiling_rps:,.0f} rps ({self.bottleneck.limit})")
+        lines.append("SLO: met" if self.meets_slo else "SLO: NOT met")
+        return "\n".join(lines)
+
+
+def load_resources(assembly_dir: str, stacks: str = "*") -> Dict[str, dict]:
+    """Return the resources of the stacks in the cloud assembly (e.g. cdk.out) whose name matches 'stacks'.
+
+    The tiers may be split over several stacks, their resources are merged. The stacks must be one copy of the tiers:
+    a multi-region assembly is planned one region at a time, e.g. with stacks="*-eu-west-1".
+    """
+    assembly = Path(assembly_dir)
+    manifest = json.loads((assembly / "manifest.json").read_text())
+    resources = {}
+    origins = {} # Logical id => stack name.
+    environments = {} # Environment => stack names.
+    for name, artifact in manifest["artifacts"].items():
+        if artifact["type"] == "aws:cloudformation:stack" and fnmatch.fnmatch(name, stacks):
+            environments.setdefault(artifact.get("environment"), []).append(name)
+            template = json.loads((assembly / artifact["properties"]["templateFile"]).read_text())
+            for logical_id, resource in template.get("Resources", {}).items():
+                if resource["Type"] == "AWS::CDK::Metadata":
+                    continue
+                if logical_id in origins:
+                    raise ValueError(f"Resource '{logical_id}' is in stacks '{origins[logical_id]}' and '{name}',"
+                                     f" select one copy of the tiers with stacks, e.g. '*-<region>'")
+                origins[logical_id] = name
+                resources[logical_id] = resource
+    if not resources:
+        raise ValueError(f"No stacks matching '{stacks}' in {assembly_dir}, synthesize the app first")
+    if len(environments) > 1:
+        raise ValueError(f"Stacks matching '{stacks}' are in {len(environments)} environments {sorted(environments)},"
+                         f" plan one region at a time with stacks, e.g. '*-<region>'")
+    return resources
+
+
+def of_type(resources: Dict[str, dict], resource_type: str) -> Dict[str, dict]:
+    return {logical_id: resource for logical_id, resource in resources.items() if resource["Type"] == resource_type}
+
+
+def utilization(target_rps: float, ceiling_rps: Optional[float]) -> float:
+    if ceiling_rps is None:
+        return 0.0
+    return math.inf if ceiling_rps == 0 else target_rps / ceiling_rps
+
+
+def golden_ami_components(resources: Dict[str, dict], image_id: object) -> List[dict]:
+    """Return the Image Builder components of the golden AMI a launch template resolves from SSM at launch, e.g.
+    'resolve:ssm:/multi-tier-architecture/golden-ami': the pipeline distributing to that parameter and its recipe.
+    """
+    if not isinstance(image_id, str) or not image_id.strip("{}").startswith("resolve:ssm:"):
+        return []
+    parameter = image_id.strip("{}").removeprefix("resolve:ssm:")
+    components = []
+    for distribution_id, distribution in of_type(resources, "AWS::ImageBuilder::DistributionConfiguration").items():
+        parameters = [ssm_parameter.get("ParameterName") for target in distribution["Properties"].get("Distributions", [])
+                      for ssm_parameter in target.get("SsmParameterConfigurations", [])]
+        if parameter not in parameters:
+            continue
+        for pipeline in of_type(resources, "AWS::ImageBuilder::ImagePipeline").values():
+            if pipeline["Properties"].get("DistributionConfigurationArn") != {"Fn::GetAtt": [distribution_id, "Arn"]}:
+                continue
+            recipe = resources[pipeline["Properties"]["ImageRecipeArn"]["Fn::GetAtt"][0]]
+            # Components of the recipe in the template, not the AWS managed ones referenced by their ARN.
+            components += [resources[component["ComponentArn"]["Fn::GetAtt"][0]] for component in recipe["Properties"]["Components"]
+                           if isinstance(component["ComponentArn"], dict) and "Fn::GetAtt" in component["ComponentArn"]]
+    return components
+
+
+def max_request_workers(resources: Dict[str, dict], launch_template: dict) -> Optional[int]:
+    """Return the MaxRequestWorkers of the web server a launch template boots, rendered in its user data or in the
+    golden AMI it launches from. None if it isn't set.
+    """
+    sources = [launch_template.get("UserData")]
+    sources += [component["Properties"].get("Data") for component in golden_ami_components(resources, launch_template.get("ImageId"))]
+    for source in sources:
+        match = re.search(r"MaxRequestWorkers (\d+)", json.dumps(source))
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def app_tier_capacity(resources: Dict[str, dict], payload: PayloadProfile, target_rps: float,
+                      cpu_baseline: Optional[float] = None, network_gbps: Optional[float] = None) -> List[TierCapacity]:
+    """CPU, web server workers and network of the Auto Scaling Group behind the target group, at its max size.
+
+    'cpu_baseline' and 'network_gbps' override the baselines of the instance type in INSTANCE_BASELINES, they are
+    required for an instance type that isn't in it.
+    """
+    groups = [group for group in of_type(resources, "AWS::AutoScaling::AutoScalingGroup").values()
+              if group["Properties"].get("TargetGroupARNs")]
+    if not groups:
+        return []
+    group = groups[0]["Properties"]
+    launch_template = resources[group["LaunchTemplate"]["LaunchTemplateId"]["Ref"]]["Properties"]["LaunchTemplateData"]
+    instance_type = launch_template["InstanceType"]
+    instances = int(group["MaxSize"])
+    if instance_type in INSTANCE_BASELINES:
+        baseline_cpu, baseline_gbps = INSTANCE_BASELINES[instance_type]
+        baseline_cpu = baseline_cpu if cpu_baseline is None else cpu_baseline
+        network_gbps = baseline_gbps if network_gbps is None else network_gbps
+    elif cpu_baseline is None or network_gbps is None:
+        raise ValueError(f"Unknown instance type '{instance_type}', pass its baselines with --cpu-baseline and --network-gbps")
+    else:
+        baseline_cpu = cpu_baseline
+
+    # T2 instances default to standard credits, the later burstable generations to unlimited.
+    cpu_credits = launch_template.get("CreditSpecification", {}).get("CpuCredits", "standard" if instance_type.startswith("t2.") else "unlimited")
+    vcpus = instance_vcpus(instance_type)
+    if baseline_cpu < 1 and cpu_credits == "standard":
+        cpu_share, credits = baseline_cpu, f"standard credits: {baseline_cpu:.0%} baseline"
+    else:
+        cpu_share, credits = 1.0, "unlimited credits, surplus charged" if baseline_cpu < 1 else "no credits"
+    cpu_ceiling = instances * vcpus * cpu_share * 1000 / payload.cpu_ms
+
+    # Every request in flight holds a web server worker, 150 is the default of Apache.
+    workers = max_request_workers(resources, launch_template) or 150
+    worker_ceiling = instances * workers * 1000 / payload.response_time_ms
+
+    # Requests and responses pass the network interface of the instance.
+    network_ceiling = instances * network_gbps * 1e9 / 8 / ((payload.request_kb + payload.response_kb) * 1024)
+
+    tier = f"{instances} x {instance_type}"
+    return [
+        TierCapacity("app cpu", cpu_ceiling, f"{tier}, {vcpus} vCPU, {credits}", utilization(target_rps, cpu_ceiling)),
+        TierCapacity("app workers", worker_ceiling, f"{tier}, {workers} MaxRequestWorkers", utilization(target_rps, worker_ceiling)),
+        TierCapacity("app network", network_ceiling, f"{tier}, {network_gbps:g} Gbps baseline", utilization(target_rps, network_ceiling)),
+    ]
+
+
+def alb_capacity(resources: Dict[str, dict], payload: PayloadProfile, target_rps: float) -> List[TierCapacity]:
+    """The ALB scales itself, report the LCU's it is charged for at the target request rate."""
+    if not of_type(resources, "AWS::ElasticLoadBalancingV2::LoadBalancer"):
+        return []
+    new_connections = target_rps * payload.new_connection_ratio
+    lcus = max(
+        new_connections / LCU_NEW_CONNECTIONS_PER_SECOND,
+        # A connection stays open for about a minute of keep-alive.
+        new_connections * 60 / LCU_ACTIVE_CONNECTIONS_PER_MINUTE,
+        target_rps * (payload.request_kb + payload.response_kb) * 1024 * 3600 / 1e9 / LCU_PROCESSED_GB_PER_HOUR,
+    )
+    return [TierCapacity("alb", None, f"scales itself, about {lcus:.1f} LCU's at the target", 0.0)]
+
+
+def nat_capacity(resources: Dict[str, dict], payload: PayloadProfile, target_rps: float) -> List[TierCapacity]:
+    """Bandwidth of the NAT gateways, for the traffic of the requests to the internet."""
+    nat_gateways = len(of_type(resources, "AWS::EC2::NatGateway"))
+    if not payload.nat_kb:
+        return [TierCapacity("nat", None, f"{nat_gateways} NAT gateways, no traffic through NAT", 0.0)]
+    ceiling = nat_gateways * NAT_GATEWAY_GBPS * 1e9 / 8 / (payload.nat_kb * 1024)
+    return [TierCapacity("nat", ceiling, f"{nat_gateways} x {NAT_GATEWAY_GBPS} Gbps NAT gateways", utilization(target_rps, ceiling))]
+
+
+def database_capacity(resources: Dict[str, dict], payload: PayloadProfile, target_rps: float) -> List[TierCapacity]:
+    """Connections and IOPS of the writer: a RDS instance or an Aurora Serverless v2 cluster at its max ACU's."""
+    clusters = of_type(resources, "AWS::RDS::DBCluster")
+    writers = [instance["Properties"] for instance in of_type(resources, "AWS::RDS::DBInstance").values()
+               if "SourceDBInstanceIdentifier" not in instance["Properties"] and "DBClusterIdentifier" not in instance["Properties"]]
+
+    if clusters:
+        cluster = next(iter(clusters.values()))["Properties"]
+        max_acu = cluster["ServerlessV2ScalingConfiguration"]["MaxCapacity"]
+        writer = f"Aurora Serverless v2 at {max_acu:g} ACU"
+        max_connections = int(max_acu * ACU_MEMORY_GIB * 1024 ** 3 / MYSQL_BYTES_PER_CONNECTION)
+        iops = None # Aurora storage isn't provisioned.
+    elif writers:
+        instance = writers[0]
+        writer = instance["DBInstanceClass"]
+        max_connections = int(db_instance_memory_gib(instance["DBInstanceClass"]) * 1024 ** 3 / MYSQL_BYTES_PER_CONNECTION)
+        parameter_group = instance.get("DBParameterGroupName")
+        if isinstance(parameter_group, dict) and "Ref" in parameter_group:
+            max_connections = int(resources[parameter_group["Ref"]]["Properties"]["Parameters"].get("max_connections", max_connections))
+        if "Iops" in instance:
+            iops = int(instance["Iops"])
+        elif instance.get("StorageType") == "gp3":
+            iops = GP3_BASELINE_IOPS
+        else:
+            iops = max(100, GP2_IOPS_PER_GIB * int(instance.get("AllocatedStorage", 20)))
+    else:
+        return []
+
+    # Little's law: the connections in use are the request rate times the time a request holds a connection.
+    proxies = of_type(resources, "AWS::RDS::DBProxyTargetGroup")
+    if proxies:
+        # The proxy pool only lends a connection for the duration of a query.
+        pool = next(iter(proxies.values()))["Properties"].get("ConnectionPoolConfigurationInfo", {})
+        connections = int(max_connections * pool.get("MaxConnectionsPercent", 100) / 100)
+        connection_ceiling = connections * 1000 / (payload.db_queries * payload.db_query_ms)
+        connection_limit = f"{writer}, {connections} pooled connections through RDS Proxy"
+    else:
+        # Without a proxy every web server worker holds its connection for the whole request.
+        connections = max_connections
+        connection_ceiling = connections * 1000 / payload.response_time_ms
+        connection_limit = f"{writer}, max_connections {connections}, held per request without RDS Proxy"
+
+    capacities = [TierCapacity("db connections", connection_ceiling, connection_limit, utilization(target_rps, connection_ceiling))]
+    if iops is None or not payload.db_iops:
+        capacities.append(TierCapacity("db iops", None, f"{writer}, storage scales itself" if iops is None else f"{iops} IOPS", 0.0))
+    else:
+        iops_ceiling = iops / payload.db_iops
+        capacities.append(TierCapacity("db iops", iops_ceiling, f"{writer}, {iops} IOPS", utilization(target_rps, iops_ceiling)))
+    return capacities
+
+
+def plan(resources: Dict[str, dict], payload: PayloadProfile, target_rps: float, max_utilization: float = 0.7,
+         cpu_baseline: Optional[float] = None, network_gbps: Optional[float] = None) -> CapacityReport:
+    """Estimate the ceiling of every tier in 'resources' and check them against the target request rate.
+
+    'cpu_baseline' and 'network_gbps' are the baselines of the app instance type, see app_tier_capacity.
+    """
+    tiers = (
+        alb_capacity(resources, payload, target_rps)
+        + app_tier_capacity(resources, payload, target_rps, cpu_baseline, network_gbps)
+        + nat_capacity(resources, payload, target_rps)
+        + database_capacity(resources, payload, target_rps)
+    )
+    return CapacityReport(target_rps=target_rps, max_utilization=max_utilization, tiers=tiers)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Estimate the request rate ceiling of every tier from the synthesized templates.")
+    parser.add_argument("assembly", nargs="?", default="cdk.out", help="cloud assembly directory (default: cdk.out)")
+    parser.add_argument("--stacks", default="*", help="stack name pattern, one region of a multi-region app, e.g. '*-eu-west-1' (default: all)")
+    parser.add_argument("--target-rps", type=float, required=True, help="target request rate, requests per second")
+    parser.add_argument("--payload", choices=sorted(PAYLOAD_PROFILES), default="web", help="payload profile (default: web)")
+    parser.add_argument("--max-utilization", type=float, default=0.7,
+                        help="SLO: highest utilization of any tier at the target, queueing grows fast above it (default: 0.7)")
+    parser.add_argument("--cpu-baseline", type=float,
+                        help="baseline CPU share of the app instance type on standard credits, e.g. 0.2 (default: INSTANCE_BASELINES)")
+    parser.add_argument("--network-gbps", type=float,
+                        help="baseline network bandwidth of the app instance type in Gbps (default: INSTANCE_BASELINES)")
+    for field in dataclasses.fields(PayloadProfile):
+        parser.add_argument(f"--{field.name.replace('_', '-')}", type=float, help=f"override {field.name} of the payload profile")
+    args = parser.parse_args(argv)
+
+    payload = dataclasses.replace(PAYLOAD_PROFILES[args.payload], **{
+        field.name: getattr(args, field.name) for field in dataclasses.fields(PayloadProfile) if getattr(args, field.name) is not None
+    })
+    try:
+        report = plan(load_resources(args.assembly, args.stacks), payload, args.target_rps, args.max_utilization,
+                      args.cpu_baseline, args.network_gbps)
+    except ValueError as error:
+        parser.error(str(error))
+    print(report.render())
+    return 0 if report.meets_slo else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
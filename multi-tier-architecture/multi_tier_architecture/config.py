@@ -0,0 +1,509 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import dataclasses
+
+from aws_cdk import (
+    Stack,
+    Token,
+    aws_ec2 as ec2,
+    aws_elasticloadbalancingv2 as elbv2,
+)
+from constructs import Construct
+from multi_tier_architecture.db_tuning import DB_TUNING_PROFILES, NO_PERFORMANCE_INSIGHTS, DbTuningProfile
+from multi_tier_architecture.monitoring import AlarmThresholds, is_burstable
+from multi_tier_architecture.user_data import WORKER_SCRIPT, instance_architecture
+
+
+def context_value(scope: Construct, key: str, default=None):
+    """Return the CDK context value for 'key', or 'default' when it isn't set.
+
+    Context can be set in cdk.json, in the App(context={...}) call or on the command line with: cdk synth -c key=value.
+    """
+    value = scope.node.try_get_context(key)
+    return default if value is None else value
+
+
+def context_flag(scope: Construct, key: str, default: bool = False) -> bool:
+    """Return a boolean CDK context value, -c values from the command line arrive as strings ("true"/"false")."""
+    value = context_value(scope, key, default)
+    if isinstance(value, str):
+        return value.lower() in ("true", "1", "yes")
+    return bool(value)
+
+
+def context_list(scope: Construct, key: str, default: list = None) -> list:
+    """Return a list CDK context value, -c values from the command line arrive as comma separated strings."""
+    value = context_value(scope, key, default)
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(",") if item.strip()]
+    return list(value) if value is not None else []
+
+
+
+# Engine version and default parameter groups (cluster mode disabled/enabled) per ElastiCache engine.
+CACHE_ENGINES = {
+    "valkey": ("8.0", "default.valkey8", "default.valkey8.cluster.on"),
+    "redis": ("7.1", "default.redis7", "default.redis7.cluster.on"),
+}
+
+# Target group settings per onboarding profile: how fast a new instance takes traffic and a leaving one drains.
+# "standard": the original settings, a new instance is healthy after 5 checks of 30s (2.5 minutes).
+# "fast": the lightweight /health endpoint checked every 5s, a new instance is healthy after about 10s.
+TARGET_ONBOARDING_PROFILES = {
+    "standard": {
+        "health_check_path": "/",
+        "health_check_interval": 30,
+        "health_check_timeout": 5,
+        "healthy_threshold_count": 5,
+        "unhealthy_threshold_count": 2,
+        "algorithm": "round_robin",
+        "slow_start": 0,
+        "deregistration_delay": 300,
+    },
+    "fast": {
+        "health_check_path": "/health",
+        "health_check_interval": 5,
+        "health_check_timeout": 2,
+        "healthy_threshold_count": 2,
+        "unhealthy_threshold_count": 3,
+        "algorithm": "least_outstanding_requests",
+        "slow_start": 0,
+        "deregistration_delay": 30,
+    },
+}
+
+# VPC endpoints that can be enabled with the vpc_gateway_endpoints and vpc_interface_endpoints context keys.
+GATEWAY_ENDPOINTS = {
+    "s3": ec2.GatewayVpcEndpointAwsService.S3,
+    "dynamodb": ec2.GatewayVpcEndpointAwsService.DYNAMODB,
+}
+INTERFACE_ENDPOINTS = {
+    "ssm": ec2.InterfaceVpcEndpointAwsService.SSM,
+    "ssmmessages": ec2.InterfaceVpcEndpointAwsService.SSM_MESSAGES,
+    "ec2messages": ec2.InterfaceVpcEndpointAwsService.EC2_MESSAGES,
+    "logs": ec2.InterfaceVpcEndpointAwsService.CLOUDWATCH_LOGS,
+    "monitoring": ec2.InterfaceVpcEndpointAwsService.CLOUDWATCH_MONITORING,
+    "secretsmanager": ec2.InterfaceVpcEndpointAwsService.SECRETS_MANAGER,
+    "ecr.api": ec2.InterfaceVpcEndpointAwsService.ECR,
+    "ecr.dkr": ec2.InterfaceVpcEndpointAwsService.ECR_DOCKER,
+    "xray": ec2.InterfaceVpcEndpointAwsService.XRAY,
+    "sqs": ec2.InterfaceVpcEndpointAwsService.SQS,
+}
+
+# Instance types of the application and database tiers per instance profile.
+# Burstable instances are throttled to their baseline once their CPU credits run out, unless their credits are
+# "unlimited" (surplus credits are charged). The other profiles have no CPU credits, for sustained load.
+# The Graviton (arm64) profiles have a better price/performance, the AMI's are selected for the architecture.
+INSTANCE_PROFILES = {
+    "burstable": {"app_instance_type": "t2.micro", "db_instance_class": "t3.micro"},
+    "graviton-burstable": {"app_instance_type": "t4g.small", "db_instance_class": "t4g.micro"},
+    "general-purpose": {"app_instance_type": "m7i.large", "db_instance_class": "m6i.large"},
+    "graviton": {"app_instance_type": "m7g.large", "db_instance_class": "m7g.large"},
+}
+
+CPU_CREDITS = {
+    "standard": ec2.CpuCredits.STANDARD,
+    "unlimited": ec2.CpuCredits.UNLIMITED,
+}
+
+# Amazon Linux 2023 per CPU architecture: the AMI of the launch template and the Image Builder parent image.
+AMAZON_LINUX_CPU_TYPES = {
+    "x86_64": (ec2.AmazonLinuxCpuType.X86_64, "amazon-linux-2023-x86"),
+    "arm64": (ec2.AmazonLinuxCpuType.ARM_64, "amazon-linux-2023-arm64"),
+}
+
+TARGET_ALGORITHMS = {
+    "round_robin": elbv2.TargetGroupLoadBalancingAlgorithmType.ROUND_ROBIN,
+    "least_outstanding_requests": elbv2.TargetGroupLoadBalancingAlgorithmType.LEAST_OUTSTANDING_REQUESTS,
+}
+
+
+
+@dataclass(frozen=True)
+class RegionPlacement:
+    """A regional copy of the tiers in a multi-region deployment."""
+    region: str
+    vpc_cidr: str # Doesn't overlap the VPC's of the other regions, so they can be peered.
+    primary: bool # The first region: it owns the IAM AdminGroup and the source RDSdb of the cross-region read replicas.
+
+
+@dataclass(frozen=True)
+class StackConfig:
+    """Configuration of the network, data and application tiers, read from the CDK context (see the README).
+
+    Every stack of the application reads the same configuration, so the tiers agree on the optional features,
+    e.g. the network tier creates SG_RDSProxy when the data tier has a RDS Proxy.
+    """
+    # Network: AZ's, NAT gateways, VPC endpoints and internet egress of the application tier.
+    az_count: int
+    nat_gateways: int
+    vpc_gateway_endpoints: List[str]
+    vpc_interface_endpoints: List[str]
+    gateway_prefix_list_ids: Dict[str, Optional[str]]
+    app_internet_egress: bool
+
+    # Application tier.
+    app_instances_per_az: int
+    instance_profile: str
+    app_instance_type: str
+    app_architecture: str
+    app_cpu_credits: Optional[str]
+    app_volume_iops: int
+    app_volume_throughput: int
+    app_min_capacity: int
+    app_max_capacity: int
+    app_desired_capacity: Optional[int]
+    app_requests_per_target: int
+    app_cpu_target: int
+    alb_idle_timeout: int
+    web_server_mpm: str
+    target_onboarding: str
+    onboarding: dict
+    target_algorithm: str
+    target_slow_start: int
+    target_deregistration_delay: int
+
+    # Data tier.
+    enable_rds_proxy: bool
+    rds_proxy_max_connections_percent: int
+    db_engine: str
+    db_min_acu: float
+    db_max_acu: float
+    db_instance_class: str
+    db_multi_az: bool
+    db_availability_zone: int
+    db_read_replicas: int
+    db_replica_instance_class: str
+    db_replica_azs: List[int]
+    db_tuning_profile: str
+    db_tuning: DbTuningProfile
+    enable_cache: bool
+    cache_engine: str
+    cache_node_type: str
+    cache_shards: int
+    cache_replicas: int
+
+    # Optional features of the application tier.
+    enable_cloudfront: bool
+    cloudfront_prefix_list_id: Optional[str]
+    cloudfront_dynamic_default_ttl: int
+    cloudfront_static_default_ttl: int
+    enable_instrumentation: bool
+    enable_monitoring: bool
+    alarm_email: Optional[str]
+    alarm_thresholds: AlarmThresholds
+    enable_alb_access_logs: bool
+    alb_access_logs_retention_days: int
+    alb_access_logs_prefix: str
+    alb_access_logs_database: str
+    enable_golden_ami: bool
+    golden_ami_parameter: str
+    golden_ami_build_instance_type: str
+    golden_ami_schedule: str
+    enable_worker_tier: bool
+    worker_instance_type: str
+    worker_min_capacity: int
+    worker_max_capacity: int
+    worker_visibility_timeout: int
+    worker_max_receive_count: int
+    worker_messages_per_instance: int
+    worker_max_message_age: int
+    worker_command: str
+
+    # Multi-region deployment: a copy of the tiers per region behind Route 53 latency records (app.py).
+    regions: List[str]
+    domain_name: Optional[str]
+    hosted_zone_id: Optional[str]
+    region_health_check_interval: int
+    cross_region_read_replicas: bool
+
+    @classmethod
+    def from_context(cls, scope: Stack) -> "StackConfig":
+        """Read and validate the configuration from the CDK context of 'scope'."""
+        # Number of AZ's and the number of application instances per AZ.
+        # Note: an environment-agnostic stack (no account/region in app.py) always gets 2 AZ's.
+        az_count = int(context_value(scope, "az_count", 2))
+        nat_gateways = int(context_value(scope, "nat_gateways", az_count)) # Default: 1 NAT gateway per AZ.
+        app_instances_per_az = int(context_value(scope, "app_instances_per_az", 1))
+
+        # Instance profile of the application and database tiers, app_instance_type and db_instance_class override it.
+        instance_profile = context_value(scope, "instance_profile", "burstable")
+        if instance_profile not in INSTANCE_PROFILES:
+            raise ValueError(f"Unknown instance_profile '{instance_profile}', expected one of {sorted(INSTANCE_PROFILES)}")
+        profile = INSTANCE_PROFILES[instance_profile]
+        app_instance_type = context_value(scope, "app_instance_type", profile["app_instance_type"])
+        app_architecture = instance_architecture(app_instance_type)
+        # CPU credits of burstable application instances, "unlimited" keeps them from being throttled under sustained load.
+        app_cpu_credits = context_value(scope, "app_cpu_credits", "unlimited" if is_burstable(app_instance_type) else None)
+        if app_cpu_credits is not None:
+            if app_cpu_credits not in CPU_CREDITS:
+                raise ValueError(f"Unknown app_cpu_credits '{app_cpu_credits}', expected one of {sorted(CPU_CREDITS)}")
+            if not is_burstable(app_instance_type):
+                raise ValueError(f"app_cpu_credits requires a burstable app_instance_type, not '{app_instance_type}'")
+        # gp3 root volume of the application instances: 3000 IOPS and 125 MiB/s are included in the price.
+        app_volume_iops = int(context_value(scope, "app_volume_iops", 3000))
+        app_volume_throughput = int(context_value(scope, "app_volume_throughput", 125)) # MiB/s, up to 1000.
+
+        # Capacity of the application tier Auto Scaling Group.
+        app_min_capacity = int(context_value(scope, "app_min_capacity", app_instances_per_az * az_count))
+        app_max_capacity = int(context_value(scope, "app_max_capacity", 3 * app_min_capacity))
+        app_desired_capacity = context_value(scope, "app_desired_capacity")
+        if app_desired_capacity is not None:
+            app_desired_capacity = int(app_desired_capacity)
+
+        # Target tracking values for the application tier scaling policies.
+        app_requests_per_target = int(context_value(scope, "app_requests_per_target", 1000)) # Requests per minute per instance.
+        app_cpu_target = int(context_value(scope, "app_cpu_target", 60)) # Average CPU utilization in percent.
+
+        # ALB idle timeout in seconds, the web server keep-alive timeout is derived from it.
+        alb_idle_timeout = int(context_value(scope, "alb_idle_timeout", 60))
+        web_server_mpm = context_value(scope, "web_server_mpm", "event")
+
+        # Target onboarding profile, the algorithm, slow start and deregistration delay can be overridden.
+        target_onboarding = context_value(scope, "target_onboarding", "fast")
+        if target_onboarding not in TARGET_ONBOARDING_PROFILES:
+            raise ValueError(f"Unknown target_onboarding '{target_onboarding}', expected one of {sorted(TARGET_ONBOARDING_PROFILES)}")
+        onboarding = TARGET_ONBOARDING_PROFILES[target_onboarding]
+        target_algorithm = context_value(scope, "target_algorithm", onboarding["algorithm"])
+        if target_algorithm not in TARGET_ALGORITHMS:
+            raise ValueError(f"Unknown target_algorithm '{target_algorithm}', expected one of {sorted(TARGET_ALGORITHMS)}")
+        target_slow_start = int(context_value(scope, "target_slow_start", onboarding["slow_start"])) # Seconds, 0 disables it.
+        target_deregistration_delay = int(context_value(scope, "target_deregistration_delay", onboarding["deregistration_delay"])) # Seconds.
+        # The ALB only supports slow start mode with round robin.
+        if target_slow_start and target_algorithm != "round_robin":
+            raise ValueError("target_slow_start requires target_algorithm 'round_robin'")
+
+        # RDS Proxy connection pooling in front of RDSdb.
+        enable_rds_proxy = context_flag(scope, "enable_rds_proxy")
+        rds_proxy_max_connections_percent = int(context_value(scope, "rds_proxy_max_connections_percent", 90))
+
+        # Data tier engine: "mysql" for a RDS MySQL instance or "aurora-serverless" for an Aurora MySQL Serverless v2 cluster.
+        db_engine = context_value(scope, "db_engine", "mysql")
+        if db_engine not in ("mysql", "aurora-serverless"):
+            raise ValueError(f"Unknown db_engine '{db_engine}', expected 'mysql' or 'aurora-serverless'")
+
+        # Capacity range of the Aurora Serverless v2 instances, in Aurora Capacity Units (ACU's).
+        db_min_acu = float(context_value(scope, "db_min_acu", 0.5))
+        db_max_acu = float(context_value(scope, "db_max_acu", 4))
+
+        # Data tier: instance class, Multi-AZ standby and read replicas (Aurora readers with db_engine=aurora-serverless).
+        # AZ placement is given as indexes into the AZ's of the VPC, e.g. -c db_replica_azs=1,0
+        db_instance_class = context_value(scope, "db_instance_class", profile["db_instance_class"])
+        db_multi_az = context_flag(scope, "db_multi_az")
+        db_availability_zone = int(context_value(scope, "db_availability_zone", 0))
+        db_read_replicas = int(context_value(scope, "db_read_replicas", 0))
+        db_replica_instance_class = context_value(scope, "db_replica_instance_class", db_instance_class)
+        db_replica_azs = [int(az) for az in context_list(scope, "db_replica_azs")]
+        if not 0 <= db_availability_zone < az_count:
+            raise ValueError(f"db_availability_zone {db_availability_zone} is outside the {az_count} AZ's, expected 0 to {az_count - 1}")
+        for az in db_replica_azs:
+            if not 0 <= az < az_count:
+                raise ValueError(f"db_replica_azs index {az} is outside the {az_count} AZ's, expected 0 to {az_count - 1}")
+
+        # Tuning profile of RDSdb and its replicas: parameter group, storage autoscaling, gp3 IOPS/throughput and monitoring.
+        # Burstable classes default to "development", Performance Insights isn't available on the smallest of them.
+        db_tuning_profile = context_value(scope, "db_tuning", "development" if is_burstable(db_instance_class) else "production")
+        if db_tuning_profile not in DB_TUNING_PROFILES:
+            raise ValueError(f"Unknown db_tuning '{db_tuning_profile}', expected one of {sorted(DB_TUNING_PROFILES)}")
+        profile_tuning = DB_TUNING_PROFILES[db_tuning_profile]
+        db_iops = context_value(scope, "db_iops", profile_tuning.iops)
+        db_storage_throughput = context_value(scope, "db_storage_throughput", profile_tuning.storage_throughput)
+        db_tuning = dataclasses.replace(
+            profile_tuning,
+            max_allocated_storage=int(context_value(scope, "db_max_allocated_storage", profile_tuning.max_allocated_storage)),
+            iops=int(db_iops) if db_iops is not None else None,
+            storage_throughput=int(db_storage_throughput) if db_storage_throughput is not None else None,
+            performance_insights=context_flag(scope, "db_performance_insights", profile_tuning.performance_insights),
+            monitoring_interval=int(context_value(scope, "db_monitoring_interval", profile_tuning.monitoring_interval)),
+        )
+        db_instance_classes = {db_instance_class, db_replica_instance_class} if db_read_replicas else {db_instance_class}
+        if db_tuning.performance_insights and db_engine == "mysql" and db_instance_classes & NO_PERFORMANCE_INSIGHTS:
+            raise ValueError(f"Performance Insights isn't available on {sorted(db_instance_classes & NO_PERFORMANCE_INSIGHTS)},"
+                             f" set db_performance_insights=false or use a larger instance class")
+
+        # ElastiCache caching tier between the application and database tiers.
+        enable_cache = context_flag(scope, "enable_cache")
+        cache_engine = context_value(scope, "cache_engine", "valkey")
+        if cache_engine not in CACHE_ENGINES:
+            raise ValueError(f"Unknown cache_engine '{cache_engine}', expected one of {sorted(CACHE_ENGINES)}")
+        cache_node_type = context_value(scope, "cache_node_type", "cache.t3.micro")
+        cache_shards = int(context_value(scope, "cache_shards", 1))
+        cache_replicas = int(context_value(scope, "cache_replicas", 1)) # Replicas per shard.
+
+        # CloudFront edge caching in front of the ALB, with a S3 origin for the static assets.
+        enable_cloudfront = context_flag(scope, "enable_cloudfront")
+        cloudfront_prefix_list_id = context_value(scope, "cloudfront_prefix_list_id") # If not set: looked up at deploy time.
+        cloudfront_dynamic_default_ttl = int(context_value(scope, "cloudfront_dynamic_default_ttl", 0)) # Seconds, when the ALB sends no Cache-Control.
+        cloudfront_static_default_ttl = int(context_value(scope, "cloudfront_static_default_ttl", 86400)) # Seconds.
+
+        # VPC endpoints in the ApplicationSubnets, AWS traffic then doesn't pass the NAT gateways.
+        # Gateway endpoints are free, interface endpoints are charged per AZ per hour.
+        vpc_gateway_endpoints = context_list(scope, "vpc_gateway_endpoints", ["s3", "dynamodb"])
+        vpc_interface_endpoints = context_list(scope, "vpc_interface_endpoints")
+        for endpoint in vpc_gateway_endpoints:
+            if endpoint not in GATEWAY_ENDPOINTS:
+                raise ValueError(f"Unknown gateway endpoint '{endpoint}', expected one of {sorted(GATEWAY_ENDPOINTS)}")
+        for endpoint in vpc_interface_endpoints:
+            if endpoint not in INTERFACE_ENDPOINTS:
+                raise ValueError(f"Unknown interface endpoint '{endpoint}', expected one of {sorted(INTERFACE_ENDPOINTS)}")
+        # Prefix list ids of the gateway endpoints, e.g. -c s3_prefix_list_id=pl-63a5400a. If not set: looked up at deploy time.
+        gateway_prefix_list_ids = {endpoint: context_value(scope, f"{endpoint}_prefix_list_id") for endpoint in vpc_gateway_endpoints}
+        # When false the application tier has no internet egress: only the VPC endpoints (and their prefix lists).
+        app_internet_egress = context_flag(scope, "app_internet_egress", True)
+
+        # Instrumentation: the CloudWatch agent collects host metrics, the Apache timing log and OTLP/X-Ray traces.
+        enable_instrumentation = context_flag(scope, "enable_instrumentation")
+        if enable_instrumentation and not app_internet_egress:
+            # Without internet egress the agent reaches CloudWatch and X-Ray through interface endpoints.
+            vpc_interface_endpoints += [endpoint for endpoint in ("logs", "monitoring", "xray") if endpoint not in vpc_interface_endpoints]
+
+        # CloudWatch dashboard and alarms, the thresholds are set with alarm_<threshold> context keys (see AlarmThresholds).
+        enable_monitoring = context_flag(scope, "enable_monitoring", True)
+        alarm_email = context_value(scope, "alarm_email") # Subscribed to the alarm SNS topic.
+        # By default an alarm goes off when there are less healthy targets than the minimum capacity.
+        alarm_defaults = AlarmThresholds(min_healthy_hosts=app_min_capacity)
+        alarm_thresholds = AlarmThresholds(**{
+            field.name: type(getattr(alarm_defaults, field.name))(
+                context_value(scope, f"alarm_{field.name}", getattr(alarm_defaults, field.name)))
+            for field in dataclasses.fields(AlarmThresholds)
+        })
+
+        # ALB access logs in S3, with a Glue table to analyze the latency per request with Athena.
+        enable_alb_access_logs = context_flag(scope, "enable_alb_access_logs")
+        alb_access_logs_retention_days = int(context_value(scope, "alb_access_logs_retention_days", 30))
+        alb_access_logs_prefix = context_value(scope, "alb_access_logs_prefix", "alb")
+        alb_access_logs_database = context_value(scope, "alb_access_logs_database", "alb_access_logs")
+        if enable_alb_access_logs and Token.is_unresolved(scope.region):
+            # The bucket policy grants the Elastic Load Balancing account of the region access.
+            raise ValueError("enable_alb_access_logs requires a stack with a region, set 'env' in app.py")
+
+        # Golden AMI: EC2 Image Builder bakes the web server into the application tier image, instead of installing it on every boot.
+        enable_golden_ami = context_flag(scope, "enable_golden_ami")
+        golden_ami_parameter = context_value(scope, "golden_ami_parameter", "/multi-tier-architecture/golden-ami")
+        # The build instances must have the architecture of the application instances.
+        golden_ami_build_instance_type = context_value(
+            scope, "golden_ami_build_instance_type", "t4g.small" if app_architecture == "arm64" else "t3.small")
+        if instance_architecture(golden_ami_build_instance_type) != app_architecture:
+            raise ValueError(f"golden_ami_build_instance_type '{golden_ami_build_instance_type}' must be {app_architecture}"
+                             f" like app_instance_type '{app_instance_type}'")
+        golden_ami_schedule = context_value(scope, "golden_ami_schedule", "cron(0 3 ? * sun *)") # Weekly rebuild, if the parent image has updates.
+
+        # Worker tier: the web tier sends slow work (reports, email, bulk writes) to a SQS queue, a worker Auto Scaling
+        # Group in the ApplicationSubnets processes it, scaling on the queue depth and the age of the oldest message.
+        enable_worker_tier = context_flag(scope, "enable_worker_tier")
+        # The workers launch from the AMI of the application tier, so they must have its architecture.
+        worker_instance_type = context_value(scope, "worker_instance_type", app_instance_type)
+        if instance_architecture(worker_instance_type) != app_architecture:
+            raise ValueError(f"worker_instance_type '{worker_instance_type}' must be {app_architecture}"
+                             f" like app_instance_type '{app_instance_type}'")
+        worker_min_capacity = int(context_value(scope, "worker_min_capacity", 1))
+        worker_max_capacity = int(context_value(scope, "worker_max_capacity", 4))
+        # Seconds a received message is hidden from the other workers, longer than the slowest job.
+        worker_visibility_timeout = int(context_value(scope, "worker_visibility_timeout", 300))
+        # Receives before a message that keeps failing moves to the dead-letter queue.
+        worker_max_receive_count = int(context_value(scope, "worker_max_receive_count", 5))
+        worker_messages_per_instance = int(context_value(scope, "worker_messages_per_instance", 100)) # Backlog a worker may have.
+        worker_max_message_age = int(context_value(scope, "worker_max_message_age", 300)) # Seconds.
+        # Command of the worker service, the placeholder worker logs and deletes the messages.
+        worker_command = context_value(scope, "worker_command", WORKER_SCRIPT)
+        if enable_worker_tier and not app_internet_egress and "sqs" not in vpc_interface_endpoints:
+            # Without internet egress the web and worker tiers reach SQS through an interface endpoint.
+            vpc_interface_endpoints.append("sqs")
+
+        # Multi-region deployment: app.py deploys the tiers into every region (the first is the primary region) and a
+        # global stack routes the users to the region with the lowest latency, e.g. -c regions=us-east-1,eu-west-1.
+        regions = context_list(scope, "regions")
+        if len(set(regions)) != len(regions):
+            raise ValueError(f"Duplicate region in regions {regions}")
+        domain_name = context_value(scope, "domain_name") # Name of the latency records, e.g. "app.example.com".
+        if regions and not domain_name:
+            raise ValueError("regions needs a domain_name for the latency records")
+        hosted_zone_id = context_value(scope, "hosted_zone_id") # If not set: a public hosted zone for domain_name is created.
+        region_health_check_interval = int(context_value(scope, "region_health_check_interval", 30)) # Seconds.
+        if region_health_check_interval not in (10, 30):
+            raise ValueError(f"Unknown region_health_check_interval {region_health_check_interval}, expected one of [10, 30]")
+        if regions and enable_cloudfront:
+            # The health checkers and the latency records reach the ALB's directly, which only accept CloudFront then.
+            raise ValueError("regions route to the regional ALB's, they can't be combined with enable_cloudfront")
+        # A read replica of the RDSdb of the primary region in every other region, for local reads of its data.
+        cross_region_read_replicas = context_flag(scope, "cross_region_read_replicas")
+        if cross_region_read_replicas and len(regions) < 2:
+            raise ValueError("cross_region_read_replicas needs at least 2 regions")
+        if cross_region_read_replicas and db_engine != "mysql":
+            raise ValueError(f"cross_region_read_replicas requires db_engine 'mysql', not '{db_engine}'")
+
+        return cls(
+            az_count=az_count,
+            nat_gateways=nat_gateways,
+            vpc_gateway_endpoints=vpc_gateway_endpoints,
+            vpc_interface_endpoints=vpc_interface_endpoints,
+            gateway_prefix_list_ids=gateway_prefix_list_ids,
+            app_internet_egress=app_internet_egress,
+            app_instances_per_az=app_instances_per_az,
+            instance_profile=instance_profile,
+            app_instance_type=app_instance_type,
+            app_architecture=app_architecture,
+            app_cpu_credits=app_cpu_credits,
+            app_volume_iops=app_volume_iops,
+            app_volume_throughput=app_volume_throughput,
+            app_min_capacity=app_min_capacity,
+            app_max_capacity=app_max_capacity,
+            app_desired_capacity=app_desired_capacity,
+            app_requests_per_target=app_requests_per_target,
+            app_cpu_target=app_cpu_target,
+            alb_idle_timeout=alb_idle_timeout,
+            web_server_mpm=web_server_mpm,
+            target_onboarding=target_onboarding,
+            onboarding=onboarding,
+            target_algorithm=target_algorithm,
+            target_slow_start=target_slow_start,
+            target_deregistration_delay=target_deregistration_delay,
+            enable_rds_proxy=enable_rds_proxy,
+            rds_proxy_max_connections_percent=rds_proxy_max_connections_percent,
+            db_engine=db_engine,
+            db_min_acu=db_min_acu,
+            db_max_acu=db_max_acu,
+            db_instance_class=db_instance_class,
+            db_multi_az=db_multi_az,
+            db_availability_zone=db_availability_zone,
+            db_read_replicas=db_read_replicas,
+            db_replica_instance_class=db_replica_instance_class,
+            db_replica_azs=db_replica_azs,
+            db_tuning_profile=db_tuning_profile,
+            db_tuning=db_tuning,
+            enable_cache=enable_cache,
+            cache_engine=cache_engine,
+            cache_node_type=cache_node_type,
+            cache_shards=cache_shards,
+            cache_replicas=cache_replicas,
+            enable_cloudfront=enable_cloudfront,
+            cloudfront_prefix_list_id=cloudfront_prefix_list_id,
+            cloudfront_dynamic_default_ttl=cloudfront_dynamic_default_ttl,
+            cloudfront_static_default_ttl=cloudfront_static_default_ttl,
+            enable_instrumentation=enable_instrumentation,
+            enable_monitoring=enable_monitoring,
+            alarm_email=alarm_email,
+            alarm_thresholds=alarm_thresholds,
+            enable_alb_access_logs=enable_alb_access_logs,
+            alb_access_logs_retention_days=alb_access_logs_retention_days,
+            alb_access_logs_prefix=alb_access_logs_prefix,
+            alb_access_logs_database=alb_access_logs_database,
+            enable_golden_ami=enable_golden_ami,
+            golden_ami_parameter=golden_ami_parameter,
+            golden_ami_build_instance_type=golden_ami_build_instance_type,
+            golden_ami_schedule=golden_ami_schedule,
+            enable_worker_tier=enable_worker_tier,
+            worker_instance_type=worker_instance_type,
+            worker_min_capacity=worker_min_capacity,
+            worker_max_capacity=worker_max_capacity,
+            worker_visibility_timeout=worker_visibility_timeout,
+            worker_max_receive_count=worker_max_receive_count,
+            worker_messages_per_instance=worker_messages_per_instance,
+            worker_max_message_age=worker_max_message_age,
+            worker_command=worker_command,
+            regions=regions,
+            domain_name=domain_name,
+            hosted_zone_id=hosted_zone_id,
+            region_health_check_interval=region_health_check_interval,
+            cross_region_read_replicas=cross_region_read_replicas,
+        )
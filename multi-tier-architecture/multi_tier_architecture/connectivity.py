@@ -0,0 +1,38 @@
+from dataclasses import dataclass
+from typing import Dict, List, Union
+
+from aws_cdk import aws_ec2 as ec2
+
+
+@dataclass(frozen=True)
+class Flow:
+    """Traffic that 'source' may open to 'destination' on a TCP port.
+
+    Source and destination are tier names (keys of the security groups given to apply_connectivity) or an ec2.IPeer
+    for traffic from or to outside of the tiers, e.g. ec2.Peer.ipv4("0.0.0.0/0").
+    """
+    source: Union[str, ec2.IPeer]
+    destination: Union[str, ec2.IPeer]
+    port: int
+    description: str
+
+
+def apply_connectivity(groups: Dict[str, ec2.SecurityGroup], flows: List[Flow]) -> None:
+    """Generate the minimal set of security group rules for 'flows'.
+
+    Every flow becomes an egress rule on the source tier and an ingress rule on the destination tier (only one of the
+    two for a peer outside of the tiers). The rules are added with the public rule API of the security group, so a
+    rule that a construct adds too, e.g. the ALB target group or the RDS Proxy target, is only created once,
+    whichever adds it first.
+
+    The security group inlines the rules of a cidr or prefix list peer in its AWS::EC2::SecurityGroup resource, a rule
+    referencing another group becomes a separate AWS::EC2::SecurityGroupIngress/Egress resource, which keeps the
+    template free of circular dependencies between the groups.
+    """
+    for flow in flows:
+        if isinstance(flow.source, str):
+            peer = groups[flow.destination] if isinstance(flow.destination, str) else flow.destination
+            groups[flow.source].add_egress_rule(peer, ec2.Port.tcp(flow.port), flow.description)
+        if isinstance(flow.destination, str):
+            peer = groups[flow.source] if isinstance(flow.source, str) else flow.source
+            groups[flow.destination].add_ingress_rule(peer, ec2.Port.tcp(flow.port), flow.description)
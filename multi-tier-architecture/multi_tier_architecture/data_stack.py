@@ -0,0 +1,324 @@
+from aws_cdk import (
+    Stack,
+    aws_ec2 as ec2,
+    aws_rds as rds,
+    aws_elasticache as elasticache,
+    Duration,
+    RemovalPolicy,
+    CfnOutput,
+    Fn,
+)
+from constructs import Construct
+from typing import Optional
+from multi_tier_architecture.config import CACHE_ENGINES, StackConfig
+from multi_tier_architecture.network_stack import NetworkTier
+
+
+class DataTier:
+    """The data tier of a Stack: the RDS database (or Aurora cluster), read replicas, RDS Proxy and ElastiCache.
+
+    Its endpoints are exported to the application tier as 'db_endpoint', 'db_reader_endpoints', with a cross-region
+    read replica 'db_global_reader_endpoint' and, with the cache, 'cache_primary_endpoint' and 'cache_reader_endpoint'.
+    """
+
+    def build_data_tier(self, config: StackConfig, network: NetworkTier, replica_source: Optional["DataTier"] = None) -> None:
+        ### RDS DATABASE ###
+
+        # RDS database. 
+        self.RDSdbReplicas = []
+        self.db_global_reader_endpoint = None
+        tuning = config.db_tuning
+
+        if config.db_engine == "aurora-serverless":
+            # Aurora MySQL cluster with Serverless v2 instances, the capacity of each instance follows the load
+            # between db_min_acu and db_max_acu instead of running on the burst credits of a fixed instance class.
+            aurora_engine = rds.DatabaseClusterEngine.aurora_mysql(version=rds.AuroraMysqlEngineVersion.VER_3_08_0)
+            self.RDSdb = rds.DatabaseCluster(
+                self, "RDSdb",
+                engine=aurora_engine,
+                writer=rds.ClusterInstance.serverless_v2("writer"),
+                # The first reader scales with the writer, so it can take over after a failover without having to scale up first.
+                readers=[
+                    rds.ClusterInstance.serverless_v2(f"reader{i + 1}", scale_with_writer=(i == 0))
+                    for i in range(config.db_read_replicas)
+                ],
+                serverless_v2_min_capacity=config.db_min_acu,
+                serverless_v2_max_capacity=config.db_max_acu,
+                # Aurora sizes the buffer pool and max_connections with the ACU's, the parameter group only adds the slow query log.
+                parameters=tuning.slow_query_log_parameters(),
+                enable_performance_insights=tuning.performance_insights,
+                monitoring_interval=Duration.seconds(tuning.monitoring_interval) if tuning.monitoring_interval else None,
+                vpc=network.vpc,
+                vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_ISOLATED),
+                security_groups=[network.SG_RDSdb],
+                cluster_identifier="MyRdsCluster",
+                removal_policy=RemovalPolicy.DESTROY,
+                backup=rds.BackupProps(retention=Duration.days(1)), # Aurora keeps at least 1 day of automated backups.
+                deletion_protection=False,
+            )
+
+            db_writer_endpoint = self.RDSdb.cluster_endpoint.hostname
+            db_reader_endpoints = [self.RDSdb.cluster_read_endpoint.hostname] if config.db_read_replicas else []
+            if config.enable_rds_proxy:
+                # The proxy target with the MySQL port, see RDS Proxy.
+                proxy_target = rds.ProxyTarget.from_cluster(rds.DatabaseCluster.from_database_cluster_attributes(
+                    self, "RDSdbProxyTarget",
+                    cluster_identifier=self.RDSdb.cluster_identifier,
+                    engine=aurora_engine,
+                    port=3306,
+                    security_groups=[network.SG_RDSdb],
+                ))
+
+        else:
+            # A parameter group is made for a major version of the engine.
+            mysql_engine = rds.DatabaseInstanceEngine.mysql(version=rds.MysqlEngineVersion.VER_8_0)
+
+            # Parameter group of RDSdb: InnoDB buffer pool and max_connections sized for the instance class, slow query log.
+            self.RDSdbParameterGroup = rds.ParameterGroup(
+                self, "RDSdbParameterGroup",
+                engine=mysql_engine,
+                description=f"RDSdb {config.db_tuning_profile} tuning for db.{config.db_instance_class}",
+                parameters=tuning.parameters(config.db_instance_class),
+            )
+
+            # RDS MySQL instance.
+            self.RDSdb = rds.DatabaseInstance(
+                self, "RDSdb",
+                engine=mysql_engine,
+                instance_type=ec2.InstanceType(config.db_instance_class),
+                vpc=network.vpc,
+                # With Multi-AZ RDS selects the AZ's for the primary and standby itself.
+                availability_zone=None if config.db_multi_az else network.vpc.availability_zones[config.db_availability_zone],
+                multi_az=config.db_multi_az, # If True: RDS will automatically create and manage a standby replica in a different AZ. 
+                publicly_accessible=False,
+                vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_ISOLATED),
+                security_groups=[network.SG_RDSdb],
+                instance_identifier="MyRdsInstance",
+                removal_policy=RemovalPolicy.DESTROY,
+                parameter_group=self.RDSdbParameterGroup,
+                storage_type=rds.StorageType.GP3,
+                allocated_storage=tuning.allocated_storage,
+                # Storage autoscaling grows the volume when it runs low on free space, up to max_allocated_storage.
+                max_allocated_storage=tuning.max_allocated_storage,
+                iops=tuning.iops,
+                storage_throughput=tuning.storage_throughput,
+                enable_performance_insights=tuning.performance_insights,
+                monitoring_interval=Duration.seconds(tuning.monitoring_interval) if tuning.monitoring_interval else None,
+                # MySQL read replicas require automated backups on the source instance.
+                backup_retention=Duration.days(1 if config.db_read_replicas or config.cross_region_read_replicas else 0),
+                delete_automated_backups=True,
+                deletion_protection=False
+            )
+
+            # RDS read replicas, spread over the DatabaseSubnets starting in the AZ after the primary, unless
+            # the AZ's are given with db_replica_azs. The application sends its read traffic to these endpoints.
+            if config.db_read_replicas or replica_source is not None:
+                self.RDSdbReplicaSubnetGroup = rds.SubnetGroup(
+                    self, "RDSdbReplicaSubnetGroup",
+                    description="Subnet group for the RDSdb read replicas",
+                    vpc=network.vpc,
+                    vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_ISOLATED),
+                    removal_policy=RemovalPolicy.DESTROY,
+                )
+
+                # The replicas get the parameters of their own instance class.
+                self.RDSdbReplicaParameterGroup = self.RDSdbParameterGroup
+                if config.db_replica_instance_class != config.db_instance_class:
+                    self.RDSdbReplicaParameterGroup = rds.ParameterGroup(
+                        self, "RDSdbReplicaParameterGroup",
+                        engine=mysql_engine,
+                        description=f"RDSdb replica {config.db_tuning_profile} tuning for db.{config.db_replica_instance_class}",
+                        parameters=tuning.parameters(config.db_replica_instance_class),
+                    )
+
+            for i in range(config.db_read_replicas):
+                if config.db_replica_azs:
+                    az_index = config.db_replica_azs[i % len(config.db_replica_azs)]
+                else:
+                    az_index = (config.db_availability_zone + 1 + i) % len(network.vpc.availability_zones)
+
+                self.RDSdbReplicas.append(rds.DatabaseInstanceReadReplica(
+                    self, f"RDSdbReplica{i + 1}",
+                    source_database_instance=self.RDSdb,
+                    instance_type=ec2.InstanceType(config.db_replica_instance_class),
+                    vpc=network.vpc,
+                    availability_zone=network.vpc.availability_zones[az_index],
+                    publicly_accessible=False,
+                    subnet_group=self.RDSdbReplicaSubnetGroup,
+                    security_groups=[network.SG_RDSReplica],
+                    removal_policy=RemovalPolicy.DESTROY,
+                    parameter_group=self.RDSdbReplicaParameterGroup,
+                    storage_type=rds.StorageType.GP3,
+                    max_allocated_storage=tuning.max_allocated_storage,
+                    iops=tuning.iops,
+                    storage_throughput=tuning.storage_throughput,
+                    enable_performance_insights=tuning.performance_insights,
+                    monitoring_interval=Duration.seconds(tuning.monitoring_interval) if tuning.monitoring_interval else None,
+                    delete_automated_backups=True,
+                    deletion_protection=False,
+                ))
+
+            # Read replica of the RDSdb of the primary region in a multi-region deployment: the application reads the
+            # data of the primary region locally, instead of across regions. Its ARN is built from the instance
+            # identifier, so the stacks don't reference each other across regions.
+            if replica_source is not None:
+                self.RDSdbCrossRegionReplica = rds.DatabaseInstanceReadReplica(
+                    self, "RDSdbCrossRegionReplica",
+                    source_database_instance=replica_source.RDSdb,
+                    instance_type=ec2.InstanceType(config.db_replica_instance_class),
+                    vpc=network.vpc,
+                    publicly_accessible=False,
+                    subnet_group=self.RDSdbReplicaSubnetGroup,
+                    security_groups=[network.SG_RDSReplica],
+                    removal_policy=RemovalPolicy.DESTROY,
+                    parameter_group=self.RDSdbReplicaParameterGroup,
+                    storage_type=rds.StorageType.GP3,
+                    max_allocated_storage=tuning.max_allocated_storage,
+                    iops=tuning.iops,
+                    storage_throughput=tuning.storage_throughput,
+                    enable_performance_insights=tuning.performance_insights,
+                    monitoring_interval=Duration.seconds(tuning.monitoring_interval) if tuning.monitoring_interval else None,
+                    delete_automated_backups=True,
+                    deletion_protection=False,
+                )
+                self.db_global_reader_endpoint = self.RDSdbCrossRegionReplica.db_instance_endpoint_address
+
+            db_writer_endpoint = self.RDSdb.db_instance_endpoint_address
+            db_reader_endpoints = [replica.db_instance_endpoint_address for replica in self.RDSdbReplicas]
+            if config.enable_rds_proxy:
+                # The proxy target with the MySQL port, see RDS Proxy.
+                proxy_target = rds.ProxyTarget.from_instance(rds.DatabaseInstance.from_database_instance_attributes(
+                    self, "RDSdbProxyTarget",
+                    instance_identifier=self.RDSdb.instance_identifier,
+                    instance_endpoint_address=self.RDSdb.db_instance_endpoint_address,
+                    engine=mysql_engine,
+                    port=3306,
+                    security_groups=[network.SG_RDSdb],
+                ))
+
+        # RDS Proxy, pools and shares the database connections of all application instances so the
+        # small max_connections of RDSdb isn't exhausted when the application tier scales out.
+        # The proxy target allows the proxy in on its default port. The target of RDSdb itself has the port of its endpoint,
+        # a data tier attribute, so the network tier would reference the data tier: the imported target has the MySQL port
+        # instead, its rules are the SG_RDSProxy -> SG_RDSdb flow of the network tier.
+        if config.enable_rds_proxy:
+            self.RDSProxy = rds.DatabaseProxy(
+                self, "RDSProxy",
+                proxy_target=proxy_target,
+                secrets=[self.RDSdb.secret], # The Secrets Manager secret generated for the RDSdb admin user.
+                vpc=network.vpc,
+                vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_ISOLATED),
+                security_groups=[network.SG_RDSProxy],
+                max_connections_percent=config.rds_proxy_max_connections_percent,
+                require_tls=True,
+            )
+            db_writer_endpoint = self.RDSProxy.endpoint
+
+            # The imported target doesn't bring the Aurora instances along, they must be available before they are registered.
+            if config.db_engine == "aurora-serverless":
+                target_group = self.RDSProxy.node.find_child("ProxyTargetGroup")
+                for resource in self.RDSdb.node.find_all():
+                    if isinstance(resource, (rds.CfnDBCluster, rds.CfnDBInstance)):
+                        target_group.node.add_dependency(resource)
+
+            # Aurora readers are reached through a read-only proxy endpoint, as the application can't reach SG_RDSdb directly.
+            if config.db_engine == "aurora-serverless" and config.db_read_replicas:
+                self.RDSProxyReaderEndpoint = rds.CfnDBProxyEndpoint(
+                    self, "RDSProxyReaderEndpoint",
+                    db_proxy_endpoint_name="RDSProxyReader",
+                    db_proxy_name=self.RDSProxy.db_proxy_name,
+                    vpc_subnet_ids=network.vpc.select_subnets(subnet_type=ec2.SubnetType.PRIVATE_ISOLATED).subnet_ids,
+                    vpc_security_group_ids=[network.SG_RDSProxy.security_group_id],
+                    target_role="READ_ONLY",
+                )
+                db_reader_endpoints = [self.RDSProxyReaderEndpoint.attr_endpoint]
+
+        # The endpoint the application tier connects to: the proxy when enabled, otherwise RDSdb itself.
+        self.db_endpoint = db_writer_endpoint
+
+        # The endpoints for read traffic: the read replicas, or the writer endpoint when there are none.
+        self.db_reader_endpoints = db_reader_endpoints or [self.db_endpoint]
+
+        CfnOutput(
+            self, "DatabaseEndpoint",
+            value=self.db_endpoint,
+            description="MySQL writer endpoint for the application tier",
+        )
+
+        CfnOutput(
+            self, "DatabaseReaderEndpoints",
+            value=Fn.join(",", self.db_reader_endpoints),
+            description="Comma separated MySQL reader endpoints for the application tier",
+        )
+
+        if self.db_global_reader_endpoint is not None:
+            CfnOutput(
+                self, "DatabaseGlobalReaderEndpoint",
+                value=self.db_global_reader_endpoint,
+                description="MySQL endpoint of the read replica of the primary region's database",
+            )
+
+
+
+        ### ELASTICACHE ###
+
+        # In-memory cache in the DatabaseSubnets, the application serves repeated reads from here instead of RDSdb.
+        if config.enable_cache:
+            self.CacheSubnetGroup = elasticache.CfnSubnetGroup(
+                self, "CacheSubnetGroup",
+                description="Subnet group for the ElastiCache replication group",
+                subnet_ids=network.vpc.select_subnets(subnet_type=ec2.SubnetType.PRIVATE_ISOLATED).subnet_ids,
+            )
+
+            # More than 1 shard needs cluster mode, which spreads the keys over the shards.
+            cache_cluster_mode = config.cache_shards > 1
+            cache_engine_version, cache_parameter_group, cache_cluster_parameter_group = CACHE_ENGINES[config.cache_engine]
+
+            self.Cache = elasticache.CfnReplicationGroup(
+                self, "Cache",
+                replication_group_description="Cache for the application tier",
+                engine=config.cache_engine,
+                engine_version=cache_engine_version,
+                cache_parameter_group_name=cache_cluster_parameter_group if cache_cluster_mode else cache_parameter_group,
+                cache_node_type=config.cache_node_type,
+                cluster_mode="enabled" if cache_cluster_mode else "disabled",
+                num_node_groups=config.cache_shards,
+                replicas_per_node_group=config.cache_replicas,
+                # Failover to a replica in the other AZ needs at least 1 replica per shard.
+                automatic_failover_enabled=config.cache_replicas > 0,
+                multi_az_enabled=config.cache_replicas > 0,
+                port=6379,
+                cache_subnet_group_name=self.CacheSubnetGroup.ref,
+                security_group_ids=[network.SG_Cache.security_group_id],
+                at_rest_encryption_enabled=True,
+                transit_encryption_enabled=True,
+            )
+
+            # In cluster mode the clients discover the shards through the configuration endpoint.
+            if cache_cluster_mode:
+                self.cache_primary_endpoint = self.Cache.attr_configuration_end_point_address
+                self.cache_reader_endpoint = self.Cache.attr_configuration_end_point_address
+            else:
+                self.cache_primary_endpoint = self.Cache.attr_primary_end_point_address
+                self.cache_reader_endpoint = self.Cache.attr_reader_end_point_address
+
+            CfnOutput(
+                self, "CachePrimaryEndpoint",
+                value=self.cache_primary_endpoint,
+                description="Cache primary (or configuration) endpoint for the application tier",
+            )
+
+            CfnOutput(
+                self, "CacheReaderEndpoint",
+                value=self.cache_reader_endpoint,
+                description="Cache reader (or configuration) endpoint for the application tier",
+            )
+
+
+class DataStack(DataTier, Stack):
+    """Data tier stack in the VPC of the network stack."""
+
+    def __init__(self, scope: Construct, construct_id: str, *, network: NetworkTier,
+                 replica_source: Optional[DataTier] = None, **kwargs) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+        self.build_data_tier(StackConfig.from_context(self), network, replica_source)
@@ -0,0 +1,117 @@
+import re
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+# Memory in GiB per instance size of the burstable (db.t*) and general purpose (db.m*) classes, the memory optimized
+# classes (db.r*) have twice as much. E.g. db.t3.micro has 1 GiB and db.m6i.4xlarge 64 GiB.
+SIZE_MEMORY_GIB = {"micro": 1, "small": 2, "medium": 4, "large": 8, "xlarge": 16}
+
+# Instance classes without Performance Insights for RDS MySQL.
+NO_PERFORMANCE_INSIGHTS = {"t2.micro", "t2.small", "t3.micro", "t3.small", "t4g.micro", "t4g.small"}
+
+# Granularities of enhanced monitoring in seconds, 0 disables it.
+MONITORING_INTERVALS = (0, 1, 5, 10, 15, 30, 60)
+
+# Below 400 GiB gp3 storage of RDS MySQL has a fixed baseline of 3000 IOPS and 125 MiB/s.
+GP3_PROVISIONED_MIN_STORAGE = 400
+
+
+def db_instance_memory_gib(instance_class: str) -> int:
+    """Return the memory of a RDS instance class in GiB, e.g. 't3.micro' or 'db.t3.micro' => 1."""
+    family, size = instance_class.removeprefix("db.").split(".")
+    if size in SIZE_MEMORY_GIB:
+        memory = SIZE_MEMORY_GIB[size]
+    else:
+        match = re.fullmatch(r"(\d+)xlarge", size)
+        if match is None:
+            raise ValueError(f"Unknown instance size '{size}' of instance class '{instance_class}'")
+        memory = 16 * int(match.group(1))
+    if family.startswith(("r", "x", "z")):
+        return 2 * memory
+    if family.startswith(("t", "m")):
+        return memory
+    raise ValueError(f"Unknown instance class family '{family}' of instance class '{instance_class}'")
+
+
+@dataclass(frozen=True)
+class DbTuningProfile:
+    """Tuning of the RDS MySQL database: parameter group, storage autoscaling, gp3 performance and monitoring."""
+    buffer_pool_percent: int # Share of the instance memory for the InnoDB buffer pool.
+    connection_memory_mib: int # Memory per connection, max_connections fills the memory next to the buffer pool.
+    long_query_time: float # Seconds, slower queries are written to the slow query log.
+    allocated_storage: int # GiB.
+    max_allocated_storage: int # GiB, storage autoscaling grows the volume up to this size.
+    iops: Optional[int] # gp3 IOPS and throughput (MiB/s), None: the baseline of the storage size.
+    storage_throughput: Optional[int]
+    performance_insights: bool
+    monitoring_interval: int # Seconds between the enhanced monitoring samples, 0 disables it.
+
+    def __post_init__(self):
+        if self.monitoring_interval not in MONITORING_INTERVALS:
+            raise ValueError(f"Unknown monitoring interval {self.monitoring_interval}, expected one of {list(MONITORING_INTERVALS)}")
+        if self.max_allocated_storage < self.allocated_storage:
+            raise ValueError(f"max_allocated_storage {self.max_allocated_storage} is below allocated_storage {self.allocated_storage}")
+        if (self.iops or self.storage_throughput) and self.allocated_storage < GP3_PROVISIONED_MIN_STORAGE:
+            raise ValueError(f"gp3 IOPS and throughput need at least {GP3_PROVISIONED_MIN_STORAGE} GiB of storage,"
+                             f" not {self.allocated_storage} GiB")
+
+    def slow_query_log_parameters(self) -> Dict[str, str]:
+        """Return the MySQL parameters of the slow query log."""
+        return {
+            "slow_query_log": "1",
+            "long_query_time": f"{self.long_query_time:g}",
+            "log_output": "FILE",
+        }
+
+    def parameters(self, instance_class: str) -> Dict[str, str]:
+        """Return the MySQL parameters for 'instance_class', the buffer pool and max_connections follow its memory."""
+        memory_mib = db_instance_memory_gib(instance_class) * 1024
+        # The buffer pool is allocated in chunks of 128 MiB.
+        buffer_pool_mib = memory_mib * self.buffer_pool_percent // 100 // 128 * 128
+        max_connections = (memory_mib - buffer_pool_mib) // self.connection_memory_mib
+        return {
+            "innodb_buffer_pool_size": str(buffer_pool_mib * 1024 * 1024),
+            "max_connections": str(max_connections),
+            **self.slow_query_log_parameters(),
+        }
+
+
+# "development": a small buffer pool that leaves room on 1 GiB instances, 1 minute enhanced monitoring.
+# "production": the buffer pool RDS defaults to, storage autoscaling up to 200 GiB and Performance Insights.
+# "io-optimized": 400 GiB gp3 storage with provisioned IOPS and throughput, for a working set larger than the memory.
+DB_TUNING_PROFILES = {
+    "development": DbTuningProfile(
+        buffer_pool_percent=50,
+        connection_memory_mib=4,
+        long_query_time=2,
+        allocated_storage=20,
+        max_allocated_storage=50,
+        iops=None,
+        storage_throughput=None,
+        performance_insights=False,
+        monitoring_interval=60,
+    ),
+    "production": DbTuningProfile(
+        buffer_pool_percent=75,
+        connection_memory_mib=4,
+        long_query_time=1,
+        allocated_storage=20,
+        max_allocated_storage=200,
+        iops=None,
+        storage_throughput=None,
+        performance_insights=True,
+        monitoring_interval=15,
+    ),
+    "io-optimized": DbTuningProfile(
+        buffer_pool_percent=75,
+        connection_memory_mib=4,
+        long_query_time=0.5,
+        allocated_storage=400,
+        max_allocated_storage=1000,
+        iops=12000,
+        storage_throughput=500,
+        performance_insights=True,
+        monitoring_interval=5,
+    ),
+}
@@ -0,0 +1,197 @@
+from dataclasses import dataclass
+from typing import List, Optional, Union
+
+from aws_cdk import (
+    Duration,
+    Stack,
+    aws_autoscaling as autoscaling,
+    aws_cloudwatch as cloudwatch,
+    aws_cloudwatch_actions as cloudwatch_actions,
+    aws_elasticloadbalancingv2 as elbv2,
+    aws_rds as rds,
+    aws_sns as sns,
+    aws_sns_subscriptions as subscriptions,
+)
+from constructs import Construct
+
+
+PERIOD = Duration.minutes(1)
+
+
+@dataclass(frozen=True)
+class AlarmThresholds:
+    """Alarm thresholds, every field can be set with the context key 'alarm_<field>'."""
+    p99_latency: float = 1.0 # Seconds, ALB TargetResponseTime p99.
+    error_rate_percent: float = 1.0 # 5xx responses (ALB and targets) as a percentage of the requests.
+    min_healthy_hosts: int = 1 # Healthy targets in the target group.
+    rejected_connections: int = 0 # Connections the ALB rejected because it reached its maximum.
+    db_connections: int = 80
+    db_read_latency: float = 0.02 # Seconds.
+    db_write_latency: float = 0.05 # Seconds.
+    db_cpu_credit_balance: float = 20 # Burstable (db.t*) instance classes.
+    db_acu_utilization_percent: float = 90 # Aurora Serverless v2.
+
+
+def is_burstable(instance_type: str) -> bool:
+    """Return True for burstable instance types with CPU credits, e.g. 't3.micro'."""
+    return instance_type.split(".")[0].startswith("t")
+
+
+class PerformanceMonitoring(Construct):
+    """CloudWatch dashboard and alarms for the ALB, target group, application instances and database.
+
+    Every alarm notifies the 'alarm_topic' SNS topic, 'alarm_email' (optional) is subscribed to it.
+    'db_instance_class' is None for an Aurora Serverless v2 cluster, which has no CPU credits but an ACU utilization.
+    With the 'agent_namespace' of the CloudWatch agent the dashboard also shows memory, disk and the Apache workers.
+    """
+
+    def __init__(self, scope: Construct, construct_id: str, *,
+                 load_balancer: elbv2.ApplicationLoadBalancer,
+                 target_group: elbv2.ApplicationTargetGroup,
+                 auto_scaling_group: autoscaling.AutoScalingGroup,
+                 app_instance_type: str,
+                 database: Union[rds.DatabaseInstance, rds.DatabaseCluster],
+                 db_instance_class: Optional[str],
+                 thresholds: AlarmThresholds,
+                 alarm_email: Optional[str] = None,
+                 agent_namespace: Optional[str] = None) -> None:
+        super().__init__(scope, construct_id)
+
+        self.alarm_topic = sns.Topic(self, "AlarmTopic", display_name="Multi-tier architecture performance alarms")
+        if alarm_email:
+            self.alarm_topic.add_subscription(subscriptions.EmailSubscription(alarm_email))
+        self.alarms: List[cloudwatch.Alarm] = []
+
+        alb = load_balancer.metrics
+        tg = target_group.metrics
+
+        ### LOAD BALANCER and TARGET GROUP ###
+
+        latency = {
+            statistic: alb.target_response_time(statistic=statistic, period=PERIOD, label=f"TargetResponseTime {statistic}")
+            for statistic in ("p50", "p90", "p99")
+        }
+        requests = alb.request_count(period=PERIOD)
+        error_rate = cloudwatch.MathExpression(
+            expression="100 * (FILL(elb5xx, 0) + FILL(target5xx, 0)) / requests",
+            using_metrics={
+                "elb5xx": alb.http_code_elb(elbv2.HttpCodeElb.ELB_5XX_COUNT, period=PERIOD),
+                "target5xx": alb.http_code_target(elbv2.HttpCodeTarget.TARGET_5XX_COUNT, period=PERIOD),
+                "requests": requests,
+            },
+            label="5xx rate (%)",
+            period=PERIOD,
+        )
+        # An ALB has no surge queue, it rejects connections (or fails to connect to targets) instead.
+        rejected_connections = alb.rejected_connection_count(period=PERIOD)
+        target_connection_errors = alb.target_connection_error_count(period=PERIOD)
+        healthy_hosts = tg.healthy_host_count(statistic="Minimum", period=PERIOD)
+        unhealthy_hosts = tg.unhealthy_host_count(statistic="Maximum", period=PERIOD)
+
+        self.add_alarm("LatencyP99Alarm", latency["p99"], thresholds.p99_latency,
+                       f"ALB p99 target response time above {thresholds.p99_latency}s")
+        self.add_alarm("ErrorRateAlarm", error_rate, thresholds.error_rate_percent,
+                       f"More than {thresholds.error_rate_percent}% of the requests get a 5xx response")
+        self.add_alarm("RejectedConnectionsAlarm", rejected_connections, thresholds.rejected_connections,
+                       "The ALB rejects connections")
+        self.add_alarm("HealthyHostsAlarm", healthy_hosts, thresholds.min_healthy_hosts,
+                       f"Less than {thresholds.min_healthy_hosts} healthy targets",
+                       comparison_operator=cloudwatch.ComparisonOperator.LESS_THAN_THRESHOLD,
+                       treat_missing_data=cloudwatch.TreatMissingData.BREACHING)
+
+        ### APPLICATION INSTANCES ###
+
+        def instance_metric(metric_name: str, statistic: str = "Average", namespace: str = "AWS/EC2") -> cloudwatch.Metric:
+            return cloudwatch.Metric(
+                namespace=namespace,
+                metric_name=metric_name,
+                dimensions_map={"AutoScalingGroupName": auto_scaling_group.auto_scaling_group_name},
+                statistic=statistic,
+                period=PERIOD,
+            )
+
+        app_cpu = [instance_metric("CPUUtilization")]
+        if is_burstable(app_instance_type):
+            app_cpu.append(instance_metric("CPUCreditBalance", "Minimum"))
+
+        ### DATABASE ###
+
+        db_connections = database.metric_database_connections(statistic="Maximum", period=PERIOD)
+        db_read_latency = database.metric("ReadLatency", statistic="Average", period=PERIOD)
+        db_write_latency = database.metric("WriteLatency", statistic="Average", period=PERIOD)
+        db_capacity = [database.metric_cpu_utilization(period=PERIOD)]
+
+        self.add_alarm("DbConnectionsAlarm", db_connections, thresholds.db_connections,
+                       f"More than {thresholds.db_connections} database connections")
+        self.add_alarm("DbReadLatencyAlarm", db_read_latency, thresholds.db_read_latency,
+                       f"Database read latency above {thresholds.db_read_latency}s")
+        self.add_alarm("DbWriteLatencyAlarm", db_write_latency, thresholds.db_write_latency,
+                       f"Database write latency above {thresholds.db_write_latency}s")
+
+        if db_instance_class is None:
+            acu_utilization = database.metric("ACUUtilization", statistic="Maximum", period=PERIOD)
+            db_capacity.append(acu_utilization)
+            self.add_alarm("DbAcuUtilizationAlarm", acu_utilization, thresholds.db_acu_utilization_percent,
+                           f"Aurora Serverless v2 above {thresholds.db_acu_utilization_percent}% of its maximum ACU's")
+        elif is_burstable(db_instance_class):
+            cpu_credits = database.metric("CPUCreditBalance", statistic="Minimum", period=PERIOD)
+            db_capacity.append(cpu_credits)
+            self.add_alarm("DbCpuCreditsAlarm", cpu_credits, thresholds.db_cpu_credit_balance,
+                           f"Database CPU credit balance below {thresholds.db_cpu_credit_balance}",
+                           comparison_operator=cloudwatch.ComparisonOperator.LESS_THAN_THRESHOLD)
+
+        ### DASHBOARD ###
+
+        def graph(title: str, left: list, right: list = None) -> cloudwatch.GraphWidget:
+            return cloudwatch.GraphWidget(title=title, left=left, right=right or [], width=8, height=6)
+
+        self.dashboard = cloudwatch.Dashboard(
+            self, "Dashboard",
+            dashboard_name=f"{Stack.of(self).stack_name}-performance",
+            default_interval=Duration.hours(3),
+        )
+        self.dashboard.add_widgets(
+            graph("Latency", list(latency.values())),
+            graph("Requests and 5xx rate", [requests], [error_rate]),
+            graph("Connections", [alb.active_connection_count(period=PERIOD)], [rejected_connections, target_connection_errors]),
+        )
+        self.dashboard.add_widgets(
+            graph("Target health", [healthy_hosts, unhealthy_hosts]),
+            graph("Application CPU", app_cpu[:1], app_cpu[1:]),
+            graph("Database connections", [db_connections]),
+        )
+        self.dashboard.add_widgets(
+            graph("Database latency", [db_read_latency, db_write_latency]),
+            graph("Database capacity", db_capacity[:1], db_capacity[1:]),
+            cloudwatch.AlarmStatusWidget(title="Alarms", alarms=self.alarms, width=8, height=6),
+        )
+        if agent_namespace is not None:
+            self.dashboard.add_widgets(
+                graph("Application memory and disk", [
+                    instance_metric("mem_used_percent", "Maximum", agent_namespace),
+                    instance_metric("disk_used_percent", "Maximum", agent_namespace),
+                ]),
+                graph("Apache workers", [
+                    instance_metric("apache_BusyWorkers", "Sum", agent_namespace),
+                    instance_metric("apache_IdleWorkers", "Sum", agent_namespace),
+                ], [instance_metric("apache_ReqPerSec", "Sum", agent_namespace)]),
+                graph("httpd memory", [instance_metric("procstat_memory_rss", "Maximum", agent_namespace)]),
+            )
+
+    def add_alarm(self, construct_id: str, metric: cloudwatch.IMetric, threshold: float, description: str,
+                  comparison_operator: cloudwatch.ComparisonOperator = cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD,
+                  treat_missing_data: cloudwatch.TreatMissingData = cloudwatch.TreatMissingData.NOT_BREACHING) -> cloudwatch.Alarm:
+        """Create an alarm on 'metric' that goes off when 3 of the last 5 minutes breach 'threshold'."""
+        alarm = cloudwatch.Alarm(
+            self, construct_id,
+            metric=metric,
+            threshold=threshold,
+            comparison_operator=comparison_operator,
+            evaluation_periods=5,
+            datapoints_to_alarm=3,
+            treat_missing_data=treat_missing_data,
+            alarm_description=description,
+        )
+        alarm.add_alarm_action(cloudwatch_actions.SnsAction(self.alarm_topic))
+        self.alarms.append(alarm)
+        return alarm
@@ -0,0 +1,132 @@
+from typing import Dict, List, Optional
+
+import aws_cdk as cdk
+from aws_cdk import (
+    Stack,
+    aws_route53 as route53,
+    CfnOutput,
+)
+from constructs import Construct
+from multi_tier_architecture.app_stack import AppStack, AppTier
+from multi_tier_architecture.config import RegionPlacement, StackConfig
+from multi_tier_architecture.data_stack import DataStack
+from multi_tier_architecture.multi_tier_architecture_stack import MultiTierArchitectureStack
+from multi_tier_architecture.network_stack import NetworkStack, default_vpc_cidr
+
+
+# Failed health checks before Route 53 stops routing users to a region.
+REGION_FAILURE_THRESHOLD = 3
+
+
+def region_placements(regions: List[str], az_count: int) -> List[RegionPlacement]:
+    """Return the placement of every region: the first region is the primary region, the n-th region gets the n-th
+    /16 of 10.0.0.0/8 for its VPC, so the first keeps the cidr of a single-region deployment.
+    """
+    return [
+        RegionPlacement(region=region, vpc_cidr=default_vpc_cidr(az_count, block=i), primary=(i == 0))
+        for i, region in enumerate(regions)
+    ]
+
+
+class GlobalStack(Stack):
+    """Route 53 latency records for the regional ALB's: a user resolves 'domain_name' to the healthy region with the
+    lowest latency. Every ALB has a health check on the health check path of its target group.
+
+    The ALB's are referenced across regions, so this stack and the application stacks need cross_region_references.
+    """
+
+    def __init__(self, scope: Construct, construct_id: str, *, regional_tiers: Dict[str, AppTier], **kwargs) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+        config = StackConfig.from_context(self)
+
+        if config.hosted_zone_id:
+            hosted_zone_id = config.hosted_zone_id
+        else:
+            # A new zone only answers once its name servers are delegated to from the parent domain.
+            self.HostedZone = route53.PublicHostedZone(self, "HostedZone", zone_name=config.domain_name)
+            hosted_zone_id = self.HostedZone.hosted_zone_id
+            CfnOutput(
+                self, "NameServers",
+                value=cdk.Fn.join(",", self.HostedZone.hosted_zone_name_servers),
+                description=f"Name servers of the {config.domain_name} hosted zone, to delegate to",
+            )
+
+        self.HealthChecks = {}
+        self.LatencyRecords = {}
+        for region, tier in regional_tiers.items():
+            self.HealthChecks[region] = route53.CfnHealthCheck(
+                self, f"HealthCheck-{region}",
+                health_check_config=route53.CfnHealthCheck.HealthCheckConfigProperty(
+                    type="HTTP",
+                    fully_qualified_domain_name=tier.alb.load_balancer_dns_name,
+                    port=80,
+                    resource_path=config.onboarding["health_check_path"],
+                    request_interval=config.region_health_check_interval,
+                    failure_threshold=REGION_FAILURE_THRESHOLD,
+                ),
+                health_check_tags=[route53.CfnHealthCheck.HealthCheckTagProperty(key="Name", value=f"ALB {region}")],
+            )
+
+            # Alias record per region, Route 53 answers with the record of the region closest to the user (in latency)
+            # whose health check passes.
+            self.LatencyRecords[region] = route53.CfnRecordSet(
+                self, f"LatencyRecord-{region}",
+                hosted_zone_id=hosted_zone_id,
+                name=config.domain_name,
+                type="A",
+                set_identifier=region,
+                region=region,
+                health_check_id=self.HealthChecks[region].attr_health_check_id,
+                alias_target=route53.CfnRecordSet.AliasTargetProperty(
+                    dns_name=tier.alb.load_balancer_dns_name,
+                    hosted_zone_id=tier.alb.load_balancer_canonical_hosted_zone_id,
+                    evaluate_target_health=True,
+                ),
+            )
+
+        CfnOutput(
+            self, "GlobalEndpoint",
+            value=f"http://{config.domain_name}",
+            description="Latency routed endpoint of the regional ALB's",
+        )
+
+
+def add_regional_stacks(scope: cdk.App, config: StackConfig, account: Optional[str] = None,
+                        single_stack: bool = False) -> GlobalStack:
+    """Add a copy of the tiers to 'scope' for every region in config.regions, and the global stack with the latency
+    records in the primary region. The stack names end with the region, e.g. MultiTierArchitectureApp-eu-west-1.
+    """
+    regional_tiers = {}
+    primary_network = primary_data = None
+    for placement in region_placements(config.regions, config.az_count):
+        env = cdk.Environment(account=account, region=placement.region)
+        # The cross-region read replica follows the RDSdb of the primary region.
+        replica_source = primary_data if config.cross_region_read_replicas and not placement.primary else None
+
+        if single_stack:
+            network = data = application = MultiTierArchitectureStack(
+                scope, f"MultiTierArchitectureStack-{placement.region}",
+                placement=placement, replica_source=replica_source, env=env, cross_region_references=True,
+            )
+        else:
+            network = NetworkStack(scope, f"MultiTierArchitectureNetwork-{placement.region}", placement=placement, env=env)
+            data = DataStack(scope, f"MultiTierArchitectureData-{placement.region}",
+                             network=network, replica_source=replica_source, env=env)
+            application = AppStack(scope, f"MultiTierArchitectureApp-{placement.region}",
+                                   network=network, data=data, env=env, cross_region_references=True)
+
+        if placement.primary:
+            primary_network, primary_data = network, data
+        else:
+            # The AdminGroup and the source of the read replica are created in the primary region first.
+            network.add_dependency(primary_network)
+            if replica_source is not None:
+                data.add_dependency(primary_data)
+        regional_tiers[placement.region] = application
+
+    return GlobalStack(
+        scope, "MultiTierArchitectureGlobal",
+        regional_tiers=regional_tiers,
+        env=cdk.Environment(account=account, region=config.regions[0]),
+        cross_region_references=True,
+    )
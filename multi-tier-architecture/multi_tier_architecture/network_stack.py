@@ -0,0 +1,460 @@
+from aws_cdk import (
+    Stack,
+    aws_iam as iam,
+    aws_ec2 as ec2,
+    custom_resources as cr,
+    CfnTag,
+)
+from constructs import Construct
+from multi_tier_architecture.config import GATEWAY_ENDPOINTS, INTERFACE_ENDPOINTS, RegionPlacement, StackConfig, context_value
+from multi_tier_architecture.connectivity import Flow, apply_connectivity
+from typing import Optional
+import math
+import uuid
+
+
+def vpc_prefix_length(subnet_configuration: list, az_count: int) -> int:
+    """Return the prefix length of the smallest VPC cidr that fits every subnet in every AZ, but no smaller than a /20.
+
+    The subnets are allocated in the same order as the Vpc construct does: per subnet configuration, for each AZ,
+    every subnet aligned to its own size.
+    """
+    offset = 0
+    for subnet in subnet_configuration:
+        size = 2 ** (32 - subnet.cidr_mask)
+        for _ in range(az_count):
+            offset = math.ceil(offset / size) * size + size
+    return min(20, 32 - math.ceil(math.log2(offset)))
+
+
+def subnet_configuration() -> list:
+    """Return the subnets of every AZ."""
+    # Creating 3 subnets in each AZ as layers of defense to secure sensitive data, plus reserving 
+    # an extra private subnet for future changes of the network architecture.
+    return [
+        ec2.SubnetConfiguration(cidr_mask=25, name="Ingress", subnet_type=ec2.SubnetType.PUBLIC),
+        ec2.SubnetConfiguration(cidr_mask=23, name="Application", subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
+        ec2.SubnetConfiguration(cidr_mask=24, name="Database", subnet_type=ec2.SubnetType.PRIVATE_ISOLATED),
+        ec2.SubnetConfiguration(cidr_mask=23, name="reserved", subnet_type=ec2.SubnetType.PRIVATE_ISOLATED, reserved=True),
+    ]
+
+
+def default_vpc_cidr(az_count: int, block: int = 0) -> str:
+    """Return the VPC cidr at the start of the 'block'-th /16 of 10.0.0.0/8, sized for 'az_count' AZ's.
+
+    Block 0 is the cidr of a single-region deployment, the other regions of a multi-region deployment get the next
+    blocks, so their VPC's don't overlap.
+    """
+    if not 0 <= block < 256:
+        raise ValueError(f"VPC cidr block {block} is outside 10.0.0.0/8, expected 0 to 255")
+    return f"10.{block}.0.0/{vpc_prefix_length(subnet_configuration(), az_count)}"
+
+
+def managed_prefix_list_id(scope: Construct, construct_id: str, prefix_list_name: str) -> str:
+    """Look up the id of an AWS-managed prefix list at deploy time, the ids differ per region.
+
+    e.g. "com.amazonaws.global.cloudfront.origin-facing" or "com.amazonaws.<region>.s3".
+    """
+    lookup = cr.AwsCustomResource(
+        scope, construct_id,
+        on_update=cr.AwsSdkCall(
+            service="EC2",
+            action="describeManagedPrefixLists",
+            parameters={
+                "Filters": [{"Name": "prefix-list-name", "Values": [prefix_list_name]}],
+            },
+            physical_resource_id=cr.PhysicalResourceId.of(construct_id),
+            output_paths=["PrefixLists.0.PrefixListId"],
+        ),
+        policy=cr.AwsCustomResourcePolicy.from_sdk_calls(resources=cr.AwsCustomResourcePolicy.ANY_RESOURCE),
+    )
+    return lookup.get_response_field("PrefixLists.0.PrefixListId")
+
+
+class NetworkTier:
+    """The network tier of a Stack: VPC, security groups and their rules, VPC endpoints and the EIC Endpoint.
+
+    The security groups of every tier live here, so all the rules between them stay in one template without
+    cross-stack references between the security groups.
+    """
+
+    def build_network_tier(self, config: StackConfig, placement: Optional[RegionPlacement] = None) -> None:
+        # A /20 cidr gives 4096 ip addresses to work with, which fits 2 AZ's. More AZ's get a larger cidr.
+        # In a multi-region deployment every region has its own cidr.
+        vpc_cidr = placement.vpc_cidr if placement else context_value(self, "vpc_cidr", default_vpc_cidr(config.az_count))
+
+        self.vpc = ec2.Vpc(
+            self, "VPC",
+            ip_addresses=ec2.IpAddresses.cidr(vpc_cidr),
+            create_internet_gateway=True,
+            enable_dns_hostnames=True,
+            enable_dns_support=True,
+            max_azs=config.az_count,
+            nat_gateways=config.nat_gateways,
+            subnet_configuration=subnet_configuration(),
+        )
+
+        
+        ### SECURITY GROUPS ###
+
+        # Security Group for the application tier, shared by every instance in the Auto Scaling Group.
+        self.SG_App = ec2.SecurityGroup(
+            self, "SG_App",
+            vpc=self.vpc,
+            allow_all_outbound=False,
+            description="Security Group for the application tier",
+            security_group_name="SG_App",
+        )
+
+        # Security Group for the worker tier, the instances that process the work queue.
+        if config.enable_worker_tier:
+            self.SG_Worker = ec2.SecurityGroup(
+                self, "SG_Worker",
+                vpc=self.vpc,
+                allow_all_outbound=False,
+                description="Security Group for the worker tier",
+                security_group_name="SG_Worker",
+            )
+
+        # Security Group for Application Load Balancer.
+        self.SG_ALB = ec2.SecurityGroup(
+            self, "SG_ALB",
+            vpc=self.vpc,
+            allow_all_outbound=False,
+            description="Security Group for ALB",
+            security_group_name="SG_ALB",
+        )
+
+        # Security Group for RDS database.
+        self.SG_RDSdb = ec2.SecurityGroup(
+            self, "SG_RDSdb",
+            vpc=self.vpc,
+            allow_all_outbound=False,
+            description="Security Group for RDSdb",
+            security_group_name="SG_RDSdb",
+        )
+
+        # Security Group for RDS Proxy.
+        if config.enable_rds_proxy:
+            self.SG_RDSProxy = ec2.SecurityGroup(
+                self, "SG_RDSProxy",
+                vpc=self.vpc,
+                allow_all_outbound=False,
+                description="Security Group for RDSProxy",
+                security_group_name="SG_RDSProxy",
+            )
+
+        # Security Group for the RDS read replicas, the application tier reaches them directly for read traffic.
+        # Outside the primary region the cross-region read replica of the primary RDSdb has it too.
+        cross_region_replica = config.cross_region_read_replicas and placement is not None and not placement.primary
+        has_replicas = (config.db_read_replicas or cross_region_replica) and config.db_engine == "mysql"
+        if has_replicas:
+            self.SG_RDSReplica = ec2.SecurityGroup(
+                self, "SG_RDSReplica",
+                vpc=self.vpc,
+                allow_all_outbound=False,
+                description="Security Group for the RDSdb read replicas",
+                security_group_name="SG_RDSReplica",
+            )
+
+        # Security Group for the ElastiCache replication group.
+        if config.enable_cache:
+            self.SG_Cache = ec2.SecurityGroup(
+                self, "SG_Cache",
+                vpc=self.vpc,
+                allow_all_outbound=False,
+                description="Security Group for the ElastiCache replication group",
+                security_group_name="SG_Cache",
+            )
+
+        # Security Group for the EC2 Image Builder build and test instances.
+        if config.enable_golden_ami:
+            self.SG_ImageBuilder = ec2.SecurityGroup(
+                self, "SG_ImageBuilder",
+                vpc=self.vpc,
+                allow_all_outbound=False,
+                description="Security Group for the EC2 Image Builder instances",
+                security_group_name="SG_ImageBuilder",
+            )
+
+        # Security Group for the interface VPC endpoints.
+        if config.vpc_interface_endpoints:
+            self.SG_VpcEndpoints = ec2.SecurityGroup(
+                self, "SG_VpcEndpoints",
+                vpc=self.vpc,
+                allow_all_outbound=False,
+                description="Security Group for the interface VPC endpoints",
+                security_group_name="SG_VpcEndpoints",
+            )
+
+        # Security Group for EIC_Endpoint.
+        self.SG_EIC_Endpoint = ec2.SecurityGroup(
+            self, "SG_EIC_Endpoint",
+            vpc=self.vpc,
+            allow_all_outbound=False,
+            description="Security Group for EIC_Endpoint",
+            security_group_name="SG_EIC_Endpoint",
+        )
+
+
+
+        ### VPC ENDPOINTS ###
+
+        # Prefix list ids of the gateway endpoints, completed with deploy time lookups below.
+        gateway_prefix_list_ids = dict(config.gateway_prefix_list_ids)
+
+        # Gateway endpoints add a route to the prefix list of the service in the route table of every ApplicationSubnet.
+        self.GatewayEndpoints = {}
+        for endpoint in config.vpc_gateway_endpoints:
+            self.GatewayEndpoints[endpoint] = self.vpc.add_gateway_endpoint(
+                f"{endpoint.replace('.', ' ').title().replace(' ', '')}Endpoint",
+                service=GATEWAY_ENDPOINTS[endpoint],
+                subnets=[ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS)],
+            )
+            # The prefix list id is only needed for the egress rules without internet egress.
+            if gateway_prefix_list_ids[endpoint] is None and not config.app_internet_egress:
+                gateway_prefix_list_ids[endpoint] = managed_prefix_list_id(
+                    self, f"{endpoint.title()}PrefixList", f"com.amazonaws.{self.region}.{endpoint}")
+
+        # Interface endpoints get a network interface in every ApplicationSubnet, with private DNS the SDK's use them
+        # without configuration.
+        self.InterfaceEndpoints = {}
+        for endpoint in config.vpc_interface_endpoints:
+            self.InterfaceEndpoints[endpoint] = self.vpc.add_interface_endpoint(
+                f"{endpoint.replace('.', ' ').title().replace(' ', '')}Endpoint",
+                service=INTERFACE_ENDPOINTS[endpoint],
+                subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
+                security_groups=[self.SG_VpcEndpoints],
+                private_dns_enabled=True,
+                # The ingress rules are part of the connectivity matrix, see SG rules.
+                open=False,
+            )
+
+
+        ### SECURITY GROUP RULES ###
+
+        # Look up the id of the CloudFront origin-facing prefix list at deploy time, the id differs per region.
+        cloudfront_prefix_list_id = config.cloudfront_prefix_list_id
+        if config.enable_cloudfront and cloudfront_prefix_list_id is None:
+            cloudfront_prefix_list_id = managed_prefix_list_id(
+                self, "CloudFrontPrefixList", "com.amazonaws.global.cloudfront.origin-facing")
+
+        # The security groups of the tiers, by tier name (see apply_connectivity).
+        security_groups = {
+            "ALB": self.SG_ALB,
+            "App": self.SG_App,
+        }
+        if config.enable_worker_tier:
+            security_groups["Worker"] = self.SG_Worker
+        security_groups["EIC_Endpoint"] = self.SG_EIC_Endpoint
+        if config.vpc_interface_endpoints:
+            security_groups["VpcEndpoints"] = self.SG_VpcEndpoints
+        if config.enable_rds_proxy:
+            security_groups["RDSProxy"] = self.SG_RDSProxy
+        security_groups["RDSdb"] = self.SG_RDSdb
+        if has_replicas:
+            security_groups["RDSReplica"] = self.SG_RDSReplica
+        if config.enable_cache:
+            security_groups["Cache"] = self.SG_Cache
+        if config.enable_golden_ami:
+            security_groups["ImageBuilder"] = self.SG_ImageBuilder
+
+        internet = ec2.Peer.ipv4("0.0.0.0/0")
+
+        # With RDS Proxy enabled the application tier only talks MySQL to the proxy and only the proxy can reach RDSdb.
+        app_db = "RDSProxy" if config.enable_rds_proxy else "RDSdb"
+
+        # Connectivity matrix: which tier may open a connection to which tier, on which port.
+        # Every flow becomes an egress rule on the source and an ingress rule on the destination.
+        flows = [
+            # Application Load Balancer: HTTP from the internet, or only from CloudFront when it's enabled.
+            Flow(ec2.Peer.prefix_list(cloudfront_prefix_list_id) if config.enable_cloudfront else internet, "ALB", 80,
+                 "Allow inbound HTTP traffic from CloudFront." if config.enable_cloudfront else "Allow inbound HTTP traffic from Internet."),
+            Flow("ALB", "App", 80, "Allow HTTP traffic from SG_ALB to the application tier"),
+
+            # Application tier: MySQL to RDSdb (or RDSProxy).
+            Flow("App", app_db, 3306, f"Allow MySQL traffic from SG_App to SG_{app_db}"),
+            Flow(app_db, "App", 3306, f"Allow MySQL traffic from SG_{app_db} to SG_App"),
+
+            # EIC Endpoint: AWS API calls and SSH to the application tier.
+            Flow(internet, "EIC_Endpoint", 443, "Allow inbound HTTPS traffic for AWS API calls"),
+            Flow("EIC_Endpoint", internet, 443, "Allow outbound HTTPS traffic for AWS API calls"),
+            Flow("EIC_Endpoint", "App", 22, "Allow SSH traffic from EIC_Endpoint to SG_App"),
+            Flow("App", "EIC_Endpoint", 22, "Allow SSH traffic from SG_App to EIC_Endpoint"),
+        ]
+
+        # Worker tier: MySQL to RDSdb (or RDSProxy) like the application tier, and SSH from the EIC Endpoint.
+        if config.enable_worker_tier:
+            flows += [
+                Flow("Worker", app_db, 3306, f"Allow MySQL traffic from SG_Worker to SG_{app_db}"),
+                Flow(app_db, "Worker", 3306, f"Allow MySQL traffic from SG_{app_db} to SG_Worker"),
+                Flow("EIC_Endpoint", "Worker", 22, "Allow SSH traffic from EIC_Endpoint to SG_Worker"),
+                Flow("Worker", "EIC_Endpoint", 22, "Allow SSH traffic from SG_Worker to EIC_Endpoint"),
+            ]
+
+        # Application and worker tiers: internet access through the NAT gateways, or only AWS services (e.g. SQS)
+        # through the VPC endpoints.
+        for tier in ("App", "Worker") if config.enable_worker_tier else ("App",):
+            if config.app_internet_egress:
+                flows.append(Flow(tier, internet, 80, "Allow outbound HTTP traffic to NatGateway"))
+                flows.append(Flow(tier, internet, 443, "Allow outbound HTTPS traffic to NatGateway"))
+            else:
+                for endpoint, prefix_list_id in gateway_prefix_list_ids.items():
+                    flows.append(Flow(tier, ec2.Peer.prefix_list(prefix_list_id), 443,
+                                      f"Allow outbound HTTPS traffic to the {endpoint} gateway endpoint"))
+
+            if config.vpc_interface_endpoints:
+                flows.append(Flow(tier, "VpcEndpoints", 443, f"Allow HTTPS traffic from SG_{tier} to the interface VPC endpoints"))
+
+        if config.enable_rds_proxy:
+            flows.append(Flow("RDSProxy", "RDSdb", 3306, "Allow MySQL traffic from SG_RDSProxy to SG_RDSdb"))
+            flows.append(Flow("RDSdb", "RDSProxy", 3306, "Allow MySQL traffic from SG_RDSdb to SG_RDSProxy"))
+
+        if has_replicas:
+            flows.append(Flow("App", "RDSReplica", 3306, "Allow MySQL traffic from SG_App to SG_RDSReplica"))
+            # The workers get the replica endpoints too (DB_READER_ENDPOINTS).
+            if config.enable_worker_tier:
+                flows.append(Flow("Worker", "RDSReplica", 3306, "Allow MySQL traffic from SG_Worker to SG_RDSReplica"))
+                flows.append(Flow("RDSReplica", "Worker", 3306, "Allow MySQL traffic from SG_RDSReplica to SG_Worker"))
+
+        if config.enable_cache:
+            flows.append(Flow("App", "Cache", 6379, "Allow cache traffic from SG_App to SG_Cache"))
+
+        if config.enable_golden_ami:
+            # Package mirrors and the Image Builder and SSM API's, through the NAT gateways.
+            flows.append(Flow("ImageBuilder", internet, 80, "Allow outbound HTTP traffic to NatGateway"))
+            flows.append(Flow("ImageBuilder", internet, 443, "Allow outbound HTTPS traffic to NatGateway"))
+
+        apply_connectivity(security_groups, flows)
+
+
+
+        ### EIC_ENDPOINT and IAM POLICY ###
+
+        # EC2 Instance Connect Endpoint.
+        self.EIC_Endpoint = ec2.CfnInstanceConnectEndpoint(
+            self, "ec2InstanceConnectEndpoint",
+            # Client_token prevents duplicates when retrying stack creation or modification of the EIC Endpoint itself.
+            # Derived from the stack, so a deployment of another tier doesn't see a changed network template.
+            client_token=str(uuid.uuid5(uuid.NAMESPACE_OID, self.node.addr)), 
+            preserve_client_ip=True, 
+            subnet_id=self.vpc.select_subnets(
+                availability_zones=[self.vpc.availability_zones[0]],
+                subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS).subnets[0].subnet_id,
+            security_group_ids=[self.SG_EIC_Endpoint.security_group_id],
+            tags=[CfnTag(key="Name", value="EIC_Endpoint")],
+        )
+
+
+        # Create the Enpoint IAM policy and an AdminGroup to attach the IAM policy to.
+        # Any work force users would be added to the AdminGroup manually in the console.
+        
+        # Set variable eic_subnet_id to indicate specific subnet in: PolicyStatement => resources config.
+        eic_subnet_id = self.vpc.select_subnets(
+                availability_zones=[self.vpc.availability_zones[0]],
+                subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS).subnets[0].subnet_id
+
+        # Identity-based IAM policy to create, describe and delete EIC Endpoint.
+        self.EIC_Endpoint_Policy = iam.Policy(
+            self, "EICEndpointPolicy",
+            statements=[
+                iam.PolicyStatement(
+                    sid="EICEndpointPolicy",
+                    effect=iam.Effect.ALLOW,
+                    actions=[
+                        "ec2:CreateInstanceConnectEndpoint",
+                        "ec2:CreateNetworkInterface",
+                        "ec2:CreateTags",
+                        "ec2:DescribeInstanceConnectEndpoints",
+                        "ec2:DeleteInstanceConnectEndpoint",
+                        "iam:CreateServiceLinkedRole",
+                    ],
+                    # .region and .account are properties of the Stack instance that gives you 
+                    # the AWS region and account ID where the stack will be deployed.
+                    resources=[f"arn:aws:ec2:{self.region}:{self.account}:{eic_subnet_id}"],
+                ),
+                iam.PolicyStatement(
+                    sid="CreateNetworkInterface",
+                    effect=iam.Effect.ALLOW,
+                    actions=[
+                        "ec2:CreateNetworkInterface"
+                    ],
+                    resources=[f"arn:aws:ec2:{self.region}:{self.account}:security-group/*"]
+                ),
+                iam.PolicyStatement(
+                    sid="DescribeInstanceConnectEndpoints",
+                    effect=iam.Effect.ALLOW,
+                    actions=[
+                        "ec2:DescribeInstanceConnectEndpoints"
+                    ],
+                    resources=["*"]
+                )
+            ]   
+        )       
+
+        # Adding additional permissions to use EC2 Instance Connect Endpoint to connect to instances.
+        self.EIC_Endpoint_Policy.add_statements(
+            iam.PolicyStatement(
+                sid="EC2InstanceConnect",
+                actions=["ec2-instance-connect:openTunnel"],
+                effect=iam.Effect.ALLOW,
+                resources=[f"arn:aws:ec2:{self.region}:{self.account}:instance-connect-endpoint/{self.EIC_Endpoint.attr_id}"],
+                conditions={
+                    "NumericEquals": {
+                        "ec2-instance-connect:remotePort": 22,
+                    },
+                    "IpAddress": {
+                        # CIDR ranges of the ApplicationSubnets.
+                        "ec2-instance-connect:privateIpAddress": [
+                            subnet.ipv4_cidr_block
+                            for subnet in self.vpc.select_subnets(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS).subnets
+                        ],
+                    },
+                    "NumericLessThanEquals": {
+                        "ec2-instance-connect:maxTunnelDuration": 3600,
+                    }
+                }
+            ),
+            iam.PolicyStatement(
+                sid="SSHPublicKey",
+                actions=["ec2-instance-connect:SendSSHPublicKey"],
+                effect=iam.Effect.ALLOW,
+                resources=["*"],
+                conditions={
+                    "StringEquals": {
+                        "ec2:osuser": "ec2-user"
+                    },
+                },
+            ),
+            iam.PolicyStatement(
+                sid="Describe",
+                actions=[
+                    "ec2:DescribeInstances",
+                    "ec2:DescribeInstanceConnectEndpoint",
+                ],
+                effect=iam.Effect.ALLOW,
+                resources=["*"],
+            )
+        )
+
+
+        # Create an IAM Group of Users. IAM is global: the other regions of a multi-region deployment add their
+        # Endpoint policy to the group of the primary region.
+        if placement is None or placement.primary:
+            self.AdminGroup = iam.Group(
+                self, "AdminGroup",
+                group_name="AdminGroup",
+            )
+        else:
+            self.AdminGroup = iam.Group.from_group_name(self, "AdminGroup", "AdminGroup")
+
+        # Attach Endpoint policy to AdminGroup.
+        self.EIC_Endpoint_Policy.attach_to_group(self.AdminGroup)
+
+
+class NetworkStack(NetworkTier, Stack):
+    """Network tier stack, deployed first: the data and application stacks are placed in its VPC."""
+
+    def __init__(self, scope: Construct, construct_id: str, *, placement: Optional[RegionPlacement] = None, **kwargs) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+        self.build_network_tier(StackConfig.from_context(self), placement)
@@ -0,0 +1,154 @@
+from typing import Dict, List, Optional
+
+import jsii
+from aws_cdk import (
+    Annotations,
+    IAspect,
+    Stack,
+    aws_ec2 as ec2,
+    aws_elasticloadbalancingv2 as elbv2,
+    aws_rds as rds,
+)
+from constructs import Construct, IConstruct
+from multi_tier_architecture.config import context_list, context_value
+
+
+# Rules of the performance lint: rule id => default severity.
+RULES = {
+    # Burstable instances with standard CPU credits are throttled to their baseline once the credits run out.
+    "burstable-standard-credits": "warning",
+    # A single-AZ burstable database is throttled like a burstable instance, and unavailable during maintenance.
+    "single-az-burstable-database": "warning",
+    # Without storage autoscaling the database stops accepting writes when the volume is full.
+    "no-storage-autoscaling": "warning",
+    # Round robin keeps sending requests to a target that is slow, least outstanding requests doesn't.
+    "round-robin-balancing": "warning",
+    # A new instance only takes traffic after interval x healthy threshold seconds, too late for a spike.
+    "slow-health-check": "warning",
+    # Without gateway endpoints all S3 and DynamoDB traffic passes the NAT gateways, charged per GB and limited in bandwidth.
+    "nat-without-vpc-endpoints": "warning",
+}
+
+SEVERITIES = ("error", "warning", "info", "off")
+
+# Maximum seconds before a new target is healthy: health check interval x healthy threshold.
+MAX_ONBOARDING_SECONDS = 30
+
+
+@jsii.implements(IAspect)
+class PerformanceLint:
+    """CDK Aspect that reports settings capping the throughput of the stacks, at synth time.
+
+    Every finding is an annotation on the construct: a warning by default, the severity per rule can be set to "error"
+    (fails cdk synth), "warning", "info" or "off". A suppression is a rule id, or "<rule id>:<construct path>" to
+    suppress the rule for a construct and its children only, e.g. "round-robin-balancing:MultiTierArchitectureApp/TargetGroup".
+    """
+
+    def __init__(self, severities: Optional[Dict[str, str]] = None, suppressions: Optional[List[str]] = None) -> None:
+        self.severities = dict(RULES)
+        for rule, severity in (severities or {}).items():
+            if rule not in RULES:
+                raise ValueError(f"Unknown performance lint rule '{rule}', expected one of {sorted(RULES)}")
+            if severity not in SEVERITIES:
+                raise ValueError(f"Unknown severity '{severity}' for rule '{rule}', expected one of {list(SEVERITIES)}")
+            self.severities[rule] = severity
+        self.suppressions = list(suppressions or [])
+        for suppression in self.suppressions:
+            if suppression.split(":", 1)[0] not in RULES:
+                raise ValueError(f"Unknown performance lint rule in suppression '{suppression}', expected one of {sorted(RULES)}")
+
+    @classmethod
+    def from_context(cls, scope: Construct) -> "PerformanceLint":
+        """Read the severities and suppressions from the context keys 'performance_lint_severity' (e.g.
+        "round-robin-balancing=error,slow-health-check=off") and 'performance_lint_suppressions'.
+        """
+        severities = context_value(scope, "performance_lint_severity", {})
+        if isinstance(severities, str):
+            severities = dict(item.strip().split("=", 1) for item in severities.split(",") if item.strip())
+        return cls(severities, context_list(scope, "performance_lint_suppressions"))
+
+    def visit(self, node: IConstruct) -> None:
+        if isinstance(node, Stack):
+            self.check_vpc_endpoints(node)
+        elif isinstance(node, ec2.CfnLaunchTemplate):
+            self.check_launch_template(node)
+        elif isinstance(node, rds.CfnDBInstance):
+            self.check_database(node)
+        elif isinstance(node, elbv2.CfnTargetGroup):
+            self.check_target_group(node)
+
+    def report(self, node: IConstruct, rule: str, message: str) -> None:
+        """Annotate 'node' with a finding of 'rule', unless the rule is off or suppressed for it."""
+        severity = self.severities[rule]
+        if severity == "off":
+            return
+        for suppression in self.suppressions:
+            suppressed_rule, _, path = suppression.partition(":")
+            if suppressed_rule == rule and (not path or node.node.path == path or node.node.path.startswith(path + "/")):
+                return
+
+        message = f"[performance-lint:{rule}] {message}"
+        if severity == "error":
+            Annotations.of(node).add_error(message)
+        elif severity == "warning":
+            # The id allows acknowledging the warning with Annotations.of(scope).acknowledge_warning().
+            Annotations.of(node).add_warning_v2(f"performance-lint:{rule}", message)
+        else:
+            Annotations.of(node).add_info(message)
+
+    def check_launch_template(self, node: ec2.CfnLaunchTemplate) -> None:
+        data = Stack.of(node).resolve(node.launch_template_data) or {}
+        instance_type = data.get("instanceType")
+        if not isinstance(instance_type, str) or not instance_type.startswith("t"):
+            return
+        # T2 instances default to standard CPU credits, the later generations to unlimited.
+        cpu_credits = data.get("creditSpecification", {}).get("cpuCredits", "standard" if instance_type.startswith("t2.") else "unlimited")
+        if cpu_credits == "standard":
+            self.report(node, "burstable-standard-credits",
+                        f"{instance_type} with standard CPU credits is throttled to its baseline under sustained load,"
+                        " use unlimited credits or a non-burstable instance type.")
+
+    def check_database(self, node: rds.CfnDBInstance) -> None:
+        stack = Stack.of(node)
+        # Read replicas follow their source, Aurora instances share the storage of their cluster.
+        if node.source_db_instance_identifier is not None or node.db_cluster_identifier is not None:
+            return
+
+        instance_class = stack.resolve(node.db_instance_class)
+        if isinstance(instance_class, str) and instance_class.startswith("db.t") and not stack.resolve(node.multi_az):
+            self.report(node, "single-az-burstable-database",
+                        f"{instance_class} runs in a single AZ on burst credits, use a larger class or Multi-AZ.")
+
+        allocated_storage = stack.resolve(node.allocated_storage)
+        max_allocated_storage = stack.resolve(node.max_allocated_storage)
+        if max_allocated_storage is None or (allocated_storage is not None and int(max_allocated_storage) <= int(allocated_storage)):
+            self.report(node, "no-storage-autoscaling",
+                        "max_allocated_storage doesn't exceed allocated_storage, storage autoscaling is off.")
+
+    def check_target_group(self, node: elbv2.CfnTargetGroup) -> None:
+        stack = Stack.of(node)
+        attributes = {attribute["key"]: attribute["value"] for attribute in stack.resolve(node.target_group_attributes) or []}
+        algorithm = attributes.get("load_balancing.algorithm.type", "round_robin")
+        if algorithm == "round_robin":
+            self.report(node, "round-robin-balancing",
+                        "round robin load balancing keeps sending requests to slow targets, use least outstanding requests.")
+
+        # The defaults of an ALB target group.
+        interval = stack.resolve(node.health_check_interval_seconds) or 30
+        healthy_threshold = stack.resolve(node.healthy_threshold_count) or 5
+        if interval * healthy_threshold > MAX_ONBOARDING_SECONDS:
+            self.report(node, "slow-health-check",
+                        f"a new target takes {interval * healthy_threshold}s ({healthy_threshold} checks of {interval}s) to"
+                        f" become healthy, more than {MAX_ONBOARDING_SECONDS}s.")
+
+    def check_vpc_endpoints(self, stack: Stack) -> None:
+        constructs = stack.node.find_all()
+        if not any(isinstance(construct, ec2.CfnNatGateway) for construct in constructs):
+            return
+        gateway_endpoints = [
+            construct for construct in constructs
+            if isinstance(construct, ec2.CfnVPCEndpoint) and stack.resolve(construct.vpc_endpoint_type) == "Gateway"
+        ]
+        if not gateway_endpoints:
+            self.report(stack, "nat-without-vpc-endpoints",
+                        "the stack has NAT gateways but no gateway VPC endpoints, S3 and DynamoDB traffic passes the NAT gateways.")
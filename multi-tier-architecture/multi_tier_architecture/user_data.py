@@ -0,0 +1,376 @@
+import json
+import re
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+# Apache MPM's: event and worker serve requests with threads, prefork with a process per request.
+MPMS = ("event", "worker", "prefork")
+
+# vCPU's per instance size, e.g. m5.large has 2 vCPU's and m5.4xlarge has 16.
+# Burstable t2 instances up to small and the medium size of the other families (e.g. m6g.medium) have a single vCPU.
+SIZE_VCPUS = {"nano": 2, "micro": 2, "small": 2, "medium": 2, "large": 2, "xlarge": 4}
+SINGLE_VCPU = {"t2.nano", "t2.micro", "t2.small", "t1.micro"}
+
+# CloudWatch namespace of the metrics of the CloudWatch agent.
+AGENT_NAMESPACE = "MultiTierArchitecture"
+
+# Local endpoints of the CloudWatch agent for the application: OpenTelemetry (OTLP over HTTP) and the X-Ray daemon protocol.
+OTLP_ENDPOINT = "http://127.0.0.1:4318"
+XRAY_DAEMON_ADDRESS = "127.0.0.1:2000"
+
+# Content types compressed by the web server.
+COMPRESSED_TYPES = "text/html text/plain text/css text/xml text/javascript application/javascript application/json image/svg+xml"
+
+
+def instance_vcpus(instance_type: str) -> int:
+    """Return the number of vCPU's of an EC2 instance type, e.g. 't3.micro' => 2."""
+    if instance_type in SINGLE_VCPU:
+        return 1
+    size = instance_type.split(".")[-1]
+    if size == "medium" and not instance_type.startswith("t"):
+        return 1
+    if size in SIZE_VCPUS:
+        return SIZE_VCPUS[size]
+    match = re.fullmatch(r"(\d+)xlarge", size)
+    if match is None:
+        raise ValueError(f"Unknown instance size '{size}' of instance type '{instance_type}'")
+    return 4 * int(match.group(1))
+
+
+def instance_architecture(instance_type: str) -> str:
+    """Return the CPU architecture of an EC2 instance type: 'arm64' for Graviton (e.g. 't4g.small', 'm7gd.large'), else 'x86_64'."""
+    family = instance_type.split(".")[0]
+    if family == "a1" or re.fullmatch(r"[a-z]+\d+g[a-z]*", family):
+        return "arm64"
+    return "x86_64"
+
+
+@dataclass(frozen=True)
+class WebServerConfig:
+    """Tuning parameters of the Apache web server on the application instances."""
+    mpm: str
+    start_servers: int
+    server_limit: int
+    threads_per_child: int
+    max_request_workers: int
+    keep_alive_timeout: int
+    max_keep_alive_requests: int
+    compression: bool
+    static_max_age: int
+
+    def __post_init__(self):
+        if self.mpm not in MPMS:
+            raise ValueError(f"Unknown mpm '{self.mpm}', expected one of {list(MPMS)}")
+
+    @classmethod
+    def for_instance_type(cls, instance_type: str, alb_idle_timeout: int, static_max_age: int = 86400,
+                          mpm: str = "event", compression: bool = True) -> "WebServerConfig":
+        """Derive the web server settings from the instance type and the ALB idle timeout.
+
+        Every vCPU gets 2 server processes of 25 threads (1 thread per process with prefork). The keep-alive timeout
+        is longer than the ALB idle timeout, so the ALB always closes an idle connection first and never sends a
+        request on a connection the web server is closing (HTTP 502).
+        """
+        vcpus = instance_vcpus(instance_type)
+        threads_per_child = 1 if mpm == "prefork" else 25
+        server_limit = 2 * vcpus if mpm != "prefork" else 50 * vcpus
+        return cls(
+            mpm=mpm,
+            start_servers=vcpus if mpm != "prefork" else 5 * vcpus,
+            server_limit=server_limit,
+            threads_per_child=threads_per_child,
+            max_request_workers=server_limit * threads_per_child,
+            keep_alive_timeout=alb_idle_timeout + 5,
+            max_keep_alive_requests=0, # Unlimited: the ALB reuses its connections to the targets.
+            compression=compression,
+            static_max_age=static_max_age,
+        )
+
+
+def render_mpm_conf(config: WebServerConfig) -> str:
+    """Render /etc/httpd/conf.modules.d/00-mpm.conf: the MPM module and its process and thread limits."""
+    lines = [
+        f"LoadModule mpm_{config.mpm}_module modules/mod_mpm_{config.mpm}.so",
+        "",
+        f"<IfModule mpm_{config.mpm}_module>",
+        f"    StartServers {config.start_servers}",
+        f"    ServerLimit {config.server_limit}",
+    ]
+    if config.mpm == "prefork":
+        lines += [
+            f"    MinSpareServers {config.start_servers}",
+            f"    MaxSpareServers {config.server_limit}",
+        ]
+    else:
+        lines += [
+            f"    ThreadsPerChild {config.threads_per_child}",
+            f"    MinSpareThreads {config.threads_per_child}",
+            f"    MaxSpareThreads {config.max_request_workers}",
+        ]
+    lines += [
+        f"    MaxRequestWorkers {config.max_request_workers}",
+        "    MaxConnectionsPerChild 0",
+        "</IfModule>",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def render_performance_conf(config: WebServerConfig) -> str:
+    """Render /etc/httpd/conf.d/performance.conf: keep-alive, compression, cache headers and the health endpoint."""
+    lines = [
+        "KeepAlive On",
+        f"KeepAliveTimeout {config.keep_alive_timeout}",
+        f"MaxKeepAliveRequests {config.max_keep_alive_requests}",
+        "",
+    ]
+    if config.compression:
+        lines += [
+            "# Brotli for clients that accept it, gzip for the others.",
+            "<IfModule mod_brotli.c>",
+            f"    AddOutputFilterByType BROTLI_COMPRESS;DEFLATE {COMPRESSED_TYPES}",
+            "</IfModule>",
+            "<IfModule !mod_brotli.c>",
+            f"    AddOutputFilterByType DEFLATE {COMPRESSED_TYPES}",
+            "</IfModule>",
+            "",
+        ]
+    lines += [
+        "# Static assets may be cached by CloudFront and browsers.",
+        '<LocationMatch "^/static/">',
+        f'    Header set Cache-Control "public, max-age={config.static_max_age}"',
+        "</LocationMatch>",
+        "",
+        "# Lightweight health check endpoint for the ALB target group, never cached.",
+        '<Files "health">',
+        "    ForceType text/plain",
+        '    Header set Cache-Control "no-store"',
+        "</Files>",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def render_cloudwatch_agent_config(log_group_name: str, namespace: str = AGENT_NAMESPACE) -> str:
+    """Render the CloudWatch agent configuration.
+
+    Metrics: memory, disk, the httpd processes and the Apache scoreboard (sent to the statsd listener by
+    apache-status.sh), aggregated per Auto Scaling Group. Logs: the Apache timing log. Traces: OTLP and X-Ray
+    segments from the application, forwarded to X-Ray.
+    """
+    return json.dumps({
+        "agent": {"metrics_collection_interval": 60, "run_as_user": "root"},
+        "metrics": {
+            "namespace": namespace,
+            "append_dimensions": {"AutoScalingGroupName": "${aws:AutoScalingGroupName}"},
+            "aggregation_dimensions": [["AutoScalingGroupName"]],
+            "metrics_collected": {
+                "mem": {"measurement": ["mem_used_percent"]},
+                "disk": {"measurement": ["used_percent"], "resources": ["/"]},
+                "procstat": [{"exe": "httpd", "measurement": ["cpu_usage", "memory_rss", "pid_count"]}],
+                "statsd": {"service_address": "127.0.0.1:8125", "metrics_collection_interval": 10, "metrics_aggregation_interval": 60},
+            },
+        },
+        "logs": {
+            "logs_collected": {"files": {"collect_list": [{
+                "file_path": "/var/log/httpd/timing_log",
+                "log_group_name": log_group_name,
+                "log_stream_name": "{instance_id}",
+            }]}},
+        },
+        "traces": {"traces_collected": {"otlp": {}, "xray": {}}},
+    }, indent=2) + "\n"
+
+
+def render_instrumentation_conf() -> str:
+    """Render /etc/httpd/conf.d/instrumentation.conf: the local status page and the timing log.
+
+    The timing log is JSON with the time taken per request (%D, microseconds) and the X-Amzn-Trace-Id the ALB adds,
+    so a slow request can be followed from the ALB access log to the web server and the application traces.
+    """
+    return "\n".join([
+        "ExtendedStatus On",
+        '<Location "/server-status">',
+        "    SetHandler server-status",
+        "    Require local",
+        "</Location>",
+        "",
+        'LogFormat "{\\"time\\":\\"%{%Y-%m-%dT%H:%M:%S%z}t\\", \\"method\\":\\"%m\\", \\"path\\":\\"%U\\", '
+        '\\"status\\":%>s, \\"bytes\\":%B, \\"duration_us\\":%D, \\"trace_id\\":\\"%{X-Amzn-Trace-Id}i\\"}" timing',
+        'CustomLog "logs/timing_log" timing',
+    ]) + "\n"
+
+
+APACHE_STATUS_SCRIPT = """#!/bin/bash
+# Send the Apache scoreboard to the statsd listener of the CloudWatch agent every 10 seconds.
+while sleep 10; do
+    curl -s "http://127.0.0.1/server-status?auto" \\
+        | awk -F': ' '/^(BusyWorkers|IdleWorkers|ReqPerSec|BytesPerSec): / {print "apache_" $1 ":" $2 "|g"}' \\
+        > /dev/udp/127.0.0.1/8125
+done
+"""
+
+APACHE_STATUS_SERVICE = """[Unit]
+Description=Apache scoreboard metrics for the CloudWatch agent
+After=httpd.service
+
+[Service]
+ExecStart=/usr/local/bin/apache-status.sh
+Restart=always
+
+[Install]
+WantedBy=multi-user.target
+"""
+
+
+# Placeholder worker, like the Hello World page of the web tier: long-polls the work queue, logs and deletes every
+# message. The application replaces it with its own worker (worker_command).
+WORKER_SCRIPT = "/usr/local/bin/app-worker.sh"
+
+WORKER_PLACEHOLDER_SCRIPT = """#!/bin/bash
+# Receive the messages of the work queue, log and delete them.
+region=$(echo "$WORK_QUEUE_URL" | cut -d. -f2)
+while true; do
+    aws sqs receive-message --region "$region" --queue-url "$WORK_QUEUE_URL" \\
+        --wait-time-seconds "$WORK_QUEUE_WAIT_SECONDS" --max-number-of-messages 10 \\
+        --query 'Messages[].[ReceiptHandle,Body]' --output text \\
+        | while IFS=$'\\t' read -r receipt_handle body; do
+            [ "$receipt_handle" = "None" ] && continue
+            echo "Job: $body"
+            aws sqs delete-message --region "$region" --queue-url "$WORK_QUEUE_URL" --receipt-handle "$receipt_handle"
+        done
+done
+"""
+
+
+def render_worker_service(command: str) -> str:
+    """Render the systemd unit of the worker: runs 'command' with the environment of /etc/app.env."""
+    return "\n".join([
+        "[Unit]",
+        "Description=Worker of the work queue",
+        "Wants=network-online.target",
+        "After=network-online.target",
+        "",
+        "[Service]",
+        "EnvironmentFile=/etc/app.env",
+        f"ExecStart={command}",
+        "Restart=always",
+        "RestartSec=5",
+        "",
+        "[Install]",
+        "WantedBy=multi-user.target",
+    ]) + "\n"
+
+
+def heredoc(path: str, content: str) -> str:
+    """Return the shell commands that write 'content' to 'path'."""
+    return f"cat > {path} <<'EOF'\n{content}EOF\n"
+
+
+def render_install_script(config: WebServerConfig, log_group_name: Optional[str] = None) -> str:
+    """Render the script that installs and configures the web server, at boot or in the golden AMI.
+
+    With a 'log_group_name' the CloudWatch agent is installed as well, see render_cloudwatch_agent_config.
+    """
+    lines = [
+        "#!/bin/bash",
+        "",
+        "# Update the system",
+        "sudo dnf update -y",
+        "",
+        "# Install Apache web server",
+        "sudo dnf install -y httpd",
+        "",
+        f"# Apache {config.mpm} MPM, sized for the instance type",
+        heredoc("/etc/httpd/conf.modules.d/00-mpm.conf", render_mpm_conf(config)),
+        "# Keep-alive, compression and cache headers",
+        heredoc("/etc/httpd/conf.d/performance.conf", render_performance_conf(config)),
+        "# Lightweight health check endpoint for the ALB target group",
+        'echo "OK" > /var/www/html/health',
+        "",
+        "# Set appropriate permissions",
+        "sudo chown -R ec2-user:apache /var/www/html",
+        "sudo chmod -R 755 /var/www/html",
+        "",
+        "# Enable Apache",
+        "sudo systemctl enable httpd",
+        "",
+    ]
+    if log_group_name is not None:
+        lines += [
+            "# CloudWatch agent: host metrics, the Apache timing log and traces",
+            "sudo dnf install -y amazon-cloudwatch-agent",
+            heredoc("/opt/aws/amazon-cloudwatch-agent/etc/amazon-cloudwatch-agent.json", render_cloudwatch_agent_config(log_group_name)),
+            heredoc("/etc/httpd/conf.d/instrumentation.conf", render_instrumentation_conf()),
+            heredoc("/usr/local/bin/apache-status.sh", APACHE_STATUS_SCRIPT),
+            "sudo chmod 755 /usr/local/bin/apache-status.sh",
+            heredoc("/etc/systemd/system/apache-status.service", APACHE_STATUS_SERVICE),
+            "sudo systemctl enable --now apache-status",
+            "sudo /opt/aws/amazon-cloudwatch-agent/bin/amazon-cloudwatch-agent-ctl -a fetch-config -m ec2 -s \\",
+            "    -c file:/opt/aws/amazon-cloudwatch-agent/etc/amazon-cloudwatch-agent.json",
+            "sudo systemctl enable amazon-cloudwatch-agent",
+            "",
+        ]
+    return "\n".join(lines)
+
+
+def render_user_data(environment: Dict[str, str], install_script: Optional[str] = None) -> str:
+    """Render the user data of the application instances.
+
+    'environment' is written to /etc/app.env for the application. Without a golden AMI, pass the install script:
+    it runs first, before the per-instance configuration.
+    """
+    lines = ["#!/bin/bash", ""]
+    if install_script is not None:
+        lines += [install_script.split("\n", 1)[1]]
+    lines += [
+        "# Create a simple web page",
+        'echo "<h1>Hello World from $(hostname -f)</h1>" > /var/www/html/index.html',
+        "",
+        "# Endpoints of the data and cache tiers",
+        heredoc("/etc/app.env", "".join(f"{key}={value}\n" for key, value in environment.items())),
+        "# Start Apache",
+        "sudo systemctl start httpd",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def render_worker_user_data(environment: Dict[str, str], command: str = WORKER_SCRIPT, golden_ami: bool = False) -> str:
+    """Render the user data of the worker instances.
+
+    'environment' is written to /etc/app.env, like on the application instances, and the app-worker service runs
+    'command' with it: the worker reads the work queue url (WORK_QUEUE_URL) from it. The workers launch from the AMI
+    of the application tier, the web server of the golden AMI is stopped. Without a golden AMI the system is updated
+    at boot first.
+    """
+    lines = ["#!/bin/bash", ""]
+    if not golden_ami:
+        lines += [
+            "# Update the system",
+            "sudo dnf update -y",
+            "",
+        ]
+    lines += [
+        "# Endpoints of the data tier and the work queue",
+        heredoc("/etc/app.env", "".join(f"{key}={value}\n" for key, value in environment.items())),
+    ]
+    if golden_ami:
+        lines += [
+            "# The workers don't serve HTTP",
+            "sudo systemctl disable --now httpd",
+            "",
+        ]
+    if command == WORKER_SCRIPT:
+        lines += [
+            "# Placeholder worker",
+            heredoc(WORKER_SCRIPT, WORKER_PLACEHOLDER_SCRIPT),
+            f"sudo chmod 755 {WORKER_SCRIPT}",
+            "",
+        ]
+    lines += [
+        "# Worker service",
+        heredoc("/etc/systemd/system/app-worker.service", render_worker_service(command)),
+        "sudo systemctl enable --now app-worker",
+        "",
+    ]
+    return "\n".join(lines)
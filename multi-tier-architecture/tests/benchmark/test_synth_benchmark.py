@@ -0,0 +1,267 @@
+import functools
+import glob
+import json
+import os
+import time
+
+import pytest
+import aws_cdk as core
+
+from multi_tier_architecture.app_stack import AppStack
+from multi_tier_architecture.config import StackConfig
+from multi_tier_architecture.data_stack import DataStack
+from multi_tier_architecture.multi_region import add_regional_stacks
+from multi_tier_architecture.multi_tier_architecture_stack import MultiTierArchitectureStack
+from multi_tier_architecture.network_stack import NetworkStack
+
+# Synth benchmark: every scale configuration is synthesized once in the stack layout of app.py, the resource count and
+# template size of every stack are checked against the CloudFormation quotas and the checked-in baseline.json.
+# These checks are deterministic and part of the default test run. The synth time and peak memory depend on the
+# machine, their test is marked 'benchmark' and left out of the default test run (see pytest.ini), run it with:
+#   python -m pytest -m benchmark tests/benchmark
+# To accept new numbers (e.g. after adding resources on purpose), rewrite the baseline with:
+#   BENCHMARK_UPDATE_BASELINE=1 python -m pytest -m "" tests/benchmark
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+UPDATE_BASELINE = os.getenv("BENCHMARK_UPDATE_BASELINE", "").lower() in ("1", "true", "yes")
+
+# Allowed growth over the baseline. Resources and template bytes are deterministic, the small margin leaves room for
+# CDK upgrades. Time and memory depend on the machine running the suite (time can be tuned for slow CI runners).
+RESOURCE_TOLERANCE = 1.05
+TEMPLATE_BYTES_TOLERANCE = 1.05
+MEMORY_TOLERANCE = 1.5
+TIME_TOLERANCE = float(os.getenv("BENCHMARK_TIME_TOLERANCE", "3"))
+
+# CloudFormation quotas: resources per stack, and template body size uploaded through S3 (as cdk deploy does).
+# A template over 51.200 bytes can't be deployed without the CDK bootstrap bucket.
+CFN_MAX_RESOURCES = 500
+CFN_MAX_TEMPLATE_BYTES = 1_000_000
+
+ENV = core.Environment(account="123456789012", region="us-east-1")
+
+# Cached AZ lookups for the regions, so stacks with an environment synth offline.
+AZ_CONTEXT = {
+    f"availability-zones:account=123456789012:region={region}": [f"{region}{zone}" for zone in "abcdef"]
+    for region in ("us-east-1", "eu-west-1")
+}
+
+ALL_FEATURES = {
+    "enable_rds_proxy": True,
+    "enable_cache": True,
+    "enable_cloudfront": True,
+    "cloudfront_prefix_list_id": "pl-3b927c52",
+    "enable_golden_ami": True,
+    "enable_instrumentation": True,
+    "enable_alb_access_logs": True,
+    "enable_worker_tier": True,
+    "vpc_interface_endpoints": "ssm,ssmmessages,ec2messages,logs,secretsmanager",
+}
+
+
+
+def add_split_stacks(app):
+    """The tiers in separate stacks, as app.py deploys them by default."""
+    network = NetworkStack(app, "MultiTierArchitectureNetwork", env=ENV)
+    data = DataStack(app, "MultiTierArchitectureData", network=network, env=ENV)
+    AppStack(app, "MultiTierArchitectureApp", network=network, data=data, env=ENV)
+
+
+def add_single_stack(app):
+    """Everything in one stack, app.py with the context key 'single_stack'."""
+    MultiTierArchitectureStack(app, "MultiTierArchitectureStack", env=ENV)
+
+
+def add_multi_region_stacks(app):
+    """A copy of the tiers per region and the global stack, app.py with the context key 'regions'."""
+    add_regional_stacks(app, StackConfig.from_context(app), account=ENV.account)
+
+
+# The configurations by name: the stack layout of app.py and the context.
+CONFIGURATIONS = {
+    "default": (add_split_stacks, {}),
+    "default-single-stack": (add_single_stack, {}),
+    "all-features": (add_split_stacks, {
+        **ALL_FEATURES,
+        "db_multi_az": True,
+        "db_read_replicas": 2,
+    }),
+    "aurora": (add_split_stacks, {
+        **ALL_FEATURES,
+        "db_engine": "aurora-serverless",
+        "db_read_replicas": 2,
+        "cache_shards": 3,
+    }),
+    "max-scale": (add_split_stacks, {
+        **ALL_FEATURES,
+        "az_count": 6,
+        "app_instances_per_az": 2,
+        "db_multi_az": True,
+        "db_read_replicas": 5,
+        "cache_shards": 6,
+        "cache_replicas": 2,
+    }),
+    "max-scale-single-stack": (add_single_stack, {
+        **ALL_FEATURES,
+        "az_count": 6,
+        "app_instances_per_az": 2,
+        "db_multi_az": True,
+        "db_read_replicas": 5,
+        "cache_shards": 6,
+        "cache_replicas": 2,
+    }),
+    # CloudFront isn't supported with several regions.
+    "multi-region": (add_multi_region_stacks, {
+        **{key: value for key, value in ALL_FEATURES.items() if key not in ("enable_cloudfront", "cloudfront_prefix_list_id")},
+        "regions": "us-east-1,eu-west-1",
+        "domain_name": "app.example.com",
+        "db_read_replicas": 2,
+        "cross_region_read_replicas": True,
+    }),
+}
+
+
+def load_baseline():
+    if not os.path.exists(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE) as f:
+        return json.load(f)
+
+
+BASELINE = load_baseline()
+
+
+def jsii_runtime_pids():
+    """Return the pids of the node processes started by this process: the jsii runtime the CDK synthesizes in.
+
+    Linux only (/proc), elsewhere the list is empty and peak memory isn't measured.
+    """
+    pids = []
+    for stat_file in glob.glob("/proc/[0-9]*/stat"):
+        try:
+            with open(stat_file) as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # "<pid> (<command>) <state> <ppid> ...", the command may contain spaces.
+        command = stat[stat.index("(") + 1:stat.rindex(")")]
+        ppid = int(stat[stat.rindex(")") + 2:].split()[1])
+        if ppid == os.getpid() and command.startswith("node"):
+            pids.append(int(stat_file.split("/")[2]))
+    return pids
+
+
+def reset_peak_rss(pids):
+    """Reset the peak resident set size (VmHWM) of 'pids' to their current size."""
+    for pid in pids:
+        with open(f"/proc/{pid}/clear_refs", "w") as f:
+            f.write("5")
+
+
+def peak_rss_bytes(pids):
+    """Return the summed peak resident set size (VmHWM) of 'pids' since their last reset, None without pids."""
+    if not pids:
+        return None
+    peak = 0
+    for pid in pids:
+        with open(f"/proc/{pid}/status") as f:
+            peak += next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmHWM:"))
+    return peak
+
+
+def measure_synth(name):
+    """Synthesize the stacks of configuration 'name' and return their metrics.
+
+    Peak memory is the peak resident set size of the jsii node process, which holds the construct tree and renders
+    the templates. The resource count and template size are per stack, the quotas apply to every stack.
+    """
+    add_stacks, context = CONFIGURATIONS[name]
+    app = core.App(context={**AZ_CONTEXT, **context})
+    pids = jsii_runtime_pids()
+    reset_peak_rss(pids)
+    start = time.perf_counter()
+
+    add_stacks(app)
+    assembly = app.synth()
+
+    synth_seconds = time.perf_counter() - start
+    peak_memory = peak_rss_bytes(pids)
+
+    stacks = {}
+    for stack in assembly.stacks:
+        with open(stack.template_full_path) as f:
+            template = json.load(f)
+        stacks[stack.stack_name] = {
+            "resources": len(template["Resources"]),
+            "template_bytes": os.path.getsize(stack.template_full_path),
+        }
+
+    return {
+        "synth_seconds": round(synth_seconds, 3),
+        "peak_memory_bytes": peak_memory,
+        "stacks": stacks,
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def synthesized(name):
+    """The metrics of configuration 'name', synthesized once for the quota and the benchmark tests."""
+    return measure_synth(name)
+
+
+@pytest.fixture(scope="module")
+def results():
+    collected = {}
+    yield collected
+    if UPDATE_BASELINE and collected:
+        baseline = load_baseline()
+        for name, metrics in collected.items():
+            baseline[name] = {**baseline.get(name, {}), **metrics}
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+
+@pytest.mark.parametrize("name", CONFIGURATIONS)
+def test_cloudformation_quotas(results, name):
+    stacks = synthesized(name)["stacks"]
+    results.setdefault(name, {})["stacks"] = stacks
+
+    for stack_name, metrics in stacks.items():
+        assert metrics["resources"] <= CFN_MAX_RESOURCES, f"{stack_name}: {metrics['resources']} resources"
+        assert metrics["template_bytes"] <= CFN_MAX_TEMPLATE_BYTES, f"{stack_name}: {metrics['template_bytes']} bytes"
+
+    if UPDATE_BASELINE:
+        return
+    assert "stacks" in BASELINE.get(name, {}), f"{name} has no baseline, run with BENCHMARK_UPDATE_BASELINE=1"
+    baseline = BASELINE[name]["stacks"]
+
+    assert set(stacks) == set(baseline), f"{name}: stacks {sorted(stacks)}, baseline {sorted(baseline)}"
+    for stack_name, metrics in stacks.items():
+        assert metrics["resources"] <= baseline[stack_name]["resources"] * RESOURCE_TOLERANCE, (
+            f"{stack_name}: {metrics['resources']} resources, baseline {baseline[stack_name]['resources']}")
+        assert metrics["template_bytes"] <= baseline[stack_name]["template_bytes"] * TEMPLATE_BYTES_TOLERANCE, (
+            f"{stack_name}: template of {metrics['template_bytes']} bytes, baseline {baseline[stack_name]['template_bytes']}")
+
+
+@pytest.fixture(scope="module")
+def warm_runtime():
+    # The first synth also starts the jsii runtime and loads the CDK libraries.
+    measure_synth("default")
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("name", CONFIGURATIONS)
+def test_synth_benchmark(warm_runtime, results, name):
+    metrics = measure_synth(name)
+    results.setdefault(name, {}).update(synth_seconds=metrics["synth_seconds"], peak_memory_bytes=metrics["peak_memory_bytes"])
+
+    if UPDATE_BASELINE:
+        return
+    assert "synth_seconds" in BASELINE.get(name, {}), f"{name} has no baseline, run with BENCHMARK_UPDATE_BASELINE=1"
+    baseline = BASELINE[name]
+
+    if metrics["peak_memory_bytes"] is not None:
+        assert metrics["peak_memory_bytes"] <= baseline["peak_memory_bytes"] * MEMORY_TOLERANCE, (
+            f"{name}: peak memory {metrics['peak_memory_bytes']} bytes, baseline {baseline['peak_memory_bytes']}")
+    assert metrics["synth_seconds"] <= baseline["synth_seconds"] * TIME_TOLERANCE, (
+        f"{name}: synth took {metrics['synth_seconds']}s, baseline {baseline['synth_seconds']}s")
@@ -0,0 +1,50 @@
+import re
+
+from multi_tier_architecture.access_logs import ALB_LOG_COLUMNS, ALB_LOG_REGEX
+
+# Example entry of the ALB documentation, with the fields added since.
+LOG_LINE = (
+    'https 2018-07-02T22:23:00.186641Z app/my-loadbalancer/50dc6c495c0c9188 192.168.131.39:2817 10.0.0.1:80 '
+    '0.086 0.048 0.037 200 200 0 57 "GET https://www.example.com:443/ HTTP/1.1" "curl/7.46.0" '
+    'ECDHE-RSA-AES128-GCM-SHA256 TLSv1.2 '
+    'arn:aws:elasticloadbalancing:us-east-2:123456789012:targetgroup/my-targets/73e2d6bc24d8a067 '
+    '"Root=1-58337281-1d84f3d73c47ec4e58577259" "www.example.com" '
+    '"arn:aws:acm:us-east-2:123456789012:certificate/12345678-1234-1234-1234-123456789012" 1 '
+    '2018-07-02T22:22:48.364000Z "authenticate,forward" "-" "-" "10.0.0.1:80" "200" "-" "-" TID_1234abcd5678ef90'
+)
+
+
+def parse(line):
+    match = re.fullmatch(ALB_LOG_REGEX, line)
+    assert match is not None
+    return dict(zip([name for name, _ in ALB_LOG_COLUMNS], match.groups()))
+
+
+def test_regex_has_a_group_per_column():
+    # The RegexSerDe fails on every row when the number of groups and columns differ.
+    assert re.compile(ALB_LOG_REGEX).groups == len(ALB_LOG_COLUMNS)
+
+
+def test_regex_parses_log_entry():
+    entry = parse(LOG_LINE)
+
+    assert entry["client_ip"] == "192.168.131.39"
+    assert entry["target_ip"] == "10.0.0.1"
+    assert (entry["request_processing_time"], entry["target_processing_time"], entry["response_processing_time"]) == (
+        "0.086", "0.048", "0.037")
+    assert (entry["request_verb"], entry["request_url"]) == ("GET", "https://www.example.com:443/")
+    assert entry["trace_id"] == "Root=1-58337281-1d84f3d73c47ec4e58577259"
+    assert entry["conn_trace_id"] == "TID_1234abcd5678ef90"
+
+
+def test_regex_ignores_new_fields():
+    assert parse(LOG_LINE + ' "new-field"')["conn_trace_id"] == "TID_1234abcd5678ef90"
+
+
+def test_regex_parses_request_without_target():
+    # The ALB couldn't reach a target: '-' for the target (empty columns) and -1 for its processing times.
+    line = LOG_LINE.replace("10.0.0.1:80 0.086 0.048 0.037 200 200", "- -1 -1 -1 503 -")
+    entry = parse(line)
+
+    assert (entry["target_ip"], entry["target_port"]) == ("", "")
+    assert (entry["target_processing_time"], entry["elb_status_code"], entry["target_status_code"]) == ("-1", "503", "-")
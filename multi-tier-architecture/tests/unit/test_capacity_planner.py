@@ -0,0 +1,140 @@
+import dataclasses
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+import aws_cdk as core
+
+from multi_tier_architecture.capacity_planner import PAYLOAD_PROFILES, load_resources, main, plan
+from multi_tier_architecture.config import StackConfig
+from multi_tier_architecture.multi_region import add_regional_stacks
+from multi_tier_architecture.multi_tier_architecture_stack import MultiTierArchitectureStack
+
+
+def synth_resources(tmp_path, context=None):
+    """Synthesize the stack into a cloud assembly in tmp_path and read it back like the planner CLI does."""
+    app = core.App(context=context or {}, outdir=str(tmp_path))
+    MultiTierArchitectureStack(app, "multi-tier-architecture")
+    app.synth()
+    return load_resources(str(tmp_path))
+
+
+def tiers(report):
+    return {tier.tier: tier for tier in report.tiers}
+
+
+def test_default_stack_capacity(tmp_path):
+    report = plan(synth_resources(tmp_path), PAYLOAD_PROFILES["web"], target_rps=100)
+    capacity = tiers(report)
+
+    # 6 x t2.micro on unlimited credits, 1 vCPU each at 25 ms CPU per request.
+    assert capacity["app cpu"].ceiling_rps == pytest.approx(240)
+    # 50 MaxRequestWorkers per instance (rendered for 1 GiB) holding a worker for 120 ms.
+    assert capacity["app workers"].ceiling_rps == pytest.approx(2500)
+    # db.t3.micro with max_connections 128 from the development tuning profile, held per request without RDS Proxy.
+    assert capacity["db connections"].ceiling_rps == pytest.approx(128 * 1000 / 120)
+    assert capacity["db iops"].ceiling_rps == pytest.approx(3000 / 0.5)
+    assert capacity["alb"].ceiling_rps is None
+    assert capacity["nat"].ceiling_rps is None
+
+    assert report.bottleneck.tier == "app cpu"
+    assert report.meets_slo
+    assert not plan(synth_resources(tmp_path), PAYLOAD_PROFILES["web"], target_rps=200).meets_slo
+
+
+def test_standard_credits_cap_the_app_tier_at_its_baseline(tmp_path):
+    resources = synth_resources(tmp_path, {"app_cpu_credits": "standard"})
+    capacity = tiers(plan(resources, PAYLOAD_PROFILES["web"], target_rps=100))
+
+    # t2.micro sustains 10% of its vCPU on standard credits.
+    assert capacity["app cpu"].ceiling_rps == pytest.approx(24)
+    assert "10% baseline" in capacity["app cpu"].limit
+
+
+def test_rds_proxy_pools_connections_per_query(tmp_path):
+    resources = synth_resources(tmp_path, {"enable_rds_proxy": True})
+    capacity = tiers(plan(resources, PAYLOAD_PROFILES["web"], target_rps=100))
+
+    assert "RDS Proxy" in capacity["db connections"].limit
+    # A pooled connection is only held for the 5 queries of 3 ms.
+    assert capacity["db connections"].ceiling_rps > 128 * 1000 / 120
+
+
+def test_aurora_serverless_capacity(tmp_path):
+    resources = synth_resources(tmp_path, {"db_engine": "aurora-serverless"})
+    capacity = tiers(plan(resources, PAYLOAD_PROFILES["web"], target_rps=100))
+
+    assert "Aurora Serverless v2" in capacity["db connections"].limit
+    assert capacity["db iops"].ceiling_rps is None
+
+
+def test_nat_bandwidth_and_bottleneck(tmp_path):
+    media = dataclasses.replace(PAYLOAD_PROFILES["media"], nat_kb=256 * 1024)
+    report = plan(synth_resources(tmp_path), media, target_rps=50)
+
+    # 2 NAT gateways of 100 Gbps for 256 MiB per request.
+    assert tiers(report)["nat"].ceiling_rps == pytest.approx(2 * 100e9 / 8 / (256 * 1024 ** 2))
+    assert report.bottleneck.tier == "app network"
+    assert not report.meets_slo
+    assert "First bottleneck: app network" in report.render()
+
+
+def test_unknown_stacks(tmp_path):
+    synth_resources(tmp_path)
+    with pytest.raises(ValueError, match="No stacks matching 'Other\\*'"):
+        load_resources(str(tmp_path), "Other*")
+
+
+def test_cli_reads_the_assembly_of_app_py(tmp_path, capsys):
+    project = Path(__file__).parents[2]
+    subprocess.run([sys.executable, "app.py"], cwd=project, check=True, capture_output=True,
+                   env={**os.environ, "CDK_OUTDIR": str(tmp_path), "JSII_SILENCE_WARNING_DEPRECATED_NODE_VERSION": "1"})
+
+    # The tiers are spread over the network, data and app stacks.
+    assert main([str(tmp_path), "--target-rps", "10", "--payload", "api"]) == 0
+    output = capsys.readouterr().out
+    assert "db connections" in output and "SLO: met" in output
+
+    assert main([str(tmp_path), "--target-rps", "10000", "--cpu-ms", "100"]) == 1
+    assert "SLO: NOT met" in capsys.readouterr().out
+
+
+def test_multi_region_assembly_is_planned_per_region(tmp_path):
+    app = core.App(context={"regions": "us-east-1,eu-west-1", "domain_name": "app.example.com"}, outdir=str(tmp_path))
+    add_regional_stacks(app, StackConfig.from_context(app))
+    app.synth()
+
+    # Every region has the same logical ids, merged they would hide all but one region.
+    with pytest.raises(ValueError, match="one region at a time|select one copy of the tiers"):
+        load_resources(str(tmp_path))
+
+    for region in ("us-east-1", "eu-west-1"):
+        capacity = tiers(plan(load_resources(str(tmp_path), f"*-{region}"), PAYLOAD_PROFILES["web"], target_rps=100))
+        assert capacity["app cpu"].ceiling_rps == pytest.approx(240)
+
+
+def test_web_server_workers_of_the_app_launch_template(tmp_path):
+    resources = synth_resources(tmp_path, {"enable_golden_ami": True, "enable_worker_tier": True, "app_instance_type": "t3.large"})
+    # MaxRequestWorkers elsewhere in the template doesn't count.
+    resources = {"Decoy": {"Type": "AWS::EC2::LaunchTemplate", "Properties": {"LaunchTemplateData": {"UserData": "MaxRequestWorkers 7"}}},
+                 **resources}
+    capacity = tiers(plan(resources, PAYLOAD_PROFILES["web"], target_rps=100))
+
+    # Rendered in the component of the golden AMI for the 2 vCPU's of a t3.large.
+    assert capacity["app workers"].ceiling_rps == pytest.approx(6 * 100 * 1000 / 120)
+
+
+def test_unknown_app_instance_type(tmp_path, capsys):
+    resources = synth_resources(tmp_path, {"app_instance_type": "c6i.large"})
+
+    with pytest.raises(ValueError, match="Unknown instance type 'c6i.large', pass its baselines with --cpu-baseline"):
+        plan(resources, PAYLOAD_PROFILES["web"], target_rps=100)
+    capacity = tiers(plan(resources, PAYLOAD_PROFILES["web"], target_rps=100, cpu_baseline=1.0, network_gbps=0.781))
+    assert capacity["app cpu"].ceiling_rps == pytest.approx(6 * 2 * 1000 / 25)
+
+    with pytest.raises(SystemExit):
+        main([str(tmp_path), "--target-rps", "10"])
+    assert "Unknown instance type 'c6i.large'" in capsys.readouterr().err
+    assert main([str(tmp_path), "--target-rps", "10", "--cpu-baseline", "1", "--network-gbps", "0.781"]) == 0
@@ -0,0 +1,61 @@
+import dataclasses
+
+import pytest
+
+from multi_tier_architecture.db_tuning import DB_TUNING_PROFILES, db_instance_memory_gib
+
+
+@pytest.mark.parametrize("instance_class, memory", [
+    ("t3.micro", 1),
+    ("db.t4g.medium", 4),
+    ("m6i.large", 8),
+    ("m7g.4xlarge", 64),
+    ("r6g.large", 16),
+    ("db.r7g.2xlarge", 64),
+])
+def test_db_instance_memory(instance_class, memory):
+    assert db_instance_memory_gib(instance_class) == memory
+
+
+@pytest.mark.parametrize("instance_class", ["m5.metal", "c5.large"])
+def test_unknown_instance_class(instance_class):
+    with pytest.raises(ValueError, match=instance_class):
+        db_instance_memory_gib(instance_class)
+
+
+def test_buffer_pool_and_max_connections_follow_the_instance_memory():
+    production = DB_TUNING_PROFILES["production"]
+
+    # 75% of 8 GiB for the buffer pool, the other 2 GiB for connections of 4 MiB.
+    assert production.parameters("m6i.large") == {
+        "innodb_buffer_pool_size": str(6 * 1024 ** 3),
+        "max_connections": "512",
+        "slow_query_log": "1",
+        "long_query_time": "1",
+        "log_output": "FILE",
+    }
+    assert production.parameters("r6g.large")["innodb_buffer_pool_size"] == str(12 * 1024 ** 3)
+
+    # The buffer pool is a multiple of the 128 MiB chunk size.
+    for profile in DB_TUNING_PROFILES.values():
+        for instance_class in ("t3.micro", "t4g.small", "m7g.large"):
+            assert int(profile.parameters(instance_class)["innodb_buffer_pool_size"]) % (128 * 1024 ** 2) == 0
+
+
+def test_slow_query_log_parameters():
+    assert DB_TUNING_PROFILES["io-optimized"].slow_query_log_parameters() == {
+        "slow_query_log": "1",
+        "long_query_time": "0.5",
+        "log_output": "FILE",
+    }
+
+
+def test_profile_validation():
+    development = DB_TUNING_PROFILES["development"]
+
+    with pytest.raises(ValueError, match="monitoring interval 20"):
+        dataclasses.replace(development, monitoring_interval=20)
+    with pytest.raises(ValueError, match="below allocated_storage"):
+        dataclasses.replace(development, max_allocated_storage=10)
+    with pytest.raises(ValueError, match="at least 400 GiB"):
+        dataclasses.replace(development, iops=6000)
@@ -0,0 +1,122 @@
+import pytest
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+
+from multi_tier_architecture.config import StackConfig
+from multi_tier_architecture.multi_region import add_regional_stacks, region_placements
+
+
+REGIONS = ["us-east-1", "eu-west-1", "ap-southeast-2"]
+
+
+def synth_regions(context=None, single_stack=False):
+    """Synthesize the regional stacks and the global stack like app.py does, return the templates by stack name."""
+    app = core.App(context={"regions": REGIONS, "domain_name": "app.example.com", **(context or {})})
+    add_regional_stacks(app, StackConfig.from_context(app), account="123456789012", single_stack=single_stack)
+    return {stack.stack_name: assertions.Template.from_stack(stack) for stack in app.node.children if isinstance(stack, core.Stack)}
+
+
+def vpc_cidrs(templates, prefix):
+    return {
+        name.removeprefix(prefix): [vpc["Properties"]["CidrBlock"] for vpc in template.find_resources("AWS::EC2::VPC").values()]
+        for name, template in templates.items() if name.startswith(prefix)
+    }
+
+
+def test_region_placements():
+    placements = region_placements(REGIONS, az_count=2)
+
+    assert [placement.region for placement in placements] == REGIONS
+    assert [placement.primary for placement in placements] == [True, False, False]
+    # The primary region keeps the cidr of a single-region deployment.
+    assert [placement.vpc_cidr for placement in placements] == ["10.0.0.0/20", "10.1.0.0/20", "10.2.0.0/20"]
+    # 6 AZ's need a larger cidr, which still fits a /16 per region.
+    assert region_placements(REGIONS, az_count=6)[2].vpc_cidr == "10.2.0.0/18"
+
+
+def test_stacks_per_region_with_latency_records():
+    templates = synth_regions()
+
+    assert sorted(templates) == sorted(
+        [f"MultiTierArchitecture{tier}-{region}" for tier in ("Network", "Data", "App") for region in REGIONS]
+        + ["MultiTierArchitectureGlobal"]
+    )
+    assert vpc_cidrs(templates, "MultiTierArchitectureNetwork-") == {
+        "us-east-1": ["10.0.0.0/20"],
+        "eu-west-1": ["10.1.0.0/20"],
+        "ap-southeast-2": ["10.2.0.0/20"],
+    }
+
+    # IAM is global: only the primary region creates the AdminGroup.
+    assert templates["MultiTierArchitectureNetwork-us-east-1"].find_resources("AWS::IAM::Group")
+    assert not templates["MultiTierArchitectureNetwork-eu-west-1"].find_resources("AWS::IAM::Group")
+
+    global_stack = templates["MultiTierArchitectureGlobal"]
+    global_stack.resource_count_is("AWS::Route53::HostedZone", 1)
+    global_stack.resource_count_is("AWS::Route53::HealthCheck", 3)
+    global_stack.has_resource_properties("AWS::Route53::HealthCheck", {
+        "HealthCheckConfig": {"Type": "HTTP", "Port": 80, "ResourcePath": "/health", "RequestInterval": 30, "FailureThreshold": 3},
+    })
+
+    records = global_stack.find_resources("AWS::Route53::RecordSet")
+    assert sorted((record["Properties"]["SetIdentifier"], record["Properties"]["Region"]) for record in records.values()) == sorted(
+        (region, region) for region in REGIONS)
+    for record in records.values():
+        properties = record["Properties"]
+        assert properties["Name"] == "app.example.com"
+        assert properties["Type"] == "A"
+        assert properties["AliasTarget"]["EvaluateTargetHealth"] is True
+        assert "Fn::GetAtt" in properties["HealthCheckId"]
+
+
+def test_existing_hosted_zone_and_single_stack():
+    templates = synth_regions({"hosted_zone_id": "Z0123456789ABCDEFGHIJ", "region_health_check_interval": 10}, single_stack=True)
+
+    assert sorted(templates) == sorted([f"MultiTierArchitectureStack-{region}" for region in REGIONS] + ["MultiTierArchitectureGlobal"])
+    assert vpc_cidrs(templates, "MultiTierArchitectureStack-")["eu-west-1"] == ["10.1.0.0/20"]
+
+    global_stack = templates["MultiTierArchitectureGlobal"]
+    global_stack.resource_count_is("AWS::Route53::HostedZone", 0)
+    global_stack.resource_count_is("AWS::Route53::RecordSet", 3)
+    global_stack.has_resource_properties("AWS::Route53::RecordSet", {"HostedZoneId": "Z0123456789ABCDEFGHIJ"})
+    global_stack.has_resource_properties("AWS::Route53::HealthCheck", {"HealthCheckConfig": {"RequestInterval": 10}})
+
+
+def test_cross_region_read_replicas():
+    templates = synth_regions({"cross_region_read_replicas": True})
+
+    # The source needs automated backups.
+    templates["MultiTierArchitectureData-us-east-1"].has_resource_properties("AWS::RDS::DBInstance", {
+        "DBInstanceIdentifier": "myrdsinstance",
+        "BackupRetentionPeriod": 1,
+    })
+
+    for region in REGIONS[1:]:
+        data = templates[f"MultiTierArchitectureData-{region}"]
+        # The regional RDSdb and the replica of the RDSdb of the primary region, referenced by its ARN.
+        data.resource_count_is("AWS::RDS::DBInstance", 2)
+        data.has_resource_properties("AWS::RDS::DBInstance", {
+            "SourceDBInstanceIdentifier": {"Fn::Join": ["", ["arn:", {"Ref": "AWS::Partition"}, ":rds:us-east-1:123456789012:db:myrdsinstance"]]},
+        })
+        data.has_output("DatabaseGlobalReaderEndpoint", {})
+        templates[f"MultiTierArchitectureNetwork-{region}"].has_resource_properties("AWS::EC2::SecurityGroup", {
+            "GroupName": "SG_RDSReplica",
+        })
+        user_data = templates[f"MultiTierArchitectureApp-{region}"].find_resources("AWS::EC2::LaunchTemplate")
+        assert "DB_GLOBAL_READER_ENDPOINT" in str(user_data)
+
+    templates["MultiTierArchitectureData-us-east-1"].resource_count_is("AWS::RDS::DBInstance", 1)
+
+
+@pytest.mark.parametrize("context, message", [
+    ({"regions": "us-east-1,eu-west-1"}, "needs a domain_name"),
+    ({"regions": "us-east-1,us-east-1", "domain_name": "app.example.com"}, "Duplicate region"),
+    ({"regions": "us-east-1,eu-west-1", "domain_name": "app.example.com", "enable_cloudfront": True}, "enable_cloudfront"),
+    ({"regions": "us-east-1", "domain_name": "app.example.com", "cross_region_read_replicas": True}, "at least 2 regions"),
+    ({"regions": "us-east-1,eu-west-1", "domain_name": "app.example.com", "cross_region_read_replicas": True,
+      "db_engine": "aurora-serverless"}, "requires db_engine 'mysql'"),
+    ({"regions": "us-east-1,eu-west-1", "domain_name": "app.example.com", "region_health_check_interval": 15}, "region_health_check_interval 15"),
+])
+def test_multi_region_validation(context, message):
+    with pytest.raises(ValueError, match=message):
+        StackConfig.from_context(core.App(context=context))
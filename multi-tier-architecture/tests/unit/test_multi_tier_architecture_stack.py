@@ -1,15 +1,1057 @@
+import pytest
 import aws_cdk as core
 import aws_cdk.assertions as assertions
+from aws_cdk import aws_ec2 as ec2
 
+from collections import Counter
+import json
+
+from multi_tier_architecture.app_stack import AppStack
+from multi_tier_architecture.data_stack import DataStack
 from multi_tier_architecture.multi_tier_architecture_stack import MultiTierArchitectureStack
+from multi_tier_architecture.network_stack import NetworkStack
 
-# example tests. To run these tests, uncomment this file along with the example
-# resource in multi_tier_architecture/multi_tier_architecture_stack.py
-def test_sqs_queue_created():
-    app = core.App()
+
+ENV = core.Environment(account="123456789012", region="us-east-1")
+
+# Cached AZ lookup for ENV, so stacks with an environment synth offline.
+AZ_CONTEXT = {
+    "availability-zones:account=123456789012:region=us-east-1": [f"us-east-1{zone}" for zone in "abcdef"],
+}
+
+
+def synth_template(context=None, env=None):
+    app = core.App(context={**AZ_CONTEXT, **(context or {})})
+    stack = MultiTierArchitectureStack(app, "multi-tier-architecture", env=env)
+    return assertions.Template.from_stack(stack)
+
+
+def synth_split_templates(context=None, env=None):
+    """Synthesize the tiers as separate stacks, wired together and named like app.py does."""
+    app = core.App(context={**AZ_CONTEXT, **(context or {})})
+    network = NetworkStack(app, "MultiTierArchitectureNetwork", env=env)
+    data = DataStack(app, "MultiTierArchitectureData", network=network, env=env)
+    application = AppStack(app, "MultiTierArchitectureApp", network=network, data=data, env=env)
+    return {name: assertions.Template.from_stack(stack) for name, stack in
+            (("network", network), ("data", data), ("app", application))}
+
+
+def test_app_tier_is_autoscaling_group():
+    template = synth_template()
+
+    template.resource_count_is("AWS::EC2::Instance", 0)
+    template.resource_count_is("AWS::EC2::LaunchTemplate", 1)
+    template.has_resource_properties("AWS::AutoScaling::AutoScalingGroup", {
+        "MinSize": "2",
+        "MaxSize": "6",
+        "HealthCheckType": "ELB",
+        "TargetGroupARNs": [{"Ref": assertions.Match.string_like_regexp("TargetGroup")}],
+        "LaunchTemplate": assertions.Match.object_like({
+            "LaunchTemplateId": {"Ref": assertions.Match.string_like_regexp("AppLaunchTemplate")},
+        }),
+    })
+    template.has_resource_properties("AWS::AutoScaling::ScalingPolicy", {
+        "TargetTrackingConfiguration": assertions.Match.object_like({
+            "PredefinedMetricSpecification": assertions.Match.object_like({
+                "PredefinedMetricType": "ALBRequestCountPerTarget",
+            }),
+            "TargetValue": 1000,
+        }),
+    })
+    template.has_resource_properties("AWS::AutoScaling::ScalingPolicy", {
+        "TargetTrackingConfiguration": {
+            "PredefinedMetricSpecification": {"PredefinedMetricType": "ASGAverageCPUUtilization"},
+            "TargetValue": 60,
+        },
+    })
+
+
+def test_app_tier_capacity_from_context():
+    template = synth_template({
+        "app_min_capacity": 3,
+        "app_max_capacity": 12,
+        "app_desired_capacity": 4,
+        "app_requests_per_target": 500,
+    })
+
+    template.has_resource_properties("AWS::AutoScaling::AutoScalingGroup", {
+        "MinSize": "3",
+        "MaxSize": "12",
+        "DesiredCapacity": "4",
+    })
+    template.has_resource_properties("AWS::AutoScaling::ScalingPolicy", {
+        "TargetTrackingConfiguration": assertions.Match.object_like({"TargetValue": 500}),
+    })
+
+
+def security_group_id(template, group_name):
+    groups = template.find_resources("AWS::EC2::SecurityGroup", {"Properties": {"GroupName": group_name}})
+    assert len(groups) == 1
+    return {"Fn::GetAtt": [next(iter(groups)), "GroupId"]}
+
+
+def ingress_sources(template, group_name):
+    """Return the peers of all ingress rules on 'group_name', inline or separate."""
+    return sorted(peer for group, direction, peer, port in security_group_rules(template)
+                  if group == group_name and direction == "ingress")
+
+
+def test_database_endpoint_output_without_proxy():
+    template = synth_template()
+
+    template.resource_count_is("AWS::RDS::DBProxy", 0)
+    template.has_output("DatabaseEndpoint", {
+        "Value": {"Fn::GetAtt": [assertions.Match.string_like_regexp("RDSdb"), "Endpoint.Address"]},
+    })
+    assert ingress_sources(template, "SG_RDSdb") == ["SG_App"]
+
+
+def test_rds_proxy_in_front_of_database():
+    template = synth_template({"enable_rds_proxy": "true"})
+
+    template.has_resource_properties("AWS::RDS::DBProxy", {
+        "EngineFamily": "MYSQL",
+        "RequireTLS": True,
+        "Auth": [assertions.Match.object_like({"AuthScheme": "SECRETS"})],
+        "VpcSecurityGroupIds": [security_group_id(template, "SG_RDSProxy")],
+    })
+    template.has_resource_properties("AWS::RDS::DBProxyTargetGroup", {
+        "ConnectionPoolConfigurationInfo": {"MaxConnectionsPercent": 90},
+        "DBInstanceIdentifiers": [{"Ref": assertions.Match.string_like_regexp("RDSdb")}],
+    })
+    template.has_output("DatabaseEndpoint", {
+        "Value": {"Fn::GetAtt": [assertions.Match.string_like_regexp("RDSProxy"), "Endpoint"]},
+    })
+
+    # The application tier reaches the proxy, only the proxy reaches the database.
+    assert "SG_App" in ingress_sources(template, "SG_RDSProxy")
+    assert ingress_sources(template, "SG_RDSdb") == ["SG_RDSProxy"]
+
+
+def test_multi_az_with_read_replicas():
+    template = synth_template({
+        "db_multi_az": True,
+        "db_read_replicas": 3,
+        "db_replica_instance_class": "r6g.large",
+        "db_replica_azs": "1,0",
+    })
+
+    template.has_resource_properties("AWS::RDS::DBInstance", {
+        "MultiAZ": True,
+        "AvailabilityZone": assertions.Match.absent(),
+        "BackupRetentionPeriod": 1,
+    })
+    replicas = template.find_resources("AWS::RDS::DBInstance", {
+        "Properties": {"SourceDBInstanceIdentifier": assertions.Match.any_value()},
+    })
+    assert len(replicas) == 3
+    assert [replica["Properties"]["AvailabilityZone"]["Fn::Select"][0] for replica in replicas.values()] == [1, 0, 1]
+    assert {replica["Properties"]["DBInstanceClass"] for replica in replicas.values()} == {"db.r6g.large"}
+    template.resource_count_is("AWS::RDS::DBSubnetGroup", 2)
+
+    template.has_output("DatabaseReaderEndpoints", {
+        "Value": {"Fn::Join": [",", [
+            {"Fn::GetAtt": [name, "Endpoint.Address"]} for name in replicas
+        ]]},
+    })
+    assert ingress_sources(template, "SG_RDSReplica") == ["SG_App"]
+
+
+@pytest.mark.parametrize("engine", ["mysql", "aurora-serverless"])
+def test_database_engine_modes(engine):
+    template = synth_template({"db_engine": engine, "db_read_replicas": 1, "db_min_acu": 1, "db_max_acu": 8})
+
+    if engine == "mysql":
+        template.resource_count_is("AWS::RDS::DBCluster", 0)
+        template.has_resource_properties("AWS::RDS::DBInstance", {
+            "Engine": "mysql",
+            "DBInstanceClass": "db.t3.micro",
+        })
+    else:
+        template.has_resource_properties("AWS::RDS::DBCluster", {
+            "Engine": "aurora-mysql",
+            "ServerlessV2ScalingConfiguration": {"MinCapacity": 1, "MaxCapacity": 8},
+            "VpcSecurityGroupIds": [security_group_id(template, "SG_RDSdb")],
+        })
+        instances = template.find_resources("AWS::RDS::DBInstance").values()
+        assert [instance["Properties"]["DBInstanceClass"] for instance in instances] == ["db.serverless", "db.serverless"]
+        template.has_output("DatabaseReaderEndpoints", {
+            "Value": {"Fn::GetAtt": [assertions.Match.string_like_regexp("RDSdb"), "ReadEndpoint.Address"]},
+        })
+
+    # Both engines live in the DatabaseSubnets behind the same SG_RDSdb rules.
+    template.has_resource_properties("AWS::RDS::DBSubnetGroup", {
+        "SubnetIds": [{"Ref": assertions.Match.string_like_regexp("DatabaseSubnet1")},
+                      {"Ref": assertions.Match.string_like_regexp("DatabaseSubnet2")}],
+    })
+    assert ingress_sources(template, "SG_RDSdb") == ["SG_App"]
+
+
+def test_unknown_database_engine():
+    with pytest.raises(ValueError):
+        synth_template({"db_engine": "postgres"})
+
+
+@pytest.mark.parametrize("context, message", [
+    ({"db_availability_zone": 2}, "db_availability_zone 2 is outside the 2 AZ's, expected 0 to 1"),
+    ({"db_availability_zone": -1}, "db_availability_zone -1 is outside the 2 AZ's"),
+    ({"db_read_replicas": 1, "db_replica_azs": "5"}, "db_replica_azs index 5 is outside the 2 AZ's"),
+    ({"db_read_replicas": 2, "db_replica_azs": "1,-1"}, "db_replica_azs index -1 is outside the 2 AZ's"),
+])
+def test_database_az_validation(context, message):
+    with pytest.raises(ValueError, match=message):
+        synth_template(context)
+
+
+@pytest.mark.parametrize("context, buffer_pool_gib, max_connections, storage, performance", [
+    # Default for the burstable db.t3.micro: development.
+    ({}, 0.5, "128", ("20", 50, None, None), (False, 60)),
+    ({"instance_profile": "general-purpose"}, 6, "512", ("20", 200, None, None), (True, 15)),
+    ({"instance_profile": "general-purpose", "db_tuning": "io-optimized"}, 6, "512", ("400", 1000, 12000, 500), (True, 5)),
+    ({"instance_profile": "graviton", "db_tuning": "development", "db_monitoring_interval": 1}, 4, "1024", ("20", 50, None, None), (False, 1)),
+])
+def test_database_tuning_profiles(context, buffer_pool_gib, max_connections, storage, performance):
+    template = synth_template(context)
+
+    template.has_resource_properties("AWS::RDS::DBParameterGroup", {
+        "Family": "mysql8.0",
+        "Parameters": {
+            "innodb_buffer_pool_size": str(int(buffer_pool_gib * 1024 ** 3)),
+            "max_connections": max_connections,
+            "slow_query_log": "1",
+            "long_query_time": assertions.Match.any_value(),
+            "log_output": "FILE",
+        },
+    })
+
+    allocated_storage, max_allocated_storage, iops, throughput = storage
+    performance_insights, monitoring_interval = performance
+    template.has_resource_properties("AWS::RDS::DBInstance", {
+        "DBParameterGroupName": {"Ref": assertions.Match.string_like_regexp("RDSdbParameterGroup")},
+        "StorageType": "gp3",
+        "AllocatedStorage": allocated_storage,
+        "MaxAllocatedStorage": max_allocated_storage,
+        "Iops": iops if iops else assertions.Match.absent(),
+        "StorageThroughput": throughput if throughput else assertions.Match.absent(),
+        "EnablePerformanceInsights": performance_insights,
+        "MonitoringInterval": monitoring_interval,
+        "MonitoringRoleArn": {"Fn::GetAtt": [assertions.Match.string_like_regexp("RDSdbMonitoringRole"), "Arn"]},
+    })
+
+
+def test_database_tuning_of_replicas_and_aurora():
+    template = synth_template({
+        "instance_profile": "general-purpose",
+        "db_read_replicas": 1,
+        "db_replica_instance_class": "r6g.large",
+        "db_max_allocated_storage": 500,
+    })
+
+    # The replica gets the buffer pool of its own instance class.
+    template.resource_count_is("AWS::RDS::DBParameterGroup", 2)
+    template.has_resource_properties("AWS::RDS::DBParameterGroup", {
+        "Parameters": assertions.Match.object_like({"innodb_buffer_pool_size": str(12 * 1024 ** 3)}),
+    })
+    template.has_resource_properties("AWS::RDS::DBInstance", {
+        "SourceDBInstanceIdentifier": assertions.Match.any_value(),
+        "DBParameterGroupName": {"Ref": assertions.Match.string_like_regexp("RDSdbReplicaParameterGroup")},
+        "MaxAllocatedStorage": 500,
+        "EnablePerformanceInsights": True,
+        "MonitoringInterval": 15,
+    })
+
+    # Aurora sizes the buffer pool itself, its parameter group only has the slow query log.
+    template = synth_template({"db_engine": "aurora-serverless", "db_tuning": "production"})
+    template.resource_count_is("AWS::RDS::DBParameterGroup", 0)
+    template.has_resource_properties("AWS::RDS::DBClusterParameterGroup", {
+        "Parameters": {"slow_query_log": "1", "long_query_time": "1", "log_output": "FILE"},
+    })
+    template.has_resource_properties("AWS::RDS::DBCluster", {"PerformanceInsightsEnabled": True})
+    template.has_resource_properties("AWS::RDS::DBInstance", {"MonitoringInterval": 15})
+
+
+@pytest.mark.parametrize("context, message", [
+    ({"db_tuning": "reporting"}, "Unknown db_tuning 'reporting'"),
+    ({"db_tuning": "production"}, r"Performance Insights isn't available on \['t3.micro'\]"),
+    ({"db_monitoring_interval": 2}, "Unknown monitoring interval 2"),
+    ({"db_iops": 6000}, "at least 400 GiB"),
+])
+def test_database_tuning_validation(context, message):
+    with pytest.raises(ValueError, match=message):
+        synth_template(context)
+
+
+def launch_template_user_data(template):
+    """Return the parts of the Fn::Join that renders the user data of the application launch template."""
+    launch_template = next(iter(template.find_resources("AWS::EC2::LaunchTemplate").values()))
+    return launch_template["Properties"]["LaunchTemplateData"]["UserData"]["Fn::Base64"]["Fn::Join"][1]
+
+
+def test_cache_tier_disabled_by_default():
+    template = synth_template()
+
+    template.resource_count_is("AWS::ElastiCache::ReplicationGroup", 0)
+    assert "CACHE_PRIMARY_ENDPOINT=" not in "".join(part for part in launch_template_user_data(template) if isinstance(part, str))
+
+
+def test_cache_tier():
+    template = synth_template({
+        "enable_cache": True,
+        "cache_engine": "redis",
+        "cache_node_type": "cache.r7g.large",
+        "cache_shards": 3,
+        "cache_replicas": 2,
+    })
+
+    template.has_resource_properties("AWS::ElastiCache::ReplicationGroup", {
+        "Engine": "redis",
+        "CacheNodeType": "cache.r7g.large",
+        "CacheParameterGroupName": "default.redis7.cluster.on",
+        "ClusterMode": "enabled",
+        "NumNodeGroups": 3,
+        "ReplicasPerNodeGroup": 2,
+        "Port": 6379,
+        "SecurityGroupIds": [security_group_id(template, "SG_Cache")],
+    })
+    template.has_resource_properties("AWS::ElastiCache::SubnetGroup", {
+        "SubnetIds": [{"Ref": assertions.Match.string_like_regexp("DatabaseSubnet1")},
+                      {"Ref": assertions.Match.string_like_regexp("DatabaseSubnet2")}],
+    })
+    assert ("SG_Cache", "ingress", "SG_App", 6379) in security_group_rules(template)
+    assert ingress_sources(template, "SG_Cache") == ["SG_App"]
+
+    # The configuration endpoint is handed to the application in the user data.
+    user_data = launch_template_user_data(template)
+    assert "\nCACHE_PRIMARY_ENDPOINT=" in user_data
+    assert user_data[user_data.index("\nCACHE_PRIMARY_ENDPOINT=") + 1] == {
+        "Fn::GetAtt": ["Cache", "ConfigurationEndPoint.Address"],
+    }
+
+
+def test_alb_open_to_internet_without_cloudfront():
+    template = synth_template()
+
+    template.resource_count_is("AWS::CloudFront::Distribution", 0)
+    template.has_resource_properties("AWS::EC2::SecurityGroup", {
+        "GroupName": "SG_ALB",
+        "SecurityGroupIngress": [assertions.Match.object_like({"CidrIp": "0.0.0.0/0", "FromPort": 80})],
+    })
+
+
+def test_cloudfront_in_front_of_alb():
+    template = synth_template({"enable_cloudfront": True, "cloudfront_prefix_list_id": "pl-3b927c52"})
+
+    template.has_resource_properties("AWS::CloudFront::Distribution", {
+        "DistributionConfig": assertions.Match.object_like({
+            "DefaultCacheBehavior": assertions.Match.object_like({
+                "CachePolicyId": {"Ref": assertions.Match.string_like_regexp("DynamicCachePolicy")},
+                "Compress": True,
+            }),
+            "CacheBehaviors": [assertions.Match.object_like({
+                "PathPattern": "/static/*",
+                "CachePolicyId": {"Ref": assertions.Match.string_like_regexp("StaticCachePolicy")},
+                "Compress": True,
+            })],
+            "Origins": [
+                assertions.Match.object_like({"DomainName": {"Fn::GetAtt": [assertions.Match.string_like_regexp("ALB"), "DNSName"]}}),
+                assertions.Match.object_like({"DomainName": {"Fn::GetAtt": [assertions.Match.string_like_regexp("StaticAssetsBucket"), "RegionalDomainName"]}}),
+            ],
+        }),
+    })
+    template.resource_count_is("AWS::CloudFront::CachePolicy", 2)
+
+    # The ALB only accepts traffic from the CloudFront origin-facing prefix list.
+    assert ingress_sources(template, "SG_ALB") == ["pl-3b927c52"]
+
+
+@pytest.mark.parametrize("az_count", [2, 3, 4])
+def test_topology_scales_with_az_count(az_count):
+    template = synth_template({"az_count": az_count, "app_instances_per_az": 2}, env=ENV)
+
+    template.resource_count_is("AWS::EC2::Subnet", 3 * az_count) # The reserved subnets aren't deployed.
+    template.resource_count_is("AWS::EC2::NatGateway", az_count)
+    template.has_resource_properties("AWS::AutoScaling::AutoScalingGroup", {
+        "MinSize": str(2 * az_count),
+        "MaxSize": str(6 * az_count),
+        "VPCZoneIdentifier": assertions.Match.array_with([{"Ref": assertions.Match.string_like_regexp(f"ApplicationSubnet{az_count}")}]),
+    })
+
+    # The EIC Endpoint policy allows exactly the cidr's of the ApplicationSubnets.
+    application_subnets = template.find_resources("AWS::EC2::Subnet", {
+        "Properties": {"Tags": assertions.Match.array_with([{"Key": "aws-cdk:subnet-name", "Value": "Application"}])},
+    })
+    application_cidrs = [subnet["Properties"]["CidrBlock"] for subnet in application_subnets.values()]
+    assert len(application_cidrs) == az_count
+    template.has_resource_properties("AWS::IAM::Policy", {
+        "PolicyDocument": {"Statement": assertions.Match.array_with([assertions.Match.object_like({
+            "Sid": "EC2InstanceConnect",
+            "Condition": assertions.Match.object_like({
+                "IpAddress": {"ec2-instance-connect:privateIpAddress": application_cidrs},
+            }),
+        })])},
+    })
+
+
+def test_default_topology_keeps_the_original_cidrs():
+    template = synth_template()
+
+    template.has_resource_properties("AWS::EC2::VPC", {"CidrBlock": "10.0.0.0/20"})
+    template.has_resource_properties("AWS::IAM::Policy", {
+        "PolicyDocument": {"Statement": assertions.Match.array_with([assertions.Match.object_like({
+            "Sid": "EC2InstanceConnect",
+            "Condition": assertions.Match.object_like({
+                "IpAddress": {"ec2-instance-connect:privateIpAddress": ["10.0.2.0/23", "10.0.4.0/23"]},
+            }),
+        })])},
+    })
+
+
+def security_group_rules(template):
+    """Return every security group rule in the template, inline or separate, as (group, direction, peer, port)."""
+    resources = template.to_json()["Resources"]
+    names = {
+        logical_id: resource["Properties"]["GroupName"]
+        for logical_id, resource in resources.items() if resource["Type"] == "AWS::EC2::SecurityGroup"
+    }
+
+    def peer(rule):
+        for key in ("CidrIp", "SourcePrefixListId", "DestinationPrefixListId"):
+            if key in rule:
+                # A prefix list looked up at deploy time is named by its lookup, e.g. S3PrefixList7838D724.
+                return rule[key]["Fn::GetAtt"][0] if isinstance(rule[key], dict) else rule[key]
+        for key in ("SourceSecurityGroupId", "DestinationSecurityGroupId"):
+            if key in rule:
+                return names[rule[key]["Fn::GetAtt"][0]]
+
+    rules = set()
+    for logical_id, resource in resources.items():
+        properties = resource.get("Properties", {})
+        if resource["Type"] == "AWS::EC2::SecurityGroup":
+            rules.update((names[logical_id], "ingress", peer(rule), rule["FromPort"]) for rule in properties.get("SecurityGroupIngress", []))
+            rules.update((names[logical_id], "egress", peer(rule), rule["FromPort"]) for rule in properties.get("SecurityGroupEgress", []))
+        elif resource["Type"] in ("AWS::EC2::SecurityGroupIngress", "AWS::EC2::SecurityGroupEgress"):
+            direction = "ingress" if resource["Type"] == "AWS::EC2::SecurityGroupIngress" else "egress"
+            rules.add((names[properties["GroupId"]["Fn::GetAtt"][0]], direction, peer(properties), properties["FromPort"]))
+    return rules
+
+
+def reachability(template):
+    """Return the connections (source, destination, port) the security groups allow.
+
+    A connection between two groups needs an egress rule on the source and an ingress rule on the destination,
+    0.0.0.0/0 matches every group. Peers outside of the groups (cidr's, prefix lists) only need the one rule.
+    """
+    ingress, egress = {}, {}
+    for group, direction, peer, port in security_group_rules(template):
+        (ingress if direction == "ingress" else egress).setdefault(group, set()).add((peer, port))
+    groups = set(ingress) | set(egress)
+
+    connections = set()
+    for group, rules in ingress.items():
+        connections.update((peer, group, port) for peer, port in rules if peer not in groups)
+    for group, rules in egress.items():
+        connections.update((group, peer, port) for peer, port in rules if peer not in groups and peer != "255.255.255.255/32")
+    for source in groups:
+        for destination in groups - {source}:
+            for peer, port in egress.get(source, ()):
+                if peer in (destination, "0.0.0.0/0") and ingress.get(destination, set()) & {(source, port), ("0.0.0.0/0", port)}:
+                    connections.add((source, destination, port))
+    return connections
+
+
+# The connections allowed by the security group rules before they were generated from the connectivity matrix.
+DEFAULT_REACHABILITY = {
+    ("0.0.0.0/0", "SG_ALB", 80),
+    ("0.0.0.0/0", "SG_EIC_Endpoint", 443),
+    ("SG_ALB", "SG_App", 80),
+    ("SG_App", "0.0.0.0/0", 80),
+    ("SG_App", "0.0.0.0/0", 443),
+    ("SG_App", "SG_ALB", 80),
+    ("SG_App", "SG_EIC_Endpoint", 22),
+    ("SG_App", "SG_EIC_Endpoint", 443),
+    ("SG_App", "SG_RDSdb", 3306),
+    ("SG_EIC_Endpoint", "0.0.0.0/0", 443),
+    ("SG_EIC_Endpoint", "SG_App", 22),
+    ("SG_RDSdb", "SG_App", 3306),
+}
+
+ALL_TIERS_REACHABILITY = {
+    ("0.0.0.0/0", "SG_EIC_Endpoint", 443),
+    ("pl-3b927c52", "SG_ALB", 80),
+    ("SG_ALB", "SG_App", 80),
+    ("SG_App", "0.0.0.0/0", 80),
+    ("SG_App", "0.0.0.0/0", 443),
+    ("SG_App", "SG_Cache", 6379),
+    ("SG_App", "SG_EIC_Endpoint", 22),
+    ("SG_App", "SG_EIC_Endpoint", 443),
+    ("SG_App", "SG_RDSProxy", 3306),
+    ("SG_App", "SG_RDSReplica", 3306),
+    ("SG_EIC_Endpoint", "0.0.0.0/0", 443),
+    ("SG_EIC_Endpoint", "SG_App", 22),
+    ("SG_RDSProxy", "SG_App", 3306),
+    ("SG_RDSProxy", "SG_RDSdb", 3306),
+    ("SG_RDSdb", "SG_RDSProxy", 3306),
+}
+
+
+@pytest.mark.parametrize("context, expected", [
+    ({}, DEFAULT_REACHABILITY),
+    ({
+        "enable_rds_proxy": True,
+        "db_read_replicas": 1,
+        "enable_cache": True,
+        "enable_cloudfront": True,
+        "cloudfront_prefix_list_id": "pl-3b927c52",
+    }, ALL_TIERS_REACHABILITY),
+])
+def test_connectivity_matrix_reachability(context, expected):
+    template = synth_template(context)
+
+    assert reachability(template) == expected
+
+
+def test_connectivity_matrix_rules():
+    template = synth_template()
+
+    # Every rule between two groups is a separate resource, once: the target group doesn't duplicate the rules between
+    # SG_ALB and SG_App it adds itself.
+    separate_rules = (
+        len(template.find_resources("AWS::EC2::SecurityGroupIngress")) +
+        len(template.find_resources("AWS::EC2::SecurityGroupEgress"))
+    )
+    assert separate_rules == 10
+    template.has_resource_properties("AWS::EC2::SecurityGroupIngress", {
+        "GroupId": {"Fn::GetAtt": [assertions.Match.string_like_regexp("SGRDSdb"), "GroupId"]},
+        "SourceSecurityGroupId": security_group_id(template, "SG_App"),
+        "FromPort": 3306,
+    })
+    # The rules of a peer outside of the groups are inlined.
+    template.has_resource_properties("AWS::EC2::SecurityGroup", {
+        "GroupName": "SG_ALB",
+        "SecurityGroupIngress": [assertions.Match.object_like({"CidrIp": "0.0.0.0/0", "FromPort": 80})],
+    })
+
+
+def test_connectivity_matrix_keeps_rules_added_elsewhere():
+    app = core.App(context=AZ_CONTEXT)
     stack = MultiTierArchitectureStack(app, "multi-tier-architecture")
+    stack.SG_ALB.connections.allow_from(ec2.Peer.ipv4("192.0.2.0/24"), ec2.Port.tcp(443))
     template = assertions.Template.from_stack(stack)
 
-#     template.has_resource_properties("AWS::SQS::Queue", {
-#         "VisibilityTimeout": 300
-#     })
+    template.has_resource_properties("AWS::EC2::SecurityGroup", {
+        "GroupName": "SG_ALB",
+        "SecurityGroupIngress": assertions.Match.array_with([
+            assertions.Match.object_like({"CidrIp": "0.0.0.0/0", "FromPort": 80}),
+            assertions.Match.object_like({"CidrIp": "192.0.2.0/24", "FromPort": 443}),
+        ]),
+    })
+
+
+def test_fast_target_onboarding_by_default():
+    template = synth_template()
+
+    template.has_resource_properties("AWS::ElasticLoadBalancingV2::TargetGroup", {
+        "HealthCheckPath": "/health",
+        "HealthCheckIntervalSeconds": 5,
+        "HealthCheckTimeoutSeconds": 2,
+        "HealthyThresholdCount": 2,
+        "UnhealthyThresholdCount": 3,
+        "TargetGroupAttributes": assertions.Match.array_with([
+            {"Key": "deregistration_delay.timeout_seconds", "Value": "30"},
+            {"Key": "load_balancing.algorithm.type", "Value": "least_outstanding_requests"},
+        ]),
+    })
+    assert "echo \"OK\" > /var/www/html/health" in launch_template_user_data(template)[0]
+
+
+def test_standard_target_onboarding_with_slow_start():
+    template = synth_template({
+        "target_onboarding": "standard",
+        "target_slow_start": 60,
+        "target_deregistration_delay": 120,
+    })
+
+    template.has_resource_properties("AWS::ElasticLoadBalancingV2::TargetGroup", {
+        "HealthCheckPath": "/",
+        "HealthCheckIntervalSeconds": 30,
+        "HealthyThresholdCount": 5,
+        "TargetGroupAttributes": assertions.Match.array_with([
+            {"Key": "deregistration_delay.timeout_seconds", "Value": "120"},
+            {"Key": "slow_start.duration_seconds", "Value": "60"},
+            {"Key": "load_balancing.algorithm.type", "Value": "round_robin"},
+        ]),
+    })
+
+
+def test_slow_start_requires_round_robin():
+    with pytest.raises(ValueError, match="target_slow_start"):
+        synth_template({"target_slow_start": 60})
+
+
+def test_web_server_installed_at_boot_without_golden_ami():
+    template = synth_template()
+
+    template.resource_count_is("AWS::ImageBuilder::ImagePipeline", 0)
+    user_data = "".join(part for part in launch_template_user_data(template) if isinstance(part, str))
+    assert "dnf install -y httpd" in user_data
+    assert user_data.index("dnf install -y httpd") < user_data.index("systemctl start httpd")
+
+
+def test_golden_ami_pipeline():
+    template = synth_template({"enable_golden_ami": True})
+
+    template.resource_count_is("AWS::ImageBuilder::Image", 1)
+    template.has_resource_properties("AWS::ImageBuilder::ImagePipeline", {
+        "Schedule": {
+            "ScheduleExpression": "cron(0 3 ? * sun *)",
+            "PipelineExecutionStartCondition": "EXPRESSION_MATCH_AND_DEPENDENCY_UPDATES_AVAILABLE",
+        },
+    })
+    template.has_resource_properties("AWS::ImageBuilder::DistributionConfiguration", {
+        "Distributions": [assertions.Match.object_like({
+            "SsmParameterConfigurations": [{"ParameterName": "/multi-tier-architecture/golden-ami", "DataType": "aws:ec2:image"}],
+        })],
+    })
+    component = next(iter(template.find_resources("AWS::ImageBuilder::Component").values()))
+    assert "dnf install -y httpd" in component["Properties"]["Data"]
+
+    # The application tier launches from the golden AMI, the user data only holds the per-instance configuration.
+    template.has_resource_properties("AWS::EC2::LaunchTemplate", {
+        "LaunchTemplateData": assertions.Match.object_like({
+            "ImageId": "resolve:ssm:/multi-tier-architecture/golden-ami",
+        }),
+    })
+    launch_template = next(iter(template.find_resources("AWS::EC2::LaunchTemplate").values()))
+    assert any(dependency.startswith("AppGoldenImage") for dependency in launch_template["DependsOn"])
+    assert "dnf" not in launch_template_user_data(template)[0]
+    assert ("SG_ImageBuilder", "0.0.0.0/0", 443) in reachability(template)
+
+
+def test_web_server_tuned_for_instance_type_and_alb():
+    template = synth_template({"app_instance_type": "m5.large", "alb_idle_timeout": 120})
+
+    template.has_resource_properties("AWS::EC2::LaunchTemplate", {
+        "LaunchTemplateData": assertions.Match.object_like({"InstanceType": "m5.large"}),
+    })
+    template.has_resource_properties("AWS::ElasticLoadBalancingV2::LoadBalancer", {
+        "LoadBalancerAttributes": assertions.Match.array_with([{"Key": "idle_timeout.timeout_seconds", "Value": "120"}]),
+    })
+    user_data = launch_template_user_data(template)[0]
+    assert "LoadModule mpm_event_module" in user_data
+    assert "MaxRequestWorkers 100\n" in user_data
+    assert "KeepAliveTimeout 125\n" in user_data
+
+
+@pytest.mark.parametrize("az_count", [2, 3])
+def test_gateway_endpoints_route_every_application_subnet(az_count):
+    template = synth_template({"az_count": az_count}, env=ENV)
+
+    for service in ("s3", "dynamodb"):
+        endpoint = next(
+            resource for resource in template.find_resources("AWS::EC2::VPCEndpoint").values()
+            if service in str(resource["Properties"]["ServiceName"])
+        )
+        assert endpoint["Properties"]["VpcEndpointType"] == "Gateway"
+        route_tables = [route_table["Ref"] for route_table in endpoint["Properties"]["RouteTableIds"]]
+        assert len(route_tables) == az_count
+        assert all("Application" in route_table for route_table in route_tables)
+    # The application tier keeps its internet egress by default, no prefix list lookups needed.
+    template.resource_count_is("Custom::AWS", 0)
+
+
+def test_interface_endpoints_in_every_application_subnet():
+    template = synth_template({"az_count": 3, "vpc_interface_endpoints": "ssm,logs,secretsmanager,ecr.api,ecr.dkr"}, env=ENV)
+
+    interface_endpoints = [
+        resource["Properties"] for resource in template.find_resources("AWS::EC2::VPCEndpoint").values()
+        if resource["Properties"]["VpcEndpointType"] == "Interface"
+    ]
+    assert len(interface_endpoints) == 5
+    for endpoint in interface_endpoints:
+        assert endpoint["PrivateDnsEnabled"] is True
+        assert len(endpoint["SubnetIds"]) == 3
+        assert all("Application" in subnet["Ref"] for subnet in endpoint["SubnetIds"])
+        assert endpoint["SecurityGroupIds"] == [security_group_id(template, "SG_VpcEndpoints")]
+    assert ingress_sources(template, "SG_VpcEndpoints") == ["SG_App"]
+
+
+def test_app_tier_without_internet_egress():
+    template = synth_template({
+        "vpc_interface_endpoints": "ssm",
+        "app_internet_egress": False,
+        "s3_prefix_list_id": "pl-63a5400a",
+        "dynamodb_prefix_list_id": "pl-02cd2c6b",
+    })
+
+    egress = {(peer, port) for group, direction, peer, port in security_group_rules(template)
+              if group == "SG_App" and direction == "egress"}
+    assert ("pl-63a5400a", 443) in egress
+    assert ("pl-02cd2c6b", 443) in egress
+    assert ("SG_VpcEndpoints", 443) in egress
+    assert not any(peer == "0.0.0.0/0" for peer, port in egress)
+
+
+def test_unknown_vpc_endpoint():
+    with pytest.raises(ValueError, match="interface endpoint 'sns'"):
+        synth_template({"vpc_interface_endpoints": "sns"})
+
+
+def alarm(template, alarm_id):
+    """Return the properties of the alarm with construct id 'alarm_id' in the Monitoring construct."""
+    alarms = template.find_resources("AWS::CloudWatch::Alarm")
+    return next(resource["Properties"] for logical_id, resource in alarms.items() if logical_id.startswith(f"Monitoring{alarm_id}"))
+
+
+def alarm_metric(properties):
+    """Return (metric name, statistic, dimensions) of a single metric alarm, labeled metrics are rendered as 'Metrics'."""
+    if "Metrics" in properties:
+        metric_stat = properties["Metrics"][0]["MetricStat"]
+        return metric_stat["Metric"]["MetricName"], metric_stat["Stat"], metric_stat["Metric"]["Dimensions"]
+    return properties["MetricName"], properties.get("ExtendedStatistic", properties.get("Statistic")), properties["Dimensions"]
+
+
+def test_performance_dashboard_and_alarms():
+    template = synth_template({"alarm_p99_latency": "0.5", "alarm_email": "ops@example.com"})
+
+    template.resource_count_is("AWS::CloudWatch::Dashboard", 1)
+    template.has_resource_properties("AWS::SNS::Subscription", {"Protocol": "email", "Endpoint": "ops@example.com"})
+
+    latency = alarm(template, "LatencyP99Alarm")
+    assert alarm_metric(latency)[:2] == ("TargetResponseTime", "p99")
+    assert latency["Threshold"] == 0.5
+    assert latency["AlarmActions"][0]["Ref"].startswith("MonitoringAlarmTopic")
+
+    # The alarm on the healthy hosts defaults to the minimum capacity of the Auto Scaling Group.
+    healthy_hosts = alarm(template, "HealthyHostsAlarm")
+    assert (healthy_hosts["Threshold"], healthy_hosts["ComparisonOperator"]) == (2, "LessThanThreshold")
+
+    assert alarm(template, "ErrorRateAlarm")["Metrics"][0]["Expression"].startswith("100 * (")
+    assert alarm_metric(alarm(template, "DbCpuCreditsAlarm"))[0] == "CPUCreditBalance"
+    for alarm_id in ("RejectedConnectionsAlarm", "DbConnectionsAlarm", "DbReadLatencyAlarm", "DbWriteLatencyAlarm"):
+        alarm(template, alarm_id)
+
+
+def test_aurora_serverless_alarms_on_acu_utilization():
+    template = synth_template({"db_engine": "aurora-serverless"})
+
+    acu_utilization = alarm(template, "DbAcuUtilizationAlarm")
+    [dimension] = alarm_metric(acu_utilization)[2]
+    assert dimension["Name"] == "DBClusterIdentifier"
+    assert dimension["Value"]["Ref"].startswith("RDSdb")
+    assert not any(logical_id.startswith("MonitoringDbCpuCredits") for logical_id in template.find_resources("AWS::CloudWatch::Alarm"))
+
+
+def test_monitoring_can_be_disabled():
+    template = synth_template({"enable_monitoring": False})
+
+    template.resource_count_is("AWS::CloudWatch::Dashboard", 0)
+    template.resource_count_is("AWS::CloudWatch::Alarm", 0)
+
+
+def test_instrumentation():
+    template = synth_template({
+        "enable_instrumentation": True,
+        "app_internet_egress": False,
+        "s3_prefix_list_id": "pl-63a5400a",
+        "dynamodb_prefix_list_id": "pl-02cd2c6b",
+    })
+
+    template.has_resource_properties("AWS::IAM::Role", {
+        "ManagedPolicyArns": [
+            {"Fn::Join": ["", ["arn:", {"Ref": "AWS::Partition"}, ":iam::aws:policy/CloudWatchAgentServerPolicy"]]},
+            {"Fn::Join": ["", ["arn:", {"Ref": "AWS::Partition"}, ":iam::aws:policy/AWSXrayWriteOnlyAccess"]]},
+        ],
+    })
+    template.has_resource_properties("AWS::EC2::LaunchTemplate", {
+        "LaunchTemplateData": assertions.Match.object_like({
+            "IamInstanceProfile": assertions.Match.object_like({"Arn": assertions.Match.any_value()}),
+        }),
+    })
+    template.has_resource_properties("AWS::Logs::LogGroup", {
+        "LogGroupName": "/multi-tier-architecture/httpd/timing",
+        "RetentionInDays": 14,
+    })
+
+    user_data = "".join(part for part in launch_template_user_data(template) if isinstance(part, str))
+    assert "dnf install -y amazon-cloudwatch-agent" in user_data
+    assert "\nOTEL_EXPORTER_OTLP_ENDPOINT=http://127.0.0.1:4318\n" in user_data
+
+    # Without internet egress the agent uses interface endpoints.
+    services = [
+        str(resource["Properties"]["ServiceName"]) for resource in template.find_resources("AWS::EC2::VPCEndpoint").values()
+        if resource["Properties"]["VpcEndpointType"] == "Interface"
+    ]
+    assert len(services) == 3
+    assert all(any(f".{name}'" in service for service in services) for name in ("logs", "monitoring", "xray"))
+
+
+def test_alb_access_logs():
+    template = synth_template({"enable_alb_access_logs": True, "alb_access_logs_retention_days": 7}, env=ENV)
+
+    template.has_resource_properties("AWS::ElasticLoadBalancingV2::LoadBalancer", {
+        "LoadBalancerAttributes": assertions.Match.array_with([
+            {"Key": "access_logs.s3.enabled", "Value": "true"},
+            {"Key": "access_logs.s3.prefix", "Value": "alb"},
+        ]),
+    })
+    template.has_resource_properties("AWS::S3::Bucket", {
+        "LifecycleConfiguration": {"Rules": [{"ExpirationInDays": 7, "Status": "Enabled"}]},
+    })
+
+    [table] = template.find_resources("AWS::Glue::Table").values()
+    table_input = table["Properties"]["TableInput"]
+    assert table_input["PartitionKeys"] == [{"Name": "day", "Type": "string"}]
+    assert table_input["Parameters"]["projection.enabled"] == "true"
+    assert table_input["Parameters"]["projection.day.format"] == "yyyy/MM/dd"
+    location_template = "".join(part for part in table_input["Parameters"]["storage.location.template"]["Fn::Join"][1]
+                                if isinstance(part, str))
+    assert location_template.endswith("/alb/AWSLogs/123456789012/elasticloadbalancing/us-east-1/${day}")
+    template.resource_count_is("AWS::Athena::NamedQuery", 2)
+
+
+def test_alb_access_logs_require_a_region():
+    with pytest.raises(ValueError, match="requires a stack with a region"):
+        synth_template({"enable_alb_access_logs": True})
+
+
+@pytest.mark.parametrize("profile, app_instance_type, db_instance_class, cpu_type, cpu_credits", [
+    ("burstable", "t2.micro", "db.t3.micro", "x86_64", "unlimited"),
+    ("graviton-burstable", "t4g.small", "db.t4g.micro", "arm64", "unlimited"),
+    ("general-purpose", "m7i.large", "db.m6i.large", "x86_64", None),
+    ("graviton", "m7g.large", "db.m7g.large", "arm64", None),
+])
+def test_instance_profiles(profile, app_instance_type, db_instance_class, cpu_type, cpu_credits):
+    template = synth_template({"instance_profile": profile})
+
+    [launch_template] = template.find_resources("AWS::EC2::LaunchTemplate").values()
+    launch_template_data = launch_template["Properties"]["LaunchTemplateData"]
+    assert launch_template_data["InstanceType"] == app_instance_type
+    assert launch_template_data.get("CreditSpecification") == ({"CpuCredits": cpu_credits} if cpu_credits else None)
+    template.has_resource_properties("AWS::RDS::DBInstance", {"DBInstanceClass": db_instance_class})
+
+    # The Amazon Linux 2023 AMI of the architecture of the application instances.
+    [ami_parameter] = [
+        parameter for parameter in template.find_parameters("*").values()
+        if "ami-amazon-linux-latest" in parameter.get("Default", "")
+    ]
+    assert ami_parameter["Default"].endswith(cpu_type)
+
+
+def test_graviton_golden_ami():
+    template = synth_template({"instance_profile": "graviton", "enable_golden_ami": True})
+
+    [recipe] = template.find_resources("AWS::ImageBuilder::ImageRecipe").values()
+    assert "image/amazon-linux-2023-arm64/x.x.x" in "".join(
+        part for part in recipe["Properties"]["ParentImage"]["Fn::Join"][1] if isinstance(part, str))
+    template.has_resource_properties("AWS::ImageBuilder::InfrastructureConfiguration", {"InstanceTypes": ["t4g.small"]})
+
+    with pytest.raises(ValueError, match="must be arm64"):
+        synth_template({"instance_profile": "graviton", "enable_golden_ami": True, "golden_ami_build_instance_type": "t3.small"})
+
+
+def test_app_volume_throughput_and_cpu_credits():
+    template = synth_template({"app_volume_iops": 6000, "app_volume_throughput": 500, "app_cpu_credits": "standard"})
+
+    template.has_resource_properties("AWS::EC2::LaunchTemplate", {
+        "LaunchTemplateData": assertions.Match.object_like({
+            "BlockDeviceMappings": [assertions.Match.object_like({
+                "Ebs": assertions.Match.object_like({"VolumeType": "gp3", "Iops": 6000, "Throughput": 500}),
+            })],
+            "CreditSpecification": {"CpuCredits": "standard"},
+        }),
+    })
+
+    with pytest.raises(ValueError, match="requires a burstable app_instance_type"):
+        synth_template({"instance_profile": "graviton", "app_cpu_credits": "unlimited"})
+
+
+def test_worker_tier_disabled_by_default():
+    template = synth_template()
+
+    template.resource_count_is("AWS::SQS::Queue", 0)
+    template.resource_count_is("AWS::AutoScaling::AutoScalingGroup", 1)
+    assert not [role for role in template.find_resources("AWS::IAM::Role") if "InstanceRole" in role]
+
+
+def test_sqs_queue_created():
+    template = synth_template({"enable_worker_tier": True, "worker_max_receive_count": 3})
+
+    # The work queue and its dead-letter queue.
+    template.resource_count_is("AWS::SQS::Queue", 2)
+    template.has_resource_properties("AWS::SQS::Queue", {
+        "VisibilityTimeout": 300,
+        "ReceiveMessageWaitTimeSeconds": 20,
+        "RedrivePolicy": {
+            "deadLetterTargetArn": {"Fn::GetAtt": [assertions.Match.string_like_regexp("WorkDeadLetterQueue"), "Arn"]},
+            "maxReceiveCount": 3,
+        },
+    })
+    template.has_resource_properties("AWS::SQS::Queue", {"MessageRetentionPeriod": 14 * 24 * 3600})
+
+    # The web tier sends to the queue and gets its url, the worker tier consumes it.
+    template.has_resource_properties("AWS::IAM::Policy", {
+        "Roles": [{"Ref": assertions.Match.string_like_regexp("AppInstanceRole")}],
+        "PolicyDocument": {"Statement": assertions.Match.array_with([assertions.Match.object_like({
+            "Action": assertions.Match.array_with(["sqs:SendMessage"]),
+        })])},
+    })
+    template.has_resource_properties("AWS::IAM::Policy", {
+        "Roles": [{"Ref": assertions.Match.string_like_regexp("WorkerInstanceRole")}],
+        "PolicyDocument": {"Statement": assertions.Match.array_with([assertions.Match.object_like({
+            "Action": assertions.Match.array_with(["sqs:ReceiveMessage", "sqs:DeleteMessage"]),
+        })])},
+    })
+    app_user_data = template.find_resources("AWS::EC2::LaunchTemplate", {
+        "Properties": {"LaunchTemplateData": {"SecurityGroupIds": [security_group_id(template, "SG_App")]}},
+    })
+    assert "WORK_QUEUE_URL=" in json.dumps(next(iter(app_user_data.values())))
+
+
+def test_worker_tier_scales_on_queue_depth_and_message_age():
+    template = synth_template({"enable_worker_tier": True, "worker_max_capacity": 8, "worker_max_message_age": 120})
+
+    template.resource_count_is("AWS::AutoScaling::AutoScalingGroup", 2)
+    template.has_resource_properties("AWS::AutoScaling::AutoScalingGroup", {
+        "MinSize": "1",
+        "MaxSize": "8",
+        "LaunchTemplate": assertions.Match.object_like({
+            "LaunchTemplateId": {"Ref": assertions.Match.string_like_regexp("WorkerLaunchTemplate")},
+        }),
+        "TargetGroupARNs": assertions.Match.absent(),
+    })
+
+    scaling_alarms = {
+        (alarm["Properties"]["MetricName"], alarm["Properties"]["ComparisonOperator"], alarm["Properties"]["Threshold"])
+        for alarm in template.find_resources("AWS::CloudWatch::Alarm").values()
+        if alarm["Properties"].get("Namespace") == "AWS/SQS"
+    }
+    assert scaling_alarms == {
+        ("ApproximateNumberOfMessagesVisible", "GreaterThanOrEqualToThreshold", 100),
+        ("ApproximateNumberOfMessagesVisible", "LessThanOrEqualToThreshold", 0),
+        ("ApproximateAgeOfOldestMessage", "GreaterThanOrEqualToThreshold", 120),
+    }
+    # Every scaling step changes the capacity, the booting workers count as capacity for 2 minutes.
+    policies = template.find_resources("AWS::AutoScaling::ScalingPolicy", {"Properties": {"PolicyType": "StepScaling"}})
+    assert len(policies) == 3
+    for policy in policies.values():
+        assert policy["Properties"]["EstimatedInstanceWarmup"] == 120
+        assert "Cooldown" not in policy["Properties"]
+        assert all(step["ScalingAdjustment"] != 0 for step in policy["Properties"]["StepAdjustments"])
+
+
+def test_worker_tier_runs_the_worker_service():
+    template = synth_template({"enable_worker_tier": True, "enable_golden_ami": True, "worker_command": "/opt/app/bin/worker"})
+
+    worker_user_data = json.dumps(template.find_resources("AWS::EC2::LaunchTemplate", {
+        "Properties": {"LaunchTemplateData": {"SecurityGroupIds": [security_group_id(template, "SG_Worker")]}},
+    }))
+    assert "ExecStart=/opt/app/bin/worker" in worker_user_data
+    assert "systemctl disable --now httpd" in worker_user_data
+    assert "dnf update" not in worker_user_data
+
+
+def test_worker_tier_connectivity():
+    template = synth_template({"enable_worker_tier": True})
+    connections = reachability(template)
+
+    assert connections - DEFAULT_REACHABILITY == {
+        ("SG_Worker", "SG_RDSdb", 3306),
+        ("SG_RDSdb", "SG_Worker", 3306),
+        ("SG_EIC_Endpoint", "SG_Worker", 22),
+        ("SG_Worker", "SG_EIC_Endpoint", 22),
+        ("SG_Worker", "SG_EIC_Endpoint", 443),
+        ("SG_Worker", "0.0.0.0/0", 80),
+        ("SG_Worker", "0.0.0.0/0", 443),
+        ("SG_Worker", "SG_ALB", 80),
+    }
+    assert ingress_sources(template, "SG_Worker") == ["SG_EIC_Endpoint", "SG_RDSdb"]
+
+    # Through RDS Proxy like the application tier, and only SQS through the VPC endpoints without internet egress.
+    template = synth_template({
+        "enable_worker_tier": True,
+        "enable_rds_proxy": True,
+        "app_internet_egress": False,
+        "s3_prefix_list_id": "pl-63a5400a",
+        "dynamodb_prefix_list_id": "pl-02cd2c6b",
+    })
+    egress = {(peer, port) for group, direction, peer, port in security_group_rules(template)
+              if group == "SG_Worker" and direction == "egress"}
+    assert egress == {("SG_RDSProxy", 3306), ("SG_EIC_Endpoint", 22), ("SG_VpcEndpoints", 443),
+                      ("pl-63a5400a", 443), ("pl-02cd2c6b", 443)}
+    template.resource_count_is("AWS::EC2::VPCEndpoint", 3)
+    assert ingress_sources(template, "SG_VpcEndpoints") == ["SG_App", "SG_Worker"]
+
+    # The workers read from the replicas like the application tier (DB_READER_ENDPOINTS).
+    connections = reachability(synth_template({"enable_worker_tier": True, "db_read_replicas": 1}))
+    assert {("SG_Worker", "SG_RDSReplica", 3306), ("SG_RDSReplica", "SG_Worker", 3306)} <= connections
+
+
+def test_worker_instance_type_must_match_app_architecture():
+    with pytest.raises(ValueError, match="worker_instance_type 'm7g.large' must be x86_64"):
+        synth_template({"enable_worker_tier": True, "worker_instance_type": "m7g.large"})
+
+
+SPLIT_CONTEXTS = [
+    {},
+    {
+        "enable_rds_proxy": True,
+        "db_read_replicas": 2,
+        "enable_cache": True,
+        "enable_cloudfront": True,
+        "enable_golden_ami": True,
+        "enable_instrumentation": True,
+        "enable_alb_access_logs": True,
+        "enable_worker_tier": True,
+        "app_internet_egress": False,
+    },
+    {"db_engine": "aurora-serverless", "db_read_replicas": 1, "enable_rds_proxy": True},
+]
+
+
+@pytest.mark.parametrize("context", SPLIT_CONTEXTS)
+def test_split_stacks_match_single_stack(context):
+    app = core.App(context={**AZ_CONTEXT, **context})
+    single_stack = assertions.Template.from_stack(MultiTierArchitectureStack(app, "MultiTierArchitectureStack", env=ENV))
+    single = single_stack.to_json()["Resources"]
+    split = synth_split_templates(context, env=ENV)
+    split_resources = {
+        logical_id: resource
+        for template in split.values() for logical_id, resource in template.to_json()["Resources"].items()
+    }
+
+    # The same resources.
+    assert Counter(resource["Type"] for resource in split_resources.values()) == Counter(
+        resource["Type"] for resource in single.values())
+
+    # With the same logical ids, except the separate security group rules: their ids contain the stack name of the
+    # peer group, MultiTierArchitectureStack or MultiTierArchitectureNetwork.
+    rule_types = {"AWS::EC2::SecurityGroupIngress", "AWS::EC2::SecurityGroupEgress"}
+    changed = set(split_resources) ^ set(single)
+    assert {(split_resources.get(logical_id) or single[logical_id])["Type"] for logical_id in changed} <= rule_types
+    assert all("MultiTierArchitectureNetwork" in logical_id for logical_id in set(split_resources) - set(single))
+
+    # Every security group and rule is in the network stack, so the tiers reach each other like before.
+    assert reachability(split["network"]) == reachability(single_stack)
+
+
+def test_split_stacks_by_tier():
+    split = synth_split_templates(SPLIT_CONTEXTS[1], env=ENV)
+    types = {name: {resource["Type"] for resource in template.to_json()["Resources"].values()} for name, template in split.items()}
+
+    assert {"AWS::EC2::VPC", "AWS::EC2::NatGateway", "AWS::EC2::SecurityGroup", "AWS::EC2::VPCEndpoint",
+            "AWS::EC2::InstanceConnectEndpoint"} <= types["network"]
+    assert {"AWS::RDS::DBInstance", "AWS::RDS::DBProxy", "AWS::ElastiCache::ReplicationGroup"} <= types["data"]
+    assert {"AWS::AutoScaling::AutoScalingGroup", "AWS::ElasticLoadBalancingV2::LoadBalancer",
+            "AWS::CloudFront::Distribution", "AWS::ImageBuilder::ImagePipeline", "AWS::CloudWatch::Dashboard",
+            "AWS::SQS::Queue"} <= types["app"]
+    assert not types["app"] & {"AWS::EC2::VPC", "AWS::EC2::SecurityGroup", "AWS::RDS::DBInstance"}
+    assert not types["data"] & {"AWS::EC2::VPC", "AWS::EC2::SecurityGroup"}
+
+
+def test_app_tier_changes_leave_network_and_data_stacks_unchanged():
+    before = synth_split_templates()
+    after = synth_split_templates({"web_server_mpm": "worker", "alb_idle_timeout": 120, "alarm_p99_latency": 0.5})
+
+    assert after["network"].to_json() == before["network"].to_json()
+    assert after["data"].to_json() == before["data"].to_json()
+    assert after["app"].to_json() != before["app"].to_json()
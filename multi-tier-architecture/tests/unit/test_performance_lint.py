@@ -0,0 +1,95 @@
+import pytest
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+
+from multi_tier_architecture.multi_tier_architecture_stack import MultiTierArchitectureStack
+from multi_tier_architecture.performance_lint import RULES, PerformanceLint
+
+
+def lint_findings(context=None):
+    """Synthesize the stack with the performance lint, like app.py does, and return its findings by severity."""
+    app = core.App(context=context or {})
+    stack = MultiTierArchitectureStack(app, "multi-tier-architecture")
+    core.Aspects.of(app).add(PerformanceLint.from_context(app))
+    annotations = assertions.Annotations.from_stack(stack)
+
+    findings = {}
+    for severity, messages in (
+        ("error", annotations.find_error("*", assertions.Match.string_like_regexp("performance-lint"))),
+        ("warning", annotations.find_warning("*", assertions.Match.string_like_regexp("performance-lint"))),
+        ("info", annotations.find_info("*", assertions.Match.string_like_regexp("performance-lint"))),
+    ):
+        for message in messages:
+            rule = message.entry.data.split("]")[0].removeprefix("[performance-lint:")
+            findings.setdefault(severity, []).append((rule, message.id))
+    return findings
+
+
+def test_default_stack_only_has_a_single_az_burstable_database():
+    assert lint_findings() == {"warning": [("single-az-burstable-database", "/multi-tier-architecture/RDSdb/Resource")]}
+
+
+def test_anti_patterns_are_reported():
+    findings = lint_findings({
+        "target_onboarding": "standard",
+        "app_cpu_credits": "standard",
+        "vpc_gateway_endpoints": "",
+    })
+
+    assert sorted(findings["warning"]) == [
+        ("burstable-standard-credits", "/multi-tier-architecture/AppLaunchTemplate/Resource"),
+        ("nat-without-vpc-endpoints", "/multi-tier-architecture"),
+        ("round-robin-balancing", "/multi-tier-architecture/TargetGroup/Resource"),
+        ("single-az-burstable-database", "/multi-tier-architecture/RDSdb/Resource"),
+        ("slow-health-check", "/multi-tier-architecture/TargetGroup/Resource"),
+    ]
+
+
+def test_non_burstable_multi_az_database_is_clean():
+    assert lint_findings({"instance_profile": "general-purpose"}) == {}
+    assert lint_findings({"db_multi_az": True}) == {}
+    assert lint_findings({"db_engine": "aurora-serverless", "db_read_replicas": 1}) == {}
+
+
+def test_storage_autoscaling_off():
+    findings = lint_findings({"instance_profile": "general-purpose", "db_max_allocated_storage": 20})
+
+    assert findings == {"warning": [("no-storage-autoscaling", "/multi-tier-architecture/RDSdb/Resource")]}
+
+
+def test_severity_and_suppressions():
+    context = {
+        "target_onboarding": "standard",
+        "performance_lint_severity": "round-robin-balancing=error,slow-health-check=info",
+        "performance_lint_suppressions": "single-az-burstable-database",
+    }
+    assert lint_findings(context) == {
+        "error": [("round-robin-balancing", "/multi-tier-architecture/TargetGroup/Resource")],
+        "info": [("slow-health-check", "/multi-tier-architecture/TargetGroup/Resource")],
+    }
+
+    # A suppression with a path only applies to that construct and its children.
+    context = {
+        "target_onboarding": "standard",
+        "performance_lint_severity": {"slow-health-check": "off"},
+        "performance_lint_suppressions": ["round-robin-balancing:multi-tier-architecture/TargetGroup",
+                                          "single-az-burstable-database:multi-tier-architecture/Target"],
+    }
+    assert lint_findings(context) == {
+        "warning": [("single-az-burstable-database", "/multi-tier-architecture/RDSdb/Resource")],
+    }
+
+
+@pytest.mark.parametrize("severities, suppressions, message", [
+    ({"slow-healthcheck": "error"}, [], "Unknown performance lint rule 'slow-healthcheck'"),
+    ({"slow-health-check": "fatal"}, [], "Unknown severity 'fatal'"),
+    ({}, ["t2-micro:multi-tier-architecture/AppASG"], "suppression 't2-micro:"),
+])
+def test_unknown_rules_and_severities(severities, suppressions, message):
+    with pytest.raises(ValueError, match=message):
+        PerformanceLint(severities, suppressions)
+
+
+def test_every_rule_defaults_to_a_warning():
+    assert set(PerformanceLint().severities.values()) == {"warning"}
+    assert PerformanceLint().severities.keys() == RULES.keys()
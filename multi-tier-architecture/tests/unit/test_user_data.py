@@ -0,0 +1,163 @@
+import json
+import subprocess
+
+import pytest
+
+from multi_tier_architecture.user_data import (
+    WORKER_PLACEHOLDER_SCRIPT,
+    WORKER_SCRIPT,
+    WebServerConfig,
+    instance_architecture,
+    instance_vcpus,
+    render_cloudwatch_agent_config,
+    render_install_script,
+    render_instrumentation_conf,
+    render_mpm_conf,
+    render_performance_conf,
+    render_user_data,
+    render_worker_user_data,
+)
+
+
+@pytest.mark.parametrize("instance_type, vcpus", [
+    ("t2.micro", 1),
+    ("t3.micro", 2),
+    ("t4g.medium", 2),
+    ("m6g.medium", 1),
+    ("m5.large", 2),
+    ("c7g.xlarge", 4),
+    ("m5.4xlarge", 16),
+])
+def test_instance_vcpus(instance_type, vcpus):
+    assert instance_vcpus(instance_type) == vcpus
+
+
+@pytest.mark.parametrize("instance_type, architecture", [
+    ("t2.micro", "x86_64"),
+    ("m7i.large", "x86_64"),
+    ("g5.xlarge", "x86_64"),
+    ("t4g.small", "arm64"),
+    ("m7gd.large", "arm64"),
+    ("c7gn.xlarge", "arm64"),
+    ("a1.medium", "arm64"),
+])
+def test_instance_architecture(instance_type, architecture):
+    assert instance_architecture(instance_type) == architecture
+
+
+def test_unknown_instance_size():
+    with pytest.raises(ValueError, match="m5.metal"):
+        instance_vcpus("m5.metal")
+
+
+def test_event_mpm_sized_for_instance_type():
+    small = WebServerConfig.for_instance_type("t2.micro", alb_idle_timeout=60)
+    large = WebServerConfig.for_instance_type("m5.2xlarge", alb_idle_timeout=60)
+
+    assert (small.server_limit, small.threads_per_child, small.max_request_workers) == (2, 25, 50)
+    assert (large.server_limit, large.threads_per_child, large.max_request_workers) == (16, 25, 400)
+
+    mpm_conf = render_mpm_conf(large)
+    assert mpm_conf.startswith("LoadModule mpm_event_module modules/mod_mpm_event.so\n")
+    assert "    ServerLimit 16\n" in mpm_conf
+    assert "    MaxRequestWorkers 400\n" in mpm_conf
+
+
+def test_prefork_mpm_has_a_thread_per_process():
+    config = WebServerConfig.for_instance_type("t3.micro", alb_idle_timeout=60, mpm="prefork")
+
+    assert config.threads_per_child == 1
+    assert config.max_request_workers == config.server_limit
+    assert "ThreadsPerChild" not in render_mpm_conf(config)
+
+
+def test_unknown_mpm():
+    with pytest.raises(ValueError, match="mpm"):
+        WebServerConfig.for_instance_type("t3.micro", alb_idle_timeout=60, mpm="winnt")
+
+
+def test_keep_alive_outlasts_alb_idle_timeout():
+    config = WebServerConfig.for_instance_type("t3.micro", alb_idle_timeout=120)
+
+    assert "KeepAliveTimeout 125\n" in render_performance_conf(config)
+
+
+def test_compression_and_cache_headers():
+    performance_conf = render_performance_conf(WebServerConfig.for_instance_type("t3.micro", 60, static_max_age=3600))
+
+    assert "AddOutputFilterByType BROTLI_COMPRESS;DEFLATE text/html" in performance_conf
+    assert "AddOutputFilterByType DEFLATE text/html" in performance_conf
+    assert 'Header set Cache-Control "public, max-age=3600"' in performance_conf
+
+    no_compression = WebServerConfig.for_instance_type("t3.micro", 60, compression=False)
+    assert "DEFLATE" not in render_performance_conf(no_compression)
+
+
+def test_user_data_is_valid_bash():
+    install_script = render_install_script(WebServerConfig.for_instance_type("t3.micro", alb_idle_timeout=60))
+
+    for script in (install_script, render_user_data({"DB_WRITER_ENDPOINT": "db"}, install_script=install_script)):
+        assert script.startswith("#!/bin/bash\n")
+        assert script.count("#!/bin/bash") == 1
+        subprocess.run(["bash", "-n"], input=script, text=True, check=True)
+
+
+def test_user_data_runs_install_script_first():
+    install_script = render_install_script(WebServerConfig.for_instance_type("t3.micro", alb_idle_timeout=60))
+
+    user_data = render_user_data({"DB_WRITER_ENDPOINT": "db"}, install_script=install_script)
+    assert user_data.index("dnf install -y httpd") < user_data.index("DB_WRITER_ENDPOINT=db\n") < user_data.index("systemctl start httpd")
+    assert "dnf" not in render_user_data({"DB_WRITER_ENDPOINT": "db"})
+
+
+def test_worker_user_data_writes_environment_without_web_server():
+    user_data = render_worker_user_data({"DB_WRITER_ENDPOINT": "db", "WORK_QUEUE_URL": "https://sqs/queue"})
+
+    assert user_data.startswith("#!/bin/bash\n")
+    assert "sudo dnf update -y" in user_data
+    assert "DB_WRITER_ENDPOINT=db\nWORK_QUEUE_URL=https://sqs/queue\n" in user_data
+    assert "httpd" not in user_data
+    # The placeholder worker runs as a service with the environment of /etc/app.env.
+    assert f"cat > {WORKER_SCRIPT} <<'EOF'" in user_data
+    assert f"EnvironmentFile=/etc/app.env\nExecStart={WORKER_SCRIPT}\n" in user_data
+    assert user_data.index("/etc/app.env <<'EOF'") < user_data.index("systemctl enable --now app-worker")
+    subprocess.run(["bash", "-n"], input=user_data, text=True, check=True)
+    subprocess.run(["bash", "-n"], input=WORKER_PLACEHOLDER_SCRIPT, text=True, check=True)
+
+
+def test_worker_user_data_with_golden_ami_and_worker_command():
+    user_data = render_worker_user_data({"WORK_QUEUE_URL": "https://sqs/queue"}, "/opt/app/bin/worker", golden_ami=True)
+
+    # The golden AMI is up to date and has the web server enabled.
+    assert "dnf" not in user_data
+    assert "sudo systemctl disable --now httpd" in user_data
+    assert "ExecStart=/opt/app/bin/worker\n" in user_data
+    assert WORKER_SCRIPT not in user_data
+    subprocess.run(["bash", "-n"], input=user_data, text=True, check=True)
+
+
+def test_install_script_with_cloudwatch_agent():
+    config = WebServerConfig.for_instance_type("t3.micro", alb_idle_timeout=60)
+    install_script = render_install_script(config, log_group_name="/stack/httpd/timing")
+
+    assert "dnf install -y amazon-cloudwatch-agent" in install_script
+    assert "systemctl enable --now apache-status" in install_script
+    assert "amazon-cloudwatch-agent" not in render_install_script(config)
+    subprocess.run(["bash", "-n"], input=install_script, text=True, check=True)
+
+
+def test_cloudwatch_agent_config():
+    agent_config = json.loads(render_cloudwatch_agent_config("/stack/httpd/timing"))
+
+    assert set(agent_config["metrics"]["metrics_collected"]) == {"mem", "disk", "procstat", "statsd"}
+    assert agent_config["metrics"]["aggregation_dimensions"] == [["AutoScalingGroupName"]]
+    assert agent_config["logs"]["logs_collected"]["files"]["collect_list"][0]["log_group_name"] == "/stack/httpd/timing"
+    assert agent_config["traces"]["traces_collected"] == {"otlp": {}, "xray": {}}
+
+
+def test_timing_log_records_duration_and_trace_id():
+    instrumentation_conf = render_instrumentation_conf()
+
+    assert '\\"duration_us\\":%D' in instrumentation_conf
+    assert '%{X-Amzn-Trace-Id}i' in instrumentation_conf
+    assert "Require local" in instrumentation_conf